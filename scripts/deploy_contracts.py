@@ -1,12 +1,17 @@
 """
 Deployment script for smart contracts
 """
-from brownie import network, accounts, SimpleToken, VulnerableVault, DeFiPool, AuctionContract, NFTMarketplace, TokenSale, SecureVault
+from brownie import network, accounts, chain, Wei, SimpleToken, VulnerableVault, DeFiPool, AuctionContract, NFTMarketplace, TokenSale, SecureVault
 from brownie.network import priority_fee
+from utils.rpc_metrics import get_rpc_metrics
+from utils.batch_reads import BatchReader
 import json
 import time
 
 
+RPC_METRICS_FILE = "reports/rpc_metrics_deploy.json"
+
+
 def deploy_simple_token():
     """Deploy SimpleToken contract"""
     print("🚀 Deploying SimpleToken...")
@@ -115,7 +120,7 @@ def deploy_auction_contract():
     fund_amount = "5 ether"
     deployer.transfer(auction.address, fund_amount)
     print(f"💰 Funded auction contract with {fund_amount}")
-    print(f"Contract balance: {auction.address.balance()}")
+    print(f"Contract balance: {auction.balance()}")
     
     return auction
 
@@ -147,7 +152,7 @@ def deploy_token_sale():
     token_sale = TokenSale.deploy(
         accounts[1],  # Mock token address
         accounts[0],  # Wallet
-        block.timestamp + 3600,  # Start in 1 hour
+        chain.time() + 3600,  # Start in 1 hour
         86400,  # 24 hour duration
         {"from": deployer}
     )
@@ -162,15 +167,19 @@ def deploy_token_sale():
     token_sale.createSaleTier(
         1,  # Tier ID
         1000,  # Rate (1000 tokens per ETH)
-        0.1 ether,  # Min purchase
-        10 ether,  # Max purchase
-        100 ether,  # Hard cap
+        "0.1 ether",  # Min purchase
+        "10 ether",  # Max purchase
+        "100 ether",  # Hard cap
         {"from": deployer}
     )
     
-    # Start sale
-    token_sale.startSale({"from": deployer})
-    print("✅ Token sale started")
+    # Start sale once its window opens; only a development chain's clock can be advanced
+    if network.show_active() == "development":
+        chain.sleep(3600)
+        token_sale.startSale({"from": deployer})
+        print("✅ Token sale started")
+    else:
+        print("⏳ Sale opens in 1 hour; call startSale() then")
     
     return token_sale
 
@@ -182,12 +191,11 @@ def deploy_mock_erc20(name, symbol, initial_supply, deployer=None):
     if deployer is None:
         deployer = accounts[0]
     
-    # This would deploy a simple ERC20 contract
-    # For now, we'll return a mock address
-    mock_address = f"0x{'0' * 39}{len(name)}"
-    print(f"✅ Mock {name} deployed at: {mock_address}")
+    # SimpleToken is a plain ERC20, which is all the pools need
+    token = SimpleToken.deploy(name, symbol, initial_supply, {"from": deployer})
+    print(f"✅ Mock {name} deployed at: {token.address}")
     
-    return mock_address
+    return token.address
 
 
 def main():
@@ -197,68 +205,74 @@ def main():
     print(f"Gas price: {network.gas_price()}")
     
     deployed_contracts = {}
+    metrics = get_rpc_metrics().install()
     
     try:
         # Deploy SimpleToken
-        token = deploy_simple_token()
-        deployed_contracts["SimpleToken"] = {
-            "address": token.address,
-            "name": token.name(),
-            "symbol": token.symbol(),
-            "total_supply": str(token.totalSupply())
-        }
+        with metrics.scope("deploy:SimpleToken"):
+            token = deploy_simple_token()
+            deployed_contracts["SimpleToken"] = {
+                "address": token.address,
+                "name": token.name(),
+                "symbol": token.symbol(),
+                "total_supply": str(token.totalSupply())
+            }
         
         # Deploy VulnerableVault
-        vulnerable_vault = deploy_vulnerable_vault()
-        deployed_contracts["VulnerableVault"] = {
-            "address": vulnerable_vault.address,
-            "owner": vulnerable_vault.owner(),
-            "balance": str(vulnerable_vault.balance())
-        }
+        with metrics.scope("deploy:VulnerableVault"):
+            vulnerable_vault = deploy_vulnerable_vault()
+            deployed_contracts["VulnerableVault"] = {
+                "address": vulnerable_vault.address,
+                "owner": vulnerable_vault.owner(),
+                "balance": str(vulnerable_vault.balance())
+            }
         
         # Deploy SecureVault
-        secure_vault = deploy_secure_vault()
-        deployed_contracts["SecureVault"] = {
-            "address": secure_vault.address,
-            "owner": secure_vault.owner(),
-            "balance": str(secure_vault.balance())
-        }
+        with metrics.scope("deploy:SecureVault"):
+            secure_vault = deploy_secure_vault()
+            deployed_contracts["SecureVault"] = {
+                "address": secure_vault.address,
+                "owner": secure_vault.owner(),
+                "balance": str(secure_vault.balance())
+            }
         
         # Deploy AuctionContract
-        auction = deploy_auction_contract()
-        deployed_contracts["AuctionContract"] = {
-            "address": auction.address,
-            "next_auction_id": str(auction.nextAuctionId())
-        }
+        with metrics.scope("deploy:AuctionContract"):
+            auction = deploy_auction_contract()
+            deployed_contracts["AuctionContract"] = {
+                "address": auction.address,
+                "next_auction_id": str(auction.nextAuctionId())
+            }
         
         # Deploy NFTMarketplace
-        marketplace = deploy_nft_marketplace()
-        deployed_contracts["NFTMarketplace"] = {
-            "address": marketplace.address,
-            "marketplace_fee": str(marketplace.marketplaceFee())
-        }
+        with metrics.scope("deploy:NFTMarketplace"):
+            marketplace = deploy_nft_marketplace()
+            deployed_contracts["NFTMarketplace"] = {
+                "address": marketplace.address,
+                "marketplace_fee": str(marketplace.marketplaceFee())
+            }
         
         # Deploy TokenSale
-        token_sale = deploy_token_sale()
-        deployed_contracts["TokenSale"] = {
-            "address": token_sale.address,
-            "token": token_sale.token(),
-            "wallet": token_sale.wallet(),
-            "sale_active": token_sale.saleActive()
-        }
+        with metrics.scope("deploy:TokenSale"):
+            token_sale = deploy_token_sale()
+            deployed_contracts["TokenSale"] = {
+                "address": token_sale.address,
+                "token": token_sale.token(),
+                "wallet": token_sale.wallet(),
+                "sale_active": token_sale.saleActive()
+            }
         
-        # Deploy mock tokens for DeFiPool
-        mock_token = deploy_mock_erc20("Mock Token", "MOCK", 1000000 * 10**18)
-        mock_reward_token = deploy_mock_erc20("Mock Reward", "REWARD", 500000 * 10**18)
-        
-        # Deploy DeFiPool
-        pool = deploy_defi_pool(mock_token, mock_reward_token)
-        deployed_contracts["DeFiPool"] = {
-            "address": pool.address,
-            "token": pool.token(),
-            "reward_token": pool.rewardToken(),
-            "reward_rate": str(pool.rewardRate())
-        }
+        # Deploy DeFiPool with mock tokens
+        with metrics.scope("deploy:DeFiPool"):
+            mock_token = deploy_mock_erc20("Mock Token", "MOCK", 1000000 * 10**18)
+            mock_reward_token = deploy_mock_erc20("Mock Reward", "REWARD", 500000 * 10**18)
+            pool = deploy_defi_pool(mock_token, mock_reward_token)
+            deployed_contracts["DeFiPool"] = {
+                "address": pool.address,
+                "token": pool.token(),
+                "reward_token": pool.rewardToken(),
+                "reward_rate": str(pool.rewardRate())
+            }
         
         # Save deployment info
         deployment_info = {
@@ -279,6 +293,11 @@ def main():
     except Exception as e:
         print(f"❌ Deployment failed: {e}")
         raise
+    
+    finally:
+        # A partial deployment still reports the calls it made
+        print(metrics.format_report())
+        metrics.save(RPC_METRICS_FILE)
 
 
 def setup_test_environment():
@@ -311,7 +330,7 @@ def setup_test_environment():
     
     # Make deposits to vaults
     for i, account in enumerate(test_accounts):
-        amount = (i + 1) * 1 ether
+        amount = Wei(f"{i + 1} ether")
         
         # Deposit to vulnerable vault
         vulnerable_vault.deposit({"from": account, "value": amount})
@@ -333,34 +352,38 @@ def setup_test_environment():
         auction_id = auction.createAuction(
             f"Test Auction {i+1}",
             1000,  # 1000 blocks duration
-            0.1 ether,  # Min bid increment
+            "0.1 ether",  # Min bid increment
             {"from": account}
         )
         print(f"🏛️ Created auction {auction_id} by {account.address}")
     
-    # Save test setup info
+    # Save test setup info (all balances in one batched round trip)
+    addresses = [str(account.address) for account in test_accounts]
+    reader = BatchReader()
+    balances = reader.call_many(
+        [(token.balanceOf, (address,)) for address in addresses]
+        + [(vulnerable_vault.balances, (address,)) for address in addresses]
+        + [(secure_vault.balances, (address,)) for address in addresses]
+    )
+    vault_balances = reader.ether_balances([vulnerable_vault.address, secure_vault.address])
+    count = len(addresses)
+    
     setup_info = {
-        "test_accounts": [str(account.address) for account in test_accounts],
-        "token_balances": {
-            str(account.address): str(token.balanceOf(account)) 
-            for account in test_accounts
-        },
-        "vulnerable_vault_balances": {
-            str(account.address): str(vulnerable_vault.balances(account)) 
-            for account in test_accounts
-        },
-        "secure_vault_balances": {
-            str(account.address): str(secure_vault.balances(account)) 
-            for account in test_accounts
-        },
-        "vulnerable_vault_total_balance": str(vulnerable_vault.balance()),
-        "secure_vault_total_balance": str(secure_vault.balance()),
+        "test_accounts": addresses,
+        "token_balances": dict(zip(addresses, map(str, balances[:count]))),
+        "vulnerable_vault_balances": dict(zip(addresses, map(str, balances[count:2 * count]))),
+        "secure_vault_balances": dict(zip(addresses, map(str, balances[2 * count:]))),
+        "vulnerable_vault_total_balance": str(vault_balances[0]),
+        "secure_vault_total_balance": str(vault_balances[1]),
         "auctions_created": len(test_accounts)
     }
     
     with open("reports/test_setup.json", "w") as f:
         json.dump(setup_info, f, indent=2)
     
+    # Includes the deployment calls counted by main()
+    get_rpc_metrics().save(RPC_METRICS_FILE)
+    
     print("\n✅ Test environment setup completed!")
     return contracts, setup_info
 
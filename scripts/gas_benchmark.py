@@ -0,0 +1,335 @@
+"""
+Gas regression benchmark: run a fixed catalogue of operations and compare with a stored baseline
+"""
+import argparse
+import csv
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Allow running as a plain script as well as through `brownie run`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.evm_backend import InProcessEVMBackend
+from utils.artifact_store import ArtifactStore
+
+
+BUILD_DIR = PROJECT_ROOT / "build" / "contracts"
+BASELINE_FILE = "reports/gas_baseline.json"
+REPORT_JSON = "reports/gas_report.json"
+REPORT_CSV = "reports/gas_report.csv"
+
+DEFAULT_TOLERANCE = 0.02  # 2% more gas than the baseline is a regression
+DEFAULT_REPEAT = 3
+
+
+# Each entry deploys and prepares one contract (setup), then every operation
+# runs once from that prepared state and returns the receipt to measure.
+
+def _setup_simple_token(deploy, accounts):
+    token = deploy("SimpleToken", "Bench Token", "BENCH", 500000 * 10**18, {"from": accounts[0]})
+    token.approve(accounts[1], 10**21, {"from": accounts[0]})
+    return {"token": token}
+
+
+def _setup_vulnerable_vault(deploy, accounts):
+    vault = deploy("VulnerableVault", {"from": accounts[0]})
+    vault.deposit({"from": accounts[1], "value": 10**18})
+    return {"vault": vault}
+
+
+def _setup_secure_vault(deploy, accounts):
+    vault = deploy("SecureVault", {"from": accounts[0]})
+    vault.deposit({"from": accounts[1], "value": 10**18})
+    return {"vault": vault}
+
+
+def _setup_defi_pool(deploy, accounts):
+    token = deploy("SimpleToken", "Stake Token", "STK", 500000 * 10**18, {"from": accounts[0]})
+    pool = deploy("DeFiPool", token, token, {"from": accounts[0]})
+    token.transfer(accounts[1], 10**21, {"from": accounts[0]})
+    token.approve(pool, 10**21, {"from": accounts[1]})
+    return {"token": token, "pool": pool}
+
+
+def _setup_auction(deploy, accounts):
+    auction = deploy("AuctionContract", {"from": accounts[0]})
+    auction.createAuction("Benchmark", 1000, 10**17, {"from": accounts[0]})
+    auction.bid(1, {"from": accounts[1], "value": 10**18})
+    return {"auction": auction}
+
+
+def _setup_marketplace(deploy, accounts):
+    marketplace = deploy("NFTMarketplace", {"from": accounts[0]})
+    # ERC20 transferFrom shares the ERC721 selector, so a token can stand in for the NFT
+    nft = deploy("SimpleToken", "Listing Token", "LST", 500000 * 10**18, {"from": accounts[0]})
+    nft.approve(marketplace, 10**18, {"from": accounts[0]})
+    marketplace.createListing(nft, 1, 10**18, 86400, {"from": accounts[0]})
+    marketplace.makeOffer(1, {"from": accounts[2], "value": 10**18})
+    return {"marketplace": marketplace, "nft": nft}
+
+
+def _setup_token_sale(deploy, accounts):
+    sale = deploy("TokenSale", accounts[5], accounts[0], 0, 10**9, {"from": accounts[0]})
+    sale.createSaleTier(1, 1000, 10**17, 10**19, 10**20, {"from": accounts[0]})
+    sale.startSale({"from": accounts[0]})
+    return {"sale": sale}
+
+
+CATALOGUE = {
+    "SimpleToken": {
+        "setup": _setup_simple_token,
+        "operations": {
+            "transfer": lambda c, a: c["token"].transfer(a[2], 10**18, {"from": a[0]}),
+            "approve": lambda c, a: c["token"].approve(a[2], 10**18, {"from": a[0]}),
+            "transferFrom": lambda c, a: c["token"].transferFrom(a[0], a[2], 10**18, {"from": a[1]}),
+            "mint": lambda c, a: c["token"].mint(a[2], 10**18, {"from": a[0]}),
+            "burn": lambda c, a: c["token"].burn(10**18, {"from": a[0]}),
+        },
+    },
+    "VulnerableVault": {
+        "setup": _setup_vulnerable_vault,
+        "operations": {
+            "deposit": lambda c, a: c["vault"].deposit({"from": a[2], "value": 10**18}),
+            "withdraw": lambda c, a: c["vault"].withdraw(10**17, {"from": a[1]}),
+            "withdrawSecure": lambda c, a: c["vault"].withdrawSecure(10**17, {"from": a[1]}),
+        },
+    },
+    "SecureVault": {
+        "setup": _setup_secure_vault,
+        "operations": {
+            "deposit": lambda c, a: c["vault"].deposit({"from": a[2], "value": 10**18}),
+            "withdraw": lambda c, a: c["vault"].withdraw(10**17, {"from": a[1]}),
+        },
+    },
+    "DeFiPool": {
+        "setup": _setup_defi_pool,
+        "operations": {
+            "stake": lambda c, a: c["pool"].stake(100 * 10**18, {"from": a[1]}),
+        },
+    },
+    "AuctionContract": {
+        "setup": _setup_auction,
+        "operations": {
+            "createAuction": lambda c, a: c["auction"].createAuction("Next", 1000, 10**17, {"from": a[0]}),
+            "bid": lambda c, a: c["auction"].bid(1, {"from": a[2], "value": 2 * 10**18}),
+            "bidSecure": lambda c, a: c["auction"].bidSecure(1, {"from": a[2], "value": 2 * 10**18}),
+        },
+    },
+    "NFTMarketplace": {
+        "setup": _setup_marketplace,
+        "operations": {
+            "createListing": lambda c, a: c["marketplace"].createListing(c["nft"], 2, 10**18, 86400, {"from": a[0]}),
+            "makeOffer": lambda c, a: c["marketplace"].makeOffer(1, {"from": a[3], "value": 10**18}),
+            "acceptOffer": lambda c, a: c["marketplace"].acceptOffer(1, 0, {"from": a[0]}),
+        },
+    },
+    "TokenSale": {
+        "setup": _setup_token_sale,
+        "operations": {
+            "buyTokens": lambda c, a: c["sale"].buyTokens(1, {"from": a[1], "value": 10**18}),
+            "buyTokensSecure": lambda c, a: c["sale"].buyTokensSecure(1, {"from": a[1], "value": 10**18}),
+        },
+    },
+}
+
+
+def load_artifact(name, build_dir=BUILD_DIR):
+    """Load a brownie build artifact, or compile through the shared artifact store"""
+    path = Path(build_dir) / f"{name}.json"
+    if not path.exists():
+        return ArtifactStore(contracts_dir=str(PROJECT_ROOT / "contracts")).contract(name)
+    with open(path) as f:
+        return json.load(f)
+
+
+def run_contract_benchmarks(contract_name, build_dir=str(BUILD_DIR), repeat=DEFAULT_REPEAT):
+    """Benchmark one catalogue entry on its own in-process chain
+
+    Runs in a worker process. Every operation starts from the snapshot taken
+    after setup, so operations never see each other's state changes.
+    """
+    entry = CATALOGUE[contract_name]
+    backend = InProcessEVMBackend()
+    artifacts = {}
+
+    def deploy(name, *args):
+        if name not in artifacts:
+            artifacts[name] = load_artifact(name, build_dir)
+        return backend.deploy(artifacts[name], *args)
+
+    contracts = entry["setup"](deploy, backend.accounts)
+    snapshot_id = backend.snapshot()
+
+    results = {}
+    for op_name, operation in entry["operations"].items():
+        key = f"{contract_name}.{op_name}"
+        timings = []
+        gas_used = None
+        try:
+            for _ in range(repeat):
+                backend.revert(snapshot_id)
+                start = time.perf_counter()
+                tx = operation(contracts, backend.accounts)
+                timings.append(time.perf_counter() - start)
+                gas_used = tx.gas_used
+            results[key] = {"gas": gas_used, "seconds": statistics.median(timings)}
+        except Exception as e:
+            results[key] = {"gas": None, "seconds": None, "error": str(e)}
+
+    return results
+
+
+def run_catalogue(contract_names=None, workers=None, build_dir=str(BUILD_DIR), repeat=DEFAULT_REPEAT):
+    """Run the catalogue, one worker process per contract"""
+    contract_names = contract_names or list(CATALOGUE)
+    results = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            name: executor.submit(run_contract_benchmarks, name, build_dir, repeat)
+            for name in contract_names
+        }
+        for name, future in futures.items():
+            try:
+                results.update(future.result())
+            except Exception as e:
+                print(f"❌ {name} setup failed: {e}")
+                for op_name in CATALOGUE[name]["operations"]:
+                    results[f"{name}.{op_name}"] = {"gas": None, "seconds": None, "error": str(e)}
+
+    return dict(sorted(results.items()))
+
+
+def compare_with_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE, time_tolerance=None):
+    """Annotate results with baseline deltas; regressions exceed the tolerance"""
+    rows = []
+    for key, current in results.items():
+        base = baseline.get(key, {})
+        row = {
+            "operation": key,
+            "gas": current["gas"],
+            "baseline_gas": base.get("gas"),
+            "seconds": current["seconds"],
+            "baseline_seconds": base.get("seconds"),
+            "status": "ok",
+        }
+
+        if current["gas"] is None:
+            row["status"] = "error"
+        elif row["baseline_gas"] is None:
+            row["status"] = "new"
+        else:
+            row["gas_delta"] = current["gas"] - row["baseline_gas"]
+            row["gas_change"] = row["gas_delta"] / row["baseline_gas"]
+            if row["gas_change"] > tolerance:
+                row["status"] = "regression"
+            elif row["gas_change"] < -tolerance:
+                row["status"] = "improved"
+
+            if time_tolerance is not None and row["baseline_seconds"]:
+                row["time_change"] = current["seconds"] / row["baseline_seconds"] - 1
+                if row["time_change"] > time_tolerance and row["status"] == "ok":
+                    row["status"] = "slower"
+
+        rows.append(row)
+
+    for key in baseline:
+        if key not in results:
+            rows.append({"operation": key, "baseline_gas": baseline[key].get("gas"), "status": "missing"})
+
+    return rows
+
+
+def save_gas_reports(rows, json_path=REPORT_JSON, csv_path=REPORT_CSV):
+    """Write the comparison to the report files declared in brownie-config.yaml"""
+    Path(json_path).parent.mkdir(exist_ok=True)
+    with open(json_path, "w") as f:
+        json.dump({"timestamp": time.time(), "operations": rows}, f, indent=2)
+
+    fields = ["operation", "gas", "baseline_gas", "gas_delta", "gas_change", "seconds",
+              "baseline_seconds", "time_change", "status"]
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def save_baseline(results, path=BASELINE_FILE):
+    """Store the current run as the baseline, keeping entries that were not re-run"""
+    Path(path).parent.mkdir(exist_ok=True)
+    operations = load_baseline(path) or {}
+    operations.update({key: value for key, value in results.items() if value["gas"] is not None})
+    with open(path, "w") as f:
+        json.dump({"timestamp": time.time(), "operations": operations}, f, indent=2)
+
+
+def load_baseline(path=BASELINE_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)["operations"]
+    except FileNotFoundError:
+        return None
+
+
+def main(tolerance=DEFAULT_TOLERANCE, time_tolerance=None, update_baseline=False,
+         contracts=None, workers=None, repeat=DEFAULT_REPEAT, baseline_path=BASELINE_FILE):
+    """Run the benchmark; returns the process exit code (1 on regressions)"""
+    print("⛽ Running gas benchmark catalogue...")
+    start = time.perf_counter()
+    results = run_catalogue(contracts, workers, repeat=int(repeat))
+    print(f"Measured {len(results)} operations in {time.perf_counter() - start:.2f}s")
+
+    baseline = load_baseline(baseline_path)
+    if baseline is not None and contracts:
+        baseline = {key: value for key, value in baseline.items() if key.split(".")[0] in contracts}
+    rows = compare_with_baseline(results, baseline or {}, float(tolerance),
+                                 float(time_tolerance) if time_tolerance is not None else None)
+    save_gas_reports(rows)
+
+    for row in rows:
+        gas = row.get("gas")
+        change = f"{row['gas_change']:+.2%}" if "gas_change" in row else ""
+        print(f"  {row['status']:<10} {row['operation']:<36} {gas if gas is not None else '-':>9} {change}")
+
+    if baseline is None or update_baseline:
+        save_baseline(results, baseline_path)
+        print(f"📌 Baseline written to {baseline_path}")
+        return 0
+
+    regressions = [
+        row for row in rows
+        if row["status"] in ("regression", "slower", "missing")
+        or (row["status"] == "error" and row.get("baseline_gas") is not None)
+    ]
+    if regressions:
+        print(f"❌ {len(regressions)} operations regressed against the baseline")
+        return 1
+
+    print("✅ No gas regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gas regression benchmark")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative gas increase before failing (default: 0.02)")
+    parser.add_argument("--time-tolerance", type=float, default=None,
+                        help="Also fail when wall time grows by more than this fraction")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store this run as the new baseline")
+    parser.add_argument("--contracts", nargs="*", choices=list(CATALOGUE),
+                        help="Only benchmark these contracts")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="Runs per operation; wall time is the median")
+    args = parser.parse_args()
+
+    sys.exit(main(args.tolerance, args.time_tolerance, args.update_baseline,
+                  args.contracts, args.workers, args.repeat))
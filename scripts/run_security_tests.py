@@ -2,93 +2,408 @@
 Script to run comprehensive security tests and generate reports
 """
 import subprocess
+import argparse
+import ast
 import json
+import os
+import queue
+import re
+import shutil
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from brownie import network
 
+# Allow running as a plain script as well as through `brownie run`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
 
-def run_brownie_tests(test_file, output_file=None):
-    """Run brownie tests and capture output"""
+from utils.rpc_metrics import merge_rpc_reports, format_rpc_report
+from utils.slither_scan import SlitherScanner
+from utils.artifact_store import ArtifactStore
+from utils.test_daemon import daemon_available, submit
+from utils.pytest_jsonl import JSONL_ENV_VAR, JsonlFollower, summarize_tests
+from utils.gas_profiler import GasProfiler
+from utils.state_snapshots import merge_timing_reports
+
+
+WORKER_BASE_PORT = 8600
+WORKER_MNEMONIC = "test test test test test test test test test test test junk"
+RPC_METRICS_PATTERN = "rpc_metrics*.json"
+SLITHER_REPORT = "reports/slither_report.json"
+TEST_TIMEOUT = 300
+JSONL_POLL_INTERVAL = 0.5  # seconds between reads of a running job's results file
+WORKSPACE_DIR = PROJECT_ROOT / ".workers"
+# Per-job outputs, merged by merge_job_reports once every job has finished
+JOB_REPORT_PATTERNS = ("rpc_metrics_tests*.json", "fixture_timings_*.json", "gas_profile_*.json")
+
+
+def job_report_env(test_target):
+    """Environment giving a test job its own report files (read by tests/conftest.py)"""
+    job_name = re.sub(r"[^A-Za-z0-9]+", "_", test_target).strip("_")
+    return {
+        "RPC_METRICS_FILE": f"reports/rpc_metrics_tests_{job_name}.json",
+        "FIXTURE_TIMINGS_FILE": f"reports/fixture_timings_{job_name}.json",
+        "GAS_PROFILE_FILE": f"reports/gas_profile_{job_name}.json",
+    }
+
+
+def merge_job_reports():
+    """Combine per-job fixture timings and gas profiles into the shared reports"""
+    timing_files = sorted(Path("reports").glob("fixture_timings_*.json"))
+    if timing_files:
+        timings = merge_timing_reports([json.loads(path.read_text()) for path in timing_files])
+        with open("reports/fixture_timings.json", "w") as f:
+            json.dump(timings, f, indent=2)
+    
+    profile_files = sorted(Path("reports").glob("gas_profile_*.json"))
+    if profile_files:
+        profiler = GasProfiler(w3=network.web3)
+        for path in profile_files:
+            profiler.load(str(path))
+        profiler.save_reports("reports")
+
+
+def run_brownie_tests(test_file, output_file=None, network_name=None, cwd=None):
+    """Run brownie tests, streaming their output and per-test results as they happen
+    
+    Returns the run outcome with per-test results parsed from the JSONL file
+    the tests write (utils/pytest_jsonl.py). ``cwd`` runs the job in a worker
+    workspace (see prepare_workspace).
+    """
     print(f"🧪 Running {test_file}...")
     
     cmd = ["brownie", "test", test_file, "-v", "--tb=short"]
     
+    if network_name:
+        cmd.extend(["--network", network_name])
+    
     if output_file:
         cmd.extend(["--html", f"reports/{output_file}", "--self-contained-html"])
     
+    # Each run writes its own reports and results (see tests/conftest.py)
+    job_name = re.sub(r"[^A-Za-z0-9]+", "_", test_file).strip("_")
+    results_file = f"reports/test_events_{job_name}.jsonl"
+    env = {
+        **os.environ,
+        **job_report_env(test_file),
+        JSONL_ENV_VAR: results_file,
+        "PYTHONUNBUFFERED": "1",
+    }
+    Path(results_file).unlink(missing_ok=True)
+    
+    # Concurrent jobs share the terminal, so their lines are tagged
+    prefix = f"[{network_name}] " if network_name else ""
+    follower = JsonlFollower(results_file)
+    events = []
+    
+    def collect():
+        for event in follower.read():
+            events.append(event)
+            if event["event"] == "test" and event["outcome"] == "failed":
+                print(f"{prefix}❌ {event['nodeid']} ({event['when']})")
+    
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-        
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   text=True, bufsize=1, env=env, cwd=cwd)
+    except Exception as e:
+        print(f"❌ Error running tests for {test_file}: {e}")
+        return {"success": False, "error": str(e)}
+    
+    timed_out = threading.Event()
+    
+    def kill():
+        timed_out.set()
+        process.kill()
+    
+    # The results file is polled on a timer, not re-opened for every output line
+    stop_polling = threading.Event()
+    
+    def poll():
+        while not stop_polling.wait(JSONL_POLL_INTERVAL):
+            collect()
+    
+    timer = threading.Timer(TEST_TIMEOUT, kill)
+    poller = threading.Thread(target=poll, daemon=True)
+    timer.start()
+    poller.start()
+    try:
+        for line in process.stdout:
+            print(f"{prefix}{line}", end="")
+        returncode = process.wait()
+    finally:
+        timer.cancel()
+        stop_polling.set()
+        poller.join()
+    collect()
+    
+    if timed_out.is_set():
+        print(f"❌ Tests timed out for {test_file}")
+    else:
         print(f"✅ Tests completed for {test_file}")
-        print(f"Return code: {result.returncode}")
-        
-        if result.stdout:
-            print("STDOUT:")
-            print(result.stdout)
+        print(f"Return code: {returncode}")
+    
+    summary = summarize_tests(events)
+    print(f"📊 {summary['passed']} passed, {summary['failed']} failed, {summary['skipped']} skipped "
+          f"({summary['test_seconds']:.2f}s in tests)")
+    
+    return {
+        "success": returncode == 0,
+        "returncode": returncode,
+        "timed_out": timed_out.is_set(),
+        "tests": summary,
+    }
+
+
+def run_daemon_tests(test_file, output_file=None):
+    """Run brownie tests on the warm daemon (scripts/test_daemon.py serve)"""
+    print(f"🧪 Running {test_file} on the test daemon...")
+    
+    args = [test_file, "-v", "--tb=short"]
+    if output_file:
+        args.extend(["--html", f"reports/{output_file}", "--self-contained-html"])
+    
+    env = job_report_env(test_file)
+    events = []
+    
+    def on_event(event):
+        if event["event"] == "output":
+            print(event["text"], end="", flush=True)
+        elif event["event"] in ("test", "collect_error"):
+            events.append(event)
+    
+    try:
+        done = submit(args, env=env, on_event=on_event, timeout=TEST_TIMEOUT)
+    except OSError as e:
+        print(f"❌ Test daemon unavailable for {test_file}: {e}")
+        return {"success": False, "error": str(e)}
+    
+    if done.get("error"):
+        print(f"❌ Error running tests for {test_file}: {done['error']}")
+    print(f"✅ Tests completed for {test_file} in {done.get('seconds', 0):.2f}s")
+    print(f"Return code: {done['exit_code']}")
+    
+    return {
+        "success": done["exit_code"] == 0,
+        "returncode": done["exit_code"],
+        "timed_out": bool(done.get("timed_out")),
+        "tests": summarize_tests(events),
+    }
+
+
+def discover_test_jobs(test_files, split_classes=False):
+    """Expand test files into (target, html report) jobs, optionally one per test class"""
+    jobs = []
+    
+    for test_file, output_file in test_files:
+        if not split_classes:
+            jobs.append((test_file, output_file))
+            continue
         
-        if result.stderr:
-            print("STDERR:")
-            print(result.stderr)
+        tree = ast.parse(Path(test_file).read_text())
+        classes = [
+            node.name for node in tree.body
+            if isinstance(node, ast.ClassDef) and node.name.startswith("Test")
+        ]
         
-        return result.returncode == 0
+        if not classes:
+            jobs.append((test_file, output_file))
+            continue
         
-    except subprocess.TimeoutExpired:
-        print(f"❌ Tests timed out for {test_file}")
-        return False
+        for class_name in classes:
+            jobs.append((
+                f"{test_file}::{class_name}",
+                output_file.replace(".html", f"_{class_name}.html")
+            ))
+    
+    return jobs
+
+
+def ensure_worker_network(worker_id):
+    """Register a local development network on a dedicated port for a worker"""
+    network_name = f"security-worker-{worker_id}"
+    port = WORKER_BASE_PORT + worker_id
+    
+    cmd = [
+        "brownie", "networks", "add", "Development", network_name,
+        "cmd=ganache-cli",
+        "host=http://127.0.0.1",
+        f"port={port}",
+        "gas_limit=12000000",
+        "accounts=10",
+        f"mnemonic={WORKER_MNEMONIC}",
+    ]
+    
+    # Fails harmlessly when the network is already registered
+    subprocess.run(cmd, capture_output=True, text=True)
+    
+    return network_name
+
+
+def prepare_workspace(name):
+    """Project view for one worker that shares everything but build/
+    
+    `brownie test` writes build/ (its test results and coverage cache), so
+    concurrent jobs each get a fresh copy of the compiled build next to
+    links to the real sources, tests and reports.
+    """
+    workspace = WORKSPACE_DIR / name
+    workspace.mkdir(parents=True, exist_ok=True)
+    
+    for entry in PROJECT_ROOT.iterdir():
+        if entry.name in ("build", ".workers", ".git"):
+            continue
+        link = workspace / entry.name
+        if not link.is_symlink() and not link.exists():
+            link.symlink_to(entry)
+    
+    shutil.rmtree(workspace / "build", ignore_errors=True)
+    if (PROJECT_ROOT / "build").exists():
+        shutil.copytree(PROJECT_ROOT / "build", workspace / "build")
+    
+    return workspace
+
+
+def compile_once():
+    """Compile before any test job starts, so no worker recompiles
+    
+    brownie keeps its own build/ (its coverage and pc maps come from its
+    compiler pipeline), so it compiles once here and every `brownie test`
+    subprocess finds it up to date. The shared artifact store is filled in
+    the same step for the testers, the state builder and Slither.
+    """
+    print("🛠️  Compiling contracts...")
+    result = subprocess.run(["brownie", "compile"], capture_output=True, text=True)
+    if result.returncode != 0:
+        print("❌ brownie compile failed")
+        print(result.stderr or result.stdout)
+    
+    store = ArtifactStore()
+    try:
+        artifacts = store.compile_all()
+        print(f"📦 Artifact store: {len(artifacts)} contracts "
+              f"({store.stats['hits']} files cached, {store.stats['compiles']} compiled)")
     except Exception as e:
-        print(f"❌ Error running tests for {test_file}: {e}")
-        return False
+        print(f"⚠️  Artifact store not filled: {e}")
+    
+    return result.returncode == 0
 
 
-def run_security_scan():
-    """Run security scan with Slither"""
+def run_test_jobs(jobs, max_workers):
+    """Run test jobs concurrently, each worker bound to its own local chain and workspace"""
+    print(f"⚡ Running {len(jobs)} test jobs across {max_workers} workers...")
+    
+    workers = queue.Queue()
+    for worker_id in range(max_workers):
+        network_name = ensure_worker_network(worker_id)
+        workers.put((network_name, prepare_workspace(network_name)))
+    
+    def run_job(job):
+        test_target, output_file = job
+        network_name, workspace = workers.get()
+        try:
+            start = time.time()
+            outcome = run_brownie_tests(test_target, output_file, network_name, cwd=workspace)
+            return {
+                **outcome,
+                "duration": round(time.time() - start, 3),
+                "network": network_name,
+                "report": f"reports/{output_file}",
+            }
+        finally:
+            workers.put((network_name, workspace))
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        outcomes = list(executor.map(run_job, jobs))
+    
+    # Merge in job order so the summary is deterministic
+    return {job[0]: outcome for job, outcome in zip(jobs, outcomes)}
+
+
+def save_test_results(test_results):
+    """Save merged per-job test outcomes"""
+    with open("reports/test_results.json", "w") as f:
+        json.dump(test_results, f, indent=2)
+
+
+def run_security_scan(workers=None):
+    """Run Slither on every contract, rescanning only changed source closures"""
     print("🔍 Running Slither security scan...")
     
+    contract_files = sorted(str(path) for path in Path("contracts").glob("*.sol"))
     try:
-        cmd = ["slither", "contracts/", "--json", "reports/slither_report.json"]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-        
-        if result.returncode == 0:
-            print("✅ Slither scan completed successfully")
-            
-            # Parse and display results
-            try:
-                with open("reports/slither_report.json", "r") as f:
-                    slither_results = json.load(f)
-                
-                print(f"📊 Slither found {len(slither_results.get('results', {}).get('detectors', []))} issues")
-                
-                for detector in slither_results.get('results', {}).get('detectors', []):
-                    print(f"⚠️  {detector.get('check', 'Unknown')}: {detector.get('description', 'No description')}")
-                    
-            except Exception as e:
-                print(f"Error parsing Slither results: {e}")
-                
-        else:
-            print("❌ Slither scan failed")
-            print(result.stderr)
-            
-    except subprocess.TimeoutExpired:
-        print("❌ Slither scan timed out")
+        scanner = SlitherScanner(workers=workers)
+        slither_results = scanner.scan(contract_files)
     except FileNotFoundError:
         print("❌ Slither not found. Install with: pip install slither-analyzer")
+        return None
     except Exception as e:
         print(f"❌ Error running Slither: {e}")
+        return None
+    
+    with open(SLITHER_REPORT, "w") as f:
+        json.dump(slither_results, f, indent=2)
+    
+    for path, summary in slither_results["contracts"].items():
+        if not summary["success"]:
+            print(f"❌ {path}: {summary['error']}")
+        else:
+            source = "cached" if summary["cached"] else f"{summary['seconds']:.1f}s"
+            print(f"  {path:<40} {summary['detectors']:>3} issues ({source})")
+    
+    stats = slither_results["cache"]
+    print(f"📊 Slither found {len(slither_results['results']['detectors'])} issues "
+          f"({stats['hits']} contracts cached, {stats['misses']} scanned)")
+    for detector in slither_results["results"]["detectors"]:
+        print(f"⚠️  {detector.get('check', 'Unknown')}: {detector.get('description', 'No description')}")
+    
+    return slither_results
 
 
-def generate_comprehensive_report():
-    """Generate comprehensive security report"""
+def generate_comprehensive_report(slither_results=None):
+    """Generate comprehensive security report
+    
+    ``slither_results`` is the merged scan from ``run_security_scan``; it is
+    only read back from reports/slither_report.json when not passed in.
+    """
     print("📊 Generating comprehensive security report...")
     
     report = {
         "timestamp": int(time.time()),
         "network": network.show_active(),
         "test_results": {},
+        "test_runs": {},
         "vulnerabilities": [],
         "summary": {}
     }
     
+    # Collect merged test run outcomes
+    runs_path = Path("reports/test_results.json")
+    if runs_path.exists():
+        try:
+            with open(runs_path, "r") as f:
+                report["test_runs"] = json.load(f)
+        except Exception as e:
+            print(f"Error reading test_results.json: {e}")
+    
+    # Per-test timings parsed while the runs streamed
+    runs_with_tests = [run for run in report["test_runs"].values() if run.get("tests")]
+    if runs_with_tests:
+        slowest = [test for run in runs_with_tests for test in run["tests"]["slowest"]]
+        report["test_summary"] = {
+            **{key: sum(run["tests"][key] for run in runs_with_tests)
+               for key in ("passed", "failed", "skipped", "collect_errors")},
+            "test_seconds": round(sum(run["tests"]["test_seconds"] for run in runs_with_tests), 3),
+            "slowest": sorted(slowest, key=lambda test: test["duration"], reverse=True)[:10],
+            # A test failing in more than one phase is listed once
+            "failures": list(dict.fromkeys(
+                test["nodeid"] for run in runs_with_tests for test in run["tests"]["failures"]
+            )),
+        }
+    
     # Collect test results
     test_files = [
         "test_security_comprehensive.py",
@@ -129,13 +444,28 @@ def generate_comprehensive_report():
             except Exception as e:
                 print(f"Error reading {report_file}: {e}")
     
+    # Merge RPC counters written by test runs and scripts
+    rpc_reports = []
+    for metrics_path in sorted(Path("reports").glob(RPC_METRICS_PATTERN)):
+        try:
+            with open(metrics_path, "r") as f:
+                rpc_reports.append(json.load(f))
+        except Exception as e:
+            print(f"Error reading {metrics_path.name}: {e}")
+    if rpc_reports:
+        report["rpc_metrics"] = merge_rpc_reports(rpc_reports)
+        print(format_rpc_report(report["rpc_metrics"]))
+    
     # Add Slither results
-    slither_path = Path("reports/slither_report.json")
-    if slither_path.exists():
+    slither_path = Path(SLITHER_REPORT)
+    if slither_results is None and slither_path.exists():
         try:
             with open(slither_path, "r") as f:
                 slither_results = json.load(f)
-            
+        except Exception as e:
+            print(f"Error reading Slither results: {e}")
+    if slither_results is not None:
+        try:
             report["slither_results"] = slither_results
             
             # Count Slither issues
@@ -245,6 +575,33 @@ Network: {report['network']}
             markdown += f"- Vulnerabilities Found: {results['total_vulnerabilities']}\n"
         markdown += "\n"
     
+    tests = report.get("test_summary")
+    if tests:
+        markdown += "## ⏱️ Test Runs\n\n"
+        markdown += f"- **Passed**: {tests['passed']}\n"
+        markdown += f"- **Failed**: {tests['failed']}\n"
+        markdown += f"- **Skipped**: {tests['skipped']}\n"
+        markdown += f"- **Time in tests**: {tests['test_seconds']:.2f}s\n\n"
+        for nodeid in tests["failures"]:
+            markdown += f"- ❌ `{nodeid}`\n"
+        markdown += "\n| slowest tests | seconds |\n|---|---:|\n"
+        for test in tests["slowest"]:
+            markdown += f"| `{test['nodeid']}` | {test['duration']:.2f} |\n"
+        markdown += "\n"
+    
+    rpc = report.get("rpc_metrics")
+    if rpc:
+        totals = rpc["totals"]
+        markdown += "## 📡 RPC Usage\n\n"
+        markdown += f"- **Calls**: {totals['calls']} ({totals['errors']} errors)\n"
+        markdown += f"- **Bytes**: {totals['request_bytes']} sent, {totals['response_bytes']} received\n"
+        markdown += f"- **Time**: {totals['seconds']:.2f}s\n\n"
+        markdown += "| method | calls | seconds |\n|---|---:|---:|\n"
+        methods = sorted(rpc["by_method"].items(), key=lambda item: item[1]["seconds"], reverse=True)
+        for method, stats in methods[:10]:
+            markdown += f"| {method} | {stats['calls']} | {stats['seconds']:.2f} |\n"
+        markdown += "\n"
+    
     markdown += """
 ## 🔍 Tools Used
 
@@ -261,31 +618,64 @@ Network: {report['network']}
         f.write(markdown)
 
 
-def main():
+def main(jobs=1, split_classes=False, slither_workers=None, use_daemon=False):
     """Main function to run all security tests"""
     print("🚀 Starting comprehensive security testing...")
     print(f"Network: {network.show_active()}")
     
+    # Arguments arrive as strings from `brownie run scripts/run_security_tests.py main 8 true`
+    jobs = int(jobs)
+    split_classes = str(split_classes).lower() in ("1", "true", "yes")
+    slither_workers = int(slither_workers) if slither_workers else None
+    use_daemon = str(use_daemon).lower() in ("1", "true", "yes")
+    
     # Create reports directory
     Path("reports").mkdir(exist_ok=True)
     
+    # Drop per-job reports left by earlier test runs
+    for pattern in JOB_REPORT_PATTERNS:
+        for stale in Path("reports").glob(pattern):
+            stale.unlink()
+    
+    compile_once()
+    
     # Run test suites
     test_files = [
         ("tests/test_security_comprehensive.py", "comprehensive_tests.html"),
         ("tests/test_reentrancy_specific.py", "reentrancy_tests.html")
     ]
     
-    test_results = {}
+    if jobs > 1:
+        test_jobs = discover_test_jobs(test_files, split_classes)
+        test_results = run_test_jobs(test_jobs, min(jobs, len(test_jobs)))
+    else:
+        test_results = {}
+        
+        if use_daemon and not daemon_available():
+            print("⚠️  No test daemon running; starting a brownie process per file")
+            use_daemon = False
+        
+        for test_file, output_file in test_files:
+            start = time.time()
+            if use_daemon:
+                outcome = run_daemon_tests(test_file, output_file)
+            else:
+                outcome = run_brownie_tests(test_file, output_file)
+            test_results[test_file] = {
+                **outcome,
+                "duration": round(time.time() - start, 3),
+                "network": network.show_active(),
+                "report": f"reports/{output_file}",
+            }
     
-    for test_file, output_file in test_files:
-        success = run_brownie_tests(test_file, output_file)
-        test_results[test_file] = success
+    save_test_results(test_results)
+    merge_job_reports()
     
     # Run security scan
-    run_security_scan()
+    slither_results = run_security_scan(slither_workers)
     
     # Generate comprehensive report
-    report = generate_comprehensive_report()
+    report = generate_comprehensive_report(slither_results)
     
     # Print summary
     print("\n" + "="*50)
@@ -317,4 +707,16 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Run security tests and generate reports")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Number of test files to run concurrently, each on its own chain")
+    parser.add_argument("--split-classes", action="store_true",
+                        help="Schedule each test class as a separate job")
+    parser.add_argument("--slither-workers", type=int, default=None,
+                        help="Concurrent per-contract Slither runs (default: security.slither_workers or one per CPU)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Run the test files on a warm test daemon (scripts/test_daemon.py serve)")
+    args = parser.parse_args()
+    
+    main(jobs=args.jobs, split_classes=args.split_classes, slither_workers=args.slither_workers,
+         use_daemon=args.daemon)
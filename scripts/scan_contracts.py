@@ -0,0 +1,180 @@
+"""
+Scan every compiled contract with an automatically generated test_config
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Allow running as a plain script as well as through `brownie run`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.artifact_store import ArtifactStore
+from utils.config_generator import ConfigGenerator
+from utils.evm_backend import InProcessEVMBackend
+from utils.result_cache import ResultCache
+from utils.security_helpers import SecurityTestSuite
+
+
+BUILD_DIR = PROJECT_ROOT / "build" / "contracts"
+REPORT_DIR = "reports/scan"
+SUMMARY_FILE = "reports/scan_summary.json"
+
+# Contracts that exist to attack others rather than to be scanned
+SKIP_CONTRACTS = {"ReentrancyAttacker"}
+
+FUND_AMOUNT = 10 * 10**18
+
+
+def load_project_artifacts(build_dir=BUILD_DIR, names=None):
+    """Deployable contracts compiled from contracts/, keyed by name
+
+    Uses brownie's build directory when it exists, otherwise the shared artifact store.
+    """
+    build_files = sorted(Path(build_dir).glob("*.json"))
+    if build_files:
+        compiled = []
+        for path in build_files:
+            with open(path) as f:
+                compiled.append(json.load(f))
+    else:
+        compiled = [
+            {**artifact, "type": "contract"}
+            for artifact in ArtifactStore().compile_all().values()
+        ]
+
+    artifacts = {}
+    for artifact in compiled:
+        name = artifact.get("contractName")
+        if artifact.get("type") != "contract" or not artifact.get("bytecode"):
+            continue
+        if not str(artifact.get("sourcePath", "")).startswith("contracts/") or name in SKIP_CONTRACTS:
+            continue
+        if names and name not in names:
+            continue
+        artifacts[name] = artifact
+    return artifacts
+
+
+def constructor_args(artifact, backend, token_address=None):
+    """Placeholder constructor arguments derived from the parameter types"""
+    constructor = next((e for e in artifact["abi"] if e.get("type") == "constructor"), {"inputs": []})
+    args = []
+    for param in constructor["inputs"]:
+        name = param["name"].lower()
+        if param["type"] == "address":
+            args.append(token_address if token_address and "token" in name else backend.accounts[1].address)
+        elif param["type"].startswith("uint"):
+            args.append(10**24 if "supply" in name else 2**40 if "end" in name else 0)
+        elif param["type"] == "string":
+            args.append(artifact["contractName"])
+        elif param["type"] == "bool":
+            args.append(False)
+        else:
+            raise ValueError(f"No placeholder for constructor parameter {param['name']} ({param['type']})")
+    return args
+
+
+def accepts_ether(abi):
+    return any(
+        e.get("type") in ("receive", "fallback") and e.get("stateMutability") == "payable" for e in abi
+    )
+
+
+def scan_contract(name, artifact, generator, token_artifact=None, workers=None, result_cache=None):
+    """Deploy one contract on a fresh in-process chain and run the security suite on it"""
+    backend = InProcessEVMBackend()
+    deployer = backend.accounts[0]
+
+    # Token parameters point at a freshly deployed token, other addresses at an account
+    token_address = None
+    if token_artifact is not None:
+        token = backend.deploy(token_artifact, *constructor_args(token_artifact, backend), {"from": deployer})
+        token_address = token.address
+
+    contract = backend.deploy(artifact, *constructor_args(artifact, backend, token_address), {"from": deployer})
+    if accepts_ether(artifact["abi"]):
+        deployer.transfer(contract, FUND_AMOUNT)
+
+    test_config = generator.for_artifact(artifact)
+    suite = SecurityTestSuite(backend, result_cache)
+    results = suite.run_all_tests(contract, test_config, workers)
+    return test_config, results, suite.generate_report(results)
+
+
+def count_vulnerabilities(results):
+    return sum(len(result.get("vulnerabilities", [])) for result in results.values() if isinstance(result, dict))
+
+
+def main(contracts=None, workers=None, use_natspec=True, build_dir=BUILD_DIR, use_result_cache=True):
+    """Scan the compiled contracts; returns the process exit code"""
+    print("🔍 Scanning compiled contracts with generated test configs...")
+    artifacts = load_project_artifacts(build_dir, contracts)
+    if not artifacts:
+        print(f"❌ No compiled contracts in {build_dir}; run `brownie compile` first")
+        return 1
+
+    generator = ConfigGenerator(use_natspec=use_natspec)
+    result_cache = ResultCache() if use_result_cache else None
+    token_artifact = artifacts.get("SimpleToken")
+    Path(REPORT_DIR).mkdir(parents=True, exist_ok=True)
+
+    summary = {"timestamp": time.time(), "contracts": {}}
+    for name, artifact in artifacts.items():
+        print(f"\n🧪 {name}")
+        start = time.perf_counter()
+        try:
+            test_config, results, report = scan_contract(
+                name, artifact, generator, token_artifact if name != "SimpleToken" else None, workers, result_cache
+            )
+        except Exception as e:
+            print(f"❌ {name} could not be scanned: {e}")
+            summary["contracts"][name] = {"error": str(e)}
+            continue
+
+        print(report)
+        with open(f"{REPORT_DIR}/{name}.json", "w") as f:
+            json.dump({"test_config": test_config, "results": results}, f, indent=2, default=str)
+
+        summary["contracts"][name] = {
+            "vulnerabilities": count_vulnerabilities(results),
+            "categories_run": sorted(k for k, v in results.items() if "skipped" not in v),
+            "categories_cached": sorted(k for k, v in results.items() if v.get("cached")),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+
+    summary["config_cache"] = generator.stats
+    if result_cache is not None:
+        summary["result_cache"] = result_cache.get_stats()
+    with open(SUMMARY_FILE, "w") as f:
+        json.dump(summary, f, indent=2)
+
+    print("\n📋 Scan summary")
+    for name, entry in summary["contracts"].items():
+        if "error" in entry:
+            print(f"  {name:<20} ❌ {entry['error']}")
+        else:
+            print(f"  {name:<20} {entry['vulnerabilities']:>3} findings  ({entry['seconds']:.2f}s)")
+    print(f"Configs: {generator.stats['hits']} cached, {generator.stats['misses']} generated")
+    if result_cache is not None:
+        print(f"Results: {result_cache.stats['hits']} reused, {result_cache.stats['misses']} computed")
+    print(f"✅ Reports written to {REPORT_DIR}/ and {SUMMARY_FILE}")
+
+    return 1 if any("error" in entry for entry in summary["contracts"].values()) else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scan every compiled contract with generated test configs")
+    parser.add_argument("--contracts", nargs="*", help="Only scan these contracts")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes per contract for the tester categories")
+    parser.add_argument("--no-natspec", action="store_true",
+                        help="Build configs from the ABI only, ignoring VULNERABLE/SECURE comments")
+    parser.add_argument("--no-result-cache", action="store_true",
+                        help="Run every category even if a cached result matches")
+    args = parser.parse_args()
+
+    sys.exit(main(args.contracts, args.workers, not args.no_natspec, use_result_cache=not args.no_result_cache))
@@ -0,0 +1,57 @@
+"""
+Run brownie tests through a warm daemon
+
+    python scripts/test_daemon.py serve                 # load once, then wait for jobs
+    python scripts/test_daemon.py run tests/test_reentrancy_specific.py -k withdraw
+    python scripts/test_daemon.py reload                # after editing contracts or utils
+    python scripts/test_daemon.py stop
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Allow running as a plain script as well as through `brownie run`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.test_daemon import JOB_TIMEOUT, TestDaemon, daemon_available, request, socket_path, submit
+
+
+def main(command="ping", pytest_args=None, network_name=None, path=None, timeout=None):
+    """Run a daemon command; returns the process exit code"""
+    if command == "serve":
+        daemon = TestDaemon(network_name, timeout or JOB_TIMEOUT)
+        daemon.start()
+        daemon.serve(path)
+        return 0
+
+    if not daemon_available(path):
+        print(f"❌ No test daemon on {socket_path(path)}; start one with: python scripts/test_daemon.py serve")
+        return 1
+
+    if command == "ping":
+        print(f"✅ Test daemon running on {socket_path(path)}")
+        return 0
+    if command == "run":
+        done = submit(pytest_args or [], path=path, timeout=timeout)
+        print(f"⏱️  {done.get('passed', 0)} passed, {done.get('failed', 0)} failed "
+              f"in {done.get('seconds', 0):.2f}s")
+    else:
+        done = next(event for event in request({"command": command}, path) if event["event"] == "done")
+
+    if done.get("error"):
+        print(f"❌ {done['error']}")
+    return done["exit_code"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm brownie test daemon")
+    parser.add_argument("command", choices=["serve", "run", "ping", "reload", "stop"])
+    parser.add_argument("--network", help="Network the daemon connects to (default: development)")
+    parser.add_argument("--socket", help="Unix socket (default: TEST_DAEMON_SOCKET or reports/test_daemon.sock)")
+    parser.add_argument("--timeout", type=float,
+                        help=f"Job timeout in seconds (serve: the default, {JOB_TIMEOUT}; run: this job)")
+    args, pytest_args = parser.parse_known_args()
+
+    sys.exit(main(args.command, pytest_args, args.network, args.socket, args.timeout))
@@ -0,0 +1,176 @@
+"""
+Shared fixtures: contracts are deployed once per session and restored by snapshot
+"""
+import pytest
+import json
+import os
+from pathlib import Path
+from brownie import accounts, chain, SimpleToken, VulnerableVault, SecureVault, DeFiPool, AuctionContract, NFTMarketplace, TokenSale
+from utils.state_snapshots import SnapshotEngine
+from utils.security_helpers import ReentrancyTester
+from utils.gas_profiler import GasProfiler
+from utils.rpc_metrics import get_rpc_metrics
+
+# Per-test results as JSON lines when PYTEST_JSONL_FILE is set (see scripts/run_security_tests.py)
+pytest_plugins = ["utils.pytest_jsonl"]
+
+# Parallel runs set these so each job writes its own files; the runner merges them
+RPC_METRICS_FILE = os.environ.get("RPC_METRICS_FILE", "reports/rpc_metrics_tests.json")
+FIXTURE_TIMINGS_FILE = os.environ.get("FIXTURE_TIMINGS_FILE", "reports/fixture_timings.json")
+# When set, the raw gas profile is saved here instead of writing gas_hotspots.*
+GAS_PROFILE_FILE = os.environ.get("GAS_PROFILE_FILE")
+
+
+def register_base_states(engine: SnapshotEngine):
+    """Declare the named base states shared by the security tests"""
+
+    @engine.base_state("vulnerable_vault")
+    def vulnerable_vault(contracts):
+        return {"vault": VulnerableVault.deploy({"from": accounts[0]})}
+
+    @engine.base_state("funded_vulnerable_vault", base="vulnerable_vault")
+    def funded_vulnerable_vault(contracts):
+        accounts[0].transfer(contracts["vault"].address, "10 ether")
+        return {}
+
+    @engine.base_state("vulnerable_vault_with_depositors", base="vulnerable_vault")
+    def vulnerable_vault_with_depositors(contracts):
+        accounts[0].transfer(contracts["vault"].address, "20 ether")
+        for depositor in accounts[1:4]:
+            contracts["vault"].deposit({"from": depositor, "value": "3 ether"})
+        return {"depositors": list(accounts[1:4])}
+
+    @engine.base_state("vulnerable_vault_with_small_deposits", base="vulnerable_vault")
+    def vulnerable_vault_with_small_deposits(contracts):
+        accounts[0].transfer(contracts["vault"].address, "15 ether")
+        for depositor in accounts[1:4]:
+            contracts["vault"].deposit({"from": depositor, "value": "2 ether"})
+        return {"depositors": list(accounts[1:4])}
+
+    @engine.base_state("vault_pair", base="funded_vulnerable_vault")
+    def vault_pair(contracts):
+        secure_vault = SecureVault.deploy({"from": accounts[0]})
+        accounts[0].transfer(secure_vault.address, "10 ether")
+        return {"secure_vault": secure_vault}
+
+    @engine.base_state("simple_token")
+    def simple_token(contracts):
+        token = SimpleToken.deploy("Test Token", "TEST", 1000000 * 10**18, {"from": accounts[0]})
+        return {"token": token}
+
+    @engine.base_state("defi_pool")
+    def defi_pool(contracts):
+        # Mock token addresses until real ERC20 fixtures exist
+        pool = DeFiPool.deploy(accounts[1], accounts[2], {"from": accounts[0]})
+        return {"pool": pool}
+
+    @engine.base_state("auction")
+    def auction(contracts):
+        auction = AuctionContract.deploy({"from": accounts[0]})
+        tx = auction.createAuction("Test Auction", 1000, "0.1 ether", {"from": accounts[0]})
+        return {"auction": auction, "auction_id": tx.return_value}
+
+    @engine.base_state("marketplace")
+    def marketplace(contracts):
+        return {"marketplace": NFTMarketplace.deploy({"from": accounts[0]})}
+
+    @engine.base_state("token_sale")
+    def token_sale(contracts):
+        token_sale = TokenSale.deploy(
+            accounts[1],  # Mock token address
+            accounts[0],  # Wallet
+            chain.time(),  # Sale window opens immediately
+            86400,  # 24 hour duration
+            {"from": accounts[0]}
+        )
+        return {"token_sale": token_sale}
+
+    @engine.base_state("token_sale_active", base="token_sale")
+    def token_sale_active(contracts):
+        token_sale = contracts["token_sale"]
+        token_sale.createSaleTier(1, 1000, "0.1 ether", "10 ether", "100 ether", {"from": accounts[0]})
+        token_sale.startSale({"from": accounts[0]})
+        return {}
+
+
+@pytest.fixture(scope="session")
+def snapshot_engine(pytestconfig):
+    """Session-wide snapshot engine with the shared base states registered"""
+    # Deployed first on every clean chain, so every base state shares one attacker
+    engine = SnapshotEngine(genesis=lambda: ReentrancyTester().get_attacker())
+    register_base_states(engine)
+    pytestconfig._snapshot_engine = engine
+    return engine
+
+
+@pytest.fixture(scope="session")
+def gas_profiler(pytestconfig):
+    """Session-wide gas profiler; hot spots are reported at the end of the run"""
+    profiler = GasProfiler()
+    pytestconfig._gas_profiler = profiler
+    return profiler
+
+
+@pytest.fixture(scope="session")
+def rpc_metrics(pytestconfig):
+    """Session-wide JSON-RPC counters on brownie's web3 provider"""
+    metrics = get_rpc_metrics().install()
+    pytestconfig._rpc_metrics = metrics
+    return metrics
+
+
+@pytest.fixture
+def rpc_scope(request, rpc_metrics):
+    """Attribute RPC calls to the test that made them
+
+    Requested by ``base_state``, so chain tests are measured and unit tests
+    never install the counters; other tests can opt in with
+    ``@pytest.mark.usefixtures("rpc_scope")``.
+    """
+    with rpc_metrics.scope(request.node.nodeid):
+        yield
+
+
+@pytest.fixture
+def base_state(snapshot_engine, rpc_scope):
+    """Return a loader that reverts the chain to a named base state
+
+    Usage: ``contracts = base_state("vulnerable_vault_with_depositors")``
+    """
+    return snapshot_engine.activate
+
+
+def pytest_collection_modifyitems(session, config, items):
+    """Run tests sharing a base state back to back (see SnapshotEngine.order_items)"""
+    engine = SnapshotEngine()
+    register_base_states(engine)
+    items[:] = engine.order_items(items)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Print and save the gas hot spots, RPC counters and base-state timings"""
+    profiler = getattr(config, "_gas_profiler", None)
+    if profiler is not None and profiler.transactions:
+        terminalreporter.write_line("")
+        terminalreporter.write_line(profiler.format_report())
+        if GAS_PROFILE_FILE:
+            profiler.save(GAS_PROFILE_FILE)
+        else:
+            profiler.save_reports("reports")
+
+    metrics = getattr(config, "_rpc_metrics", None)
+    if metrics is not None and metrics.by_method:
+        terminalreporter.write_line("")
+        terminalreporter.write_line(metrics.format_report())
+        metrics.save(RPC_METRICS_FILE)
+
+    engine = getattr(config, "_snapshot_engine", None)
+    if engine is None:
+        return
+
+    terminalreporter.write_line("")
+    terminalreporter.write_line(engine.format_timing_report())
+
+    Path(FIXTURE_TIMINGS_FILE).parent.mkdir(parents=True, exist_ok=True)
+    with open(FIXTURE_TIMINGS_FILE, "w") as f:
+        json.dump(engine.get_timing_report(), f, indent=2)
@@ -0,0 +1,74 @@
+"""
+Shared artifact store tests
+"""
+import json
+import pytest
+from utils.artifact_store import ArtifactStore, layout_from_storage, source_units
+
+
+STORAGE_LAYOUT = {
+    "storage": [
+        {"label": "_status", "slot": "0", "offset": 0, "type": "t_uint256"},
+        {"label": "_owner", "slot": "1", "offset": 0, "type": "t_address"},
+        {"label": "paused", "slot": "1", "offset": 20, "type": "t_bool"},
+        {"label": "userInfo", "slot": "2", "offset": 0, "type": "t_mapping(t_address,t_struct(UserInfo)10_storage)"},
+        {"label": "stakers", "slot": "3", "offset": 0, "type": "t_array(t_address)dyn_storage"},
+    ],
+    "types": {
+        "t_uint256": {"encoding": "inplace", "numberOfBytes": "32"},
+        "t_address": {"encoding": "inplace", "numberOfBytes": "20"},
+        "t_bool": {"encoding": "inplace", "numberOfBytes": "1"},
+        "t_mapping(t_address,t_struct(UserInfo)10_storage)": {
+            "encoding": "mapping", "key": "t_address", "value": "t_struct(UserInfo)10_storage", "numberOfBytes": "32",
+        },
+        "t_struct(UserInfo)10_storage": {"encoding": "inplace", "members": [{}, {}, {}, {}], "numberOfBytes": "128"},
+        "t_array(t_address)dyn_storage": {"encoding": "dynamic_array", "base": "t_address", "numberOfBytes": "32"},
+    },
+}
+
+
+@pytest.mark.unit
+class TestArtifactStore:
+    """Artifacts are keyed by source closure and converted for the state builder"""
+
+    def test_layout_conversion(self):
+        """solc's storageLayout becomes the state builder's slot table"""
+        layout = layout_from_storage(STORAGE_LAYOUT)
+
+        assert layout["_owner"] == {"slot": 1, "type": "value"}
+        assert layout["paused"] == {"slot": 1, "type": "value", "offset": 20}
+        assert layout["userInfo"] == {"slot": 2, "type": "mapping", "struct_size": 4}
+        assert layout["stakers"] == {"slot": 3, "type": "array"}
+
+    def test_source_unit_names(self, tmp_path):
+        """Relative imports inside a remapped package keep the remapped unit name"""
+        package = tmp_path / "oz"
+        (package / "contracts" / "access").mkdir(parents=True)
+        (package / "contracts" / "utils").mkdir(parents=True)
+        (package / "contracts" / "access" / "Ownable.sol").write_text('import "../utils/Context.sol";')
+        (package / "contracts" / "utils" / "Context.sol").write_text("contract Context {}")
+        vault = tmp_path / "Vault.sol"
+        vault.write_text('import "@openzeppelin/contracts/access/Ownable.sol";')
+
+        units = source_units(str(vault), {"@openzeppelin": package})
+
+        assert list(units)[1:] == [
+            "@openzeppelin/contracts/access/Ownable.sol",
+            "@openzeppelin/contracts/utils/Context.sol",
+        ]
+
+    def test_stored_closure_is_not_recompiled(self, tmp_path):
+        """A stored entry for the same closure and settings is served without solc"""
+        source = tmp_path / "Vault.sol"
+        source.write_text("contract Vault {}")
+        store = ArtifactStore(root=str(tmp_path / "store"), settings={"version": "0.8.19", "runs": 200})
+        key = store.key(str(source))
+        store.root.mkdir()
+        with open(store._entry_path(str(source), key), "w") as f:
+            json.dump({"key": key, "contracts": {"Vault": {"abi": [], "bytecode": "00"}}}, f)
+
+        assert store.get(str(source))["Vault"]["bytecode"] == "00"
+        assert store.stats == {"hits": 1, "compiles": 0}
+
+        store.settings["runs"] = 1000
+        assert store.key(str(source)) != key
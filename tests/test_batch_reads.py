@@ -0,0 +1,118 @@
+"""
+Batched JSON-RPC read tests
+"""
+import json
+import sys
+import types
+import pytest
+from utils.batch_reads import batch_request, _ordered_results, BATCH_TIMEOUT
+
+
+class CountingProvider:
+    """Non-HTTP provider answering each request with its method name"""
+
+    def __init__(self):
+        self.requests = []
+
+    def make_request(self, method, params):
+        self.requests.append(method)
+        return {"jsonrpc": "2.0", "id": len(self.requests), "result": f"{method}:{params[0]}"}
+
+
+class BatchingProvider(CountingProvider):
+    """Provider with native batching, answering in request order without ids"""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def make_batch_request(self, requests):
+        self.batches.append(len(requests))
+        return [{"jsonrpc": "2.0", "result": f"{method}:{params[0]}"} for method, params in requests]
+
+
+class HTTPStubProvider(CountingProvider):
+    endpoint_uri = "http://127.0.0.1:8545"
+
+    def __init__(self, request_kwargs=None):
+        super().__init__()
+        self.request_kwargs = request_kwargs or {}
+
+    def get_request_kwargs(self):
+        return self.request_kwargs
+
+
+class CountingWeb3:
+    def __init__(self, provider=None):
+        self.provider = provider or CountingProvider()
+
+
+@pytest.fixture
+def posted(monkeypatch):
+    """Capture batches POSTed through ``requests`` and answer them"""
+    calls = []
+
+    def post(url, data=None, **kwargs):
+        calls.append({"url": url, **kwargs})
+        payload = [{"jsonrpc": "2.0", "id": item["id"], "result": item["method"]} for item in json.loads(data)]
+        content = json.dumps(payload).encode()
+        return types.SimpleNamespace(content=content, json=lambda: payload, raise_for_status=lambda: None)
+
+    monkeypatch.setitem(sys.modules, "requests", types.SimpleNamespace(post=post))
+    return calls
+
+
+@pytest.mark.unit
+class TestBatchRequests:
+    """Batched responses keep request order"""
+
+    def test_out_of_order_responses(self):
+        """Responses are matched back to requests by id"""
+        responses = [{"id": 2, "result": "c"}, {"id": 0, "result": "a"}, {"id": 1, "result": "b"}]
+
+        assert [r["result"] for r in _ordered_results(responses, 3)] == ["a", "b", "c"]
+
+    def test_missing_response_raises(self):
+        """A batch that drops a request is an error, not a silent gap"""
+        with pytest.raises(RuntimeError, match="missing"):
+            _ordered_results([{"id": 0, "result": "a"}], 2)
+
+    def test_sequential_fallback(self):
+        """Non-HTTP providers get one request per call, in order"""
+        w3 = CountingWeb3()
+        calls = [("eth_getBalance", [f"0x{i:040x}", "latest"]) for i in range(5)]
+
+        responses = batch_request(w3, calls)
+
+        assert [r["result"] for r in responses] == [f"eth_getBalance:0x{i:040x}" for i in range(5)]
+        assert len(w3.provider.requests) == 5
+
+    def test_native_batching(self):
+        """Providers that batch natively are used instead of a raw POST"""
+        w3 = CountingWeb3(BatchingProvider())
+        calls = [("eth_getBalance", [f"0x{i:040x}", "latest"]) for i in range(5)]
+
+        responses = batch_request(w3, calls, batch_size=2)
+
+        assert [r["result"] for r in responses] == [f"eth_getBalance:0x{i:040x}" for i in range(5)]
+        assert w3.provider.batches == [2, 2, 1]
+        assert w3.provider.requests == []
+
+    def test_http_batch_has_a_timeout(self, posted):
+        """A raw POST always carries a timeout so a stalled node cannot hang the run"""
+        w3 = CountingWeb3(HTTPStubProvider())
+
+        responses = batch_request(w3, [("eth_chainId", []), ("eth_blockNumber", [])])
+
+        assert [r["result"] for r in responses] == ["eth_chainId", "eth_blockNumber"]
+        assert posted[0]["timeout"] == BATCH_TIMEOUT
+        assert posted[0]["headers"]["Content-Type"] == "application/json"
+
+    def test_http_batch_uses_provider_settings(self, posted):
+        """The provider's own timeout and headers are kept"""
+        provider = HTTPStubProvider({"timeout": 5, "headers": {"Authorization": "Bearer x"}})
+
+        batch_request(CountingWeb3(provider), [("eth_chainId", [])])
+
+        assert posted[0]["timeout"] == 5
+        assert posted[0]["headers"] == {"Authorization": "Bearer x", "Content-Type": "application/json"}
@@ -0,0 +1,86 @@
+"""
+Generated test_config tests
+"""
+import pytest
+from utils.config_generator import ConfigGenerator, generate_test_config, parse_natspec
+
+
+def _function(name, inputs=(), mutability="nonpayable"):
+    return {
+        "type": "function", "name": name, "stateMutability": mutability,
+        "inputs": [{"name": f"arg{i}", "type": t} for i, t in enumerate(inputs)], "outputs": [],
+    }
+
+
+VAULT_ABI = [
+    _function("deposit", mutability="payable"),
+    _function("withdraw", ["uint256"]),
+    _function("withdrawSecure", ["uint256"]),
+    _function("calculateBonus", ["uint256"], "pure"),
+    _function("emergencyWithdraw"),
+    _function("distributeToAll", ["uint256"]),
+    _function("placeBid", ["uint256"], "payable"),
+    _function("getTokenPrice", mutability="view"),
+]
+
+VAULT_SOURCE = """
+    /**
+     * @dev VULNERABLE: Withdraw function susceptible to reentrancy
+     */
+    function withdraw(uint256 amount) external {
+    }
+
+    /**
+     * @dev SECURE: Withdraw function with reentrancy protection
+     */
+    function withdrawSecure(uint256 amount) external noReentrancy {
+    }
+
+    /**
+     * @dev VULNERABLE: Front-running susceptible
+     */
+    function placeBid(uint256 amount) external payable {
+    }
+"""
+
+
+@pytest.mark.unit
+class TestConfigGenerator:
+    """Configs come from the ABI, refined by NatSpec annotations"""
+
+    def test_abi_only(self):
+        """Function names and mutability select the categories"""
+        config = generate_test_config(VAULT_ABI)
+
+        assert config["reentrancy_functions"] == ["withdraw", "withdrawSecure"]
+        assert config["overflow_functions"] == ["calculateBonus"]
+        assert config["restricted_functions"] == ["emergencyWithdraw"]
+        assert config["gas_functions"] == ["distributeToAll"]
+        assert config["oracle_functions"] == ["getTokenPrice"]
+        assert config["swap_functions"] == []
+        assert config["amount"] == 1000
+
+    def test_natspec_annotations(self):
+        """Annotations attach to the next function and name its categories"""
+        annotations = parse_natspec(VAULT_SOURCE)
+
+        assert annotations["withdraw"]["label"] == "VULNERABLE"
+        assert annotations["withdraw"]["categories"] == ["reentrancy_functions"]
+        assert annotations["withdrawSecure"]["label"] == "SECURE"
+        assert annotations["placeBid"]["categories"] == []
+
+        config = generate_test_config(VAULT_ABI, VAULT_SOURCE)
+        assert config["natspec"]["VULNERABLE"] == ["placeBid", "withdraw"]
+        assert "placeBid" not in config["swap_functions"]
+
+    def test_cached_by_bytecode(self, tmp_path):
+        """The second request for the same bytecode is served from disk"""
+        generator = ConfigGenerator(cache_dir=str(tmp_path))
+        artifact = {"abi": VAULT_ABI, "bytecode": "6080604052", "source": VAULT_SOURCE}
+
+        first = generator.for_artifact(artifact)
+        second = generator.for_artifact(artifact)
+
+        assert first == second
+        assert generator.stats == {"hits": 1, "misses": 1}
+        assert len(list(tmp_path.iterdir())) == 1
@@ -0,0 +1,139 @@
+"""
+In-process py-evm backend tests
+"""
+import pytest
+import yaml
+from pathlib import Path
+from brownie import accounts, VulnerableVault
+from utils import evm_backend
+from utils.evm_backend import InProcessEVMBackend, InProcessVMError, security_config
+from utils.security_helpers import SecurityTestSuite, IntegerOverflowTester
+
+
+@pytest.mark.unit
+class TestInProcessBackend:
+    """The in-process backend should behave like brownie for the testers"""
+
+    @pytest.fixture
+    def backend(self):
+        """Fresh in-process chain"""
+        return InProcessEVMBackend()
+
+    def test_accounts_match_development_network(self, backend):
+        """Accounts are derived from the same mnemonic as ganache"""
+        assert backend.accounts[0].address == accounts[0].address
+        assert backend.accounts[0].balance() == 100 * 10**18
+
+    def test_deploy_and_transact(self, backend):
+        """Deposits and withdrawals update state like on ganache"""
+        vault = backend.deploy(VulnerableVault, {"from": backend.accounts[0]})
+        user = backend.accounts[1]
+
+        vault.deposit({"from": user, "value": "2 ether"})
+        assert vault.balances(user) == 2 * 10**18
+        assert vault.balance() == 2 * 10**18
+
+        tx = vault.withdraw(10**18, {"from": user})
+        assert tx.status == 1
+        assert vault.balances(user) == 10**18
+
+    def test_revert_raises(self, backend):
+        """Reverting transactions raise with the revert message"""
+        vault = backend.deploy(VulnerableVault, {"from": backend.accounts[0]})
+
+        with pytest.raises(InProcessVMError, match="Not owner"):
+            vault.distributeToAll([], 1, {"from": backend.accounts[1]})
+
+    def test_gas_matches_brownie(self, backend):
+        """Gas usage agrees with the ganache-backed deployment"""
+        local_vault = backend.deploy(VulnerableVault, {"from": backend.accounts[0]})
+        remote_vault = VulnerableVault.deploy({"from": accounts[0]})
+
+        local_tx = local_vault.deposit({"from": backend.accounts[1], "value": "1 ether"})
+        remote_tx = remote_vault.deposit({"from": accounts[1], "value": "1 ether"})
+
+        assert local_tx.gas_used == remote_tx.gas_used
+
+    def test_estimate_gas_is_smallest_working_limit(self, backend):
+        """Estimates cover refunds and forwarded call gas, like the node's"""
+        vault = backend.deploy(VulnerableVault, {"from": backend.accounts[0]})
+        user = backend.accounts[1]
+        vault.deposit({"from": user, "value": "1 ether"})
+
+        estimate = vault.withdraw.estimate_gas(10**18, {"from": user})
+
+        with pytest.raises(InProcessVMError):
+            vault.withdraw(10**18, {"from": user, "gas": estimate - 1})
+        tx = vault.withdraw(10**18, {"from": user, "gas": estimate})
+        # Clearing the balance slot is refunded after execution
+        assert tx.gas_used < estimate
+
+    def test_snapshot_revert(self, backend):
+        """Snapshots restore balances and storage"""
+        vault = backend.deploy(VulnerableVault, {"from": backend.accounts[0]})
+        snapshot_id = backend.snapshot()
+
+        vault.deposit({"from": backend.accounts[1], "value": "1 ether"})
+        backend.revert(snapshot_id)
+
+        assert vault.balances(backend.accounts[1]) == 0
+
+    def test_suite_runs_on_in_process_backend(self, backend):
+        """The security suite finds VulnerableVault's open emergencyWithdraw in-process"""
+        vault = backend.deploy(VulnerableVault, {"from": backend.accounts[0]})
+        backend.accounts[0].transfer(vault, "10 ether")
+        suite = SecurityTestSuite(backend)
+
+        results = suite.run_all_tests(vault, {
+            "restricted_functions": ["emergencyWithdraw", "distributeToAll"],
+            "access_control_dry_run": True,
+        })
+
+        access = results["access_control"]
+        assert access["severity_counts"] == {"HIGH": 1, "MEDIUM": 0, "LOW": 0}
+        assert access["vulnerabilities"][0]["type"] == "ACCESS_CONTROL"
+        assert "emergencyWithdraw" in access["vulnerabilities"][0]["description"]
+        assert access["probe_results"]["distributeToAll"]["result"] == "denied"
+        assert "skipped" in results["reentrancy"]
+
+    def test_pipelined_overflow_falls_back_to_serial(self, backend):
+        """Without a web3 node the pipelined sweep runs serially with the same verdicts"""
+        vault = backend.deploy(VulnerableVault, {"from": backend.accounts[0]})
+        inputs = [0, 1, 2**256 - 1, 2**256, -1]
+
+        serial = IntegerOverflowTester(backend).test_overflow(vault, "placeBid", 0, test_cases=inputs)
+        pipelined = IntegerOverflowTester(backend).test_overflow(vault, "placeBid", 0, pipelined=True, test_cases=inputs)
+
+        assert [o["outcome"] for o in serial] == ["success", "reverted", "reverted", "rejected", "rejected"]
+        assert [o["outcome"] for o in pipelined] == [o["outcome"] for o in serial]
+
+    def test_fork_is_independent(self, backend):
+        """Writes on a fork are not seen by the original chain, and vice versa"""
+        vault = backend.deploy(VulnerableVault, {"from": backend.accounts[0]})
+        vault.deposit({"from": backend.accounts[1], "value": "1 ether"})
+
+        fork = backend.fork()
+        forked_vault = fork.at(vault.address, vault.abi, "VulnerableVault")
+        forked_vault.deposit({"from": fork.accounts[2], "value": "1 ether"})
+        vault.deposit({"from": backend.accounts[3], "value": "1 ether"})
+
+        assert forked_vault.balances(fork.accounts[1]) == 10**18
+        assert forked_vault.balances(fork.accounts[3]) == 0
+        assert vault.balances(backend.accounts[2]) == 0
+
+
+@pytest.mark.unit
+class TestSecurityConfig:
+    """The security section of brownie-config.yaml reaches the testers"""
+
+    def test_project_config_parses(self, monkeypatch):
+        """The config file is valid YAML and its non-default values come through"""
+        path = Path(__file__).resolve().parents[1] / "brownie-config.yaml"
+        monkeypatch.setattr(evm_backend, "config", yaml.safe_load(path.read_text()))
+
+        settings = security_config()
+
+        assert settings["backend"] == "brownie"
+        # Slither's default is one worker per CPU
+        assert settings["slither_workers"] == 4
+        assert settings["artifact_store_dir"] == "reports/artifact_store"
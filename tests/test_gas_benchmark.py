@@ -0,0 +1,109 @@
+"""
+Gas benchmark baseline comparison tests (scripts/gas_benchmark.py)
+"""
+import json
+import pytest
+from scripts import gas_benchmark
+
+
+def result(gas, seconds=0.01):
+    return {"gas": gas, "seconds": seconds}
+
+
+@pytest.mark.unit
+class TestCompareWithBaseline:
+    """Rows are classified against the baseline with a relative tolerance"""
+
+    def statuses(self, results, baseline, **kwargs):
+        rows = gas_benchmark.compare_with_baseline(results, baseline, **kwargs)
+        return {row["operation"]: row["status"] for row in rows}
+
+    def test_tolerance_bounds(self):
+        """Changes within the tolerance are ok; beyond it they regress or improve"""
+        baseline = {"A.within": result(1000), "A.over": result(1000), "A.under": result(1000)}
+        results = {"A.within": result(1020), "A.over": result(1021), "A.under": result(979)}
+
+        assert self.statuses(results, baseline, tolerance=0.02) == {
+            "A.within": "ok",
+            "A.over": "regression",
+            "A.under": "improved",
+        }
+
+    def test_deltas_are_reported(self):
+        """Regressed rows carry the absolute and relative change"""
+        rows = gas_benchmark.compare_with_baseline({"A.op": result(1100)}, {"A.op": result(1000)})
+
+        assert rows[0]["gas_delta"] == 100
+        assert rows[0]["gas_change"] == pytest.approx(0.1)
+
+    def test_new_error_and_missing(self):
+        """Unknown, failed and vanished operations get their own status"""
+        results = {"A.new": result(500), "A.broken": {"gas": None, "seconds": None, "error": "revert"}}
+        baseline = {"A.broken": result(1000), "A.gone": result(1000)}
+
+        assert self.statuses(results, baseline) == {
+            "A.new": "new",
+            "A.broken": "error",
+            "A.gone": "missing",
+        }
+
+    def test_time_tolerance_only_marks_otherwise_ok_rows(self):
+        """Slower wall time is reported unless the gas already regressed"""
+        baseline = {"A.slow": result(1000, 0.01), "A.both": result(1000, 0.01)}
+        results = {"A.slow": result(1000, 0.02), "A.both": result(2000, 0.02)}
+
+        assert self.statuses(results, baseline, time_tolerance=0.5) == {
+            "A.slow": "slower",
+            "A.both": "regression",
+        }
+        assert self.statuses(results, baseline)["A.slow"] == "ok"
+
+
+@pytest.mark.unit
+class TestBenchmarkExitCodes:
+    """main() fails the run only on regressions against the stored baseline"""
+
+    @pytest.fixture
+    def run(self, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)
+        baseline_path = tmp_path / "gas_baseline.json"
+
+        def run(results, baseline=None, **kwargs):
+            if baseline is not None:
+                baseline_path.write_text(json.dumps({"timestamp": 0, "operations": baseline}))
+            monkeypatch.setattr(gas_benchmark, "run_catalogue", lambda *args, **kw: dict(results))
+            return gas_benchmark.main(baseline_path=str(baseline_path), **kwargs)
+
+        run.baseline_path = baseline_path
+        return run
+
+    def test_first_run_writes_baseline(self, run):
+        assert run({"A.op": result(1000)}) == 0
+        stored = json.loads(run.baseline_path.read_text())["operations"]
+        assert stored == {"A.op": result(1000)}
+
+    def test_regression_fails(self, run):
+        assert run({"A.op": result(1100)}, {"A.op": result(1000)}) == 1
+
+    def test_improved_and_new_pass(self, run):
+        assert run({"A.op": result(900), "A.extra": result(50)}, {"A.op": result(1000)}) == 0
+
+    def test_missing_operation_fails(self, run):
+        assert run({"A.op": result(1000)}, {"A.op": result(1000), "A.gone": result(1000)}) == 1
+
+    def test_error_fails_only_with_a_baseline(self, run):
+        broken = {"gas": None, "seconds": None, "error": "revert"}
+        assert run({"A.op": broken}, {"A.op": result(1000)}) == 1
+        assert run({"A.new": broken}, {}) == 0
+
+    def test_filtered_baseline_ignores_other_contracts(self, run):
+        """Benchmarking a subset does not report the rest of the baseline as missing"""
+        baseline = {"SimpleToken.transfer": result(1000), "VulnerableVault.deposit": result(1000)}
+        assert run({"SimpleToken.transfer": result(1000)}, baseline, contracts=["SimpleToken"]) == 0
+        assert run({"SimpleToken.transfer": result(1000)}, baseline) == 1
+
+    def test_update_baseline_passes_and_keeps_other_entries(self, run):
+        baseline = {"A.op": result(1000), "B.op": result(2000)}
+        assert run({"A.op": result(1500)}, baseline, update_baseline=True) == 0
+        stored = json.loads(run.baseline_path.read_text())["operations"]
+        assert stored == {"A.op": result(1500), "B.op": result(2000)}
@@ -0,0 +1,59 @@
+"""
+Concurrent tester categories (SecurityTestSuite.run_all_tests with workers)
+"""
+import pytest
+from brownie import VulnerableVault
+from utils.evm_backend import InProcessEVMBackend
+from utils.security_helpers import SecurityTestSuite
+
+
+@pytest.mark.unit
+class TestParallelSuite:
+    """Categories run in worker processes on pyevm and serially on a node"""
+
+    @pytest.fixture
+    def backend(self):
+        """Fresh in-process chain"""
+        return InProcessEVMBackend()
+
+    def test_parallel_suite_matches_serial(self, backend):
+        """Categories run in worker processes merge into the serial report"""
+        vault = backend.deploy(VulnerableVault, {"from": backend.accounts[0]})
+        backend.accounts[0].transfer(vault, "10 ether")
+        test_config = {
+            "reentrancy_functions": ["withdraw"],
+            "restricted_functions": ["emergencyWithdraw", "transferOwnership"],
+            "overflow_functions": ["calculateBonus"],
+            "amount": 1000,
+        }
+
+        fork = backend.fork()
+        serial = SecurityTestSuite(fork).run_all_tests(fork.at(vault.address, vault.abi, "VulnerableVault"), test_config)
+        parallel = SecurityTestSuite(backend).run_all_tests(vault, test_config, workers=3)
+
+        assert list(parallel) == list(serial)
+        for name in serial:
+            assert parallel[name].get("severity_counts") == serial[name].get("severity_counts")
+
+    def test_workers_on_a_node_run_serially(self, backend, capsys):
+        """Without a chain to copy, extra workers fall back to a serial run"""
+
+        class NodeLike:
+            """The backend without export_state, like a brownie node"""
+
+            def __init__(self, inner):
+                self._inner = inner
+
+            def __getattr__(self, name):
+                if name == "export_state":
+                    raise AttributeError(name)
+                return getattr(self._inner, name)
+
+        vault = backend.deploy(VulnerableVault, {"from": backend.accounts[0]})
+        backend.accounts[0].transfer(vault, "10 ether")
+        test_config = {"restricted_functions": ["emergencyWithdraw"], "access_control_dry_run": True}
+
+        results = SecurityTestSuite(NodeLike(backend)).run_all_tests(vault, test_config, workers=3)
+
+        assert "running categories serially" in capsys.readouterr().out
+        assert results["access_control"]["severity_counts"] == {"HIGH": 1, "MEDIUM": 0, "LOW": 0}
@@ -0,0 +1,75 @@
+"""
+JSONL test result plugin tests
+"""
+import pytest
+from types import SimpleNamespace
+from utils.pytest_jsonl import JsonlFollower, JsonlReporter, summarize_tests
+
+
+def make_report(nodeid, when, outcome, duration):
+    return SimpleNamespace(nodeid=nodeid, when=when, outcome=outcome, duration=duration,
+                           passed=outcome == "passed", failed=outcome == "failed", longrepr="E   assert 0")
+
+
+@pytest.mark.unit
+class TestPytestJsonl:
+    """Results are written as they happen and read back incrementally"""
+
+    def test_follower_reads_only_complete_new_lines(self, tmp_path):
+        """A half-written line waits for the next read; nothing is read twice"""
+        path = tmp_path / "events.jsonl"
+        follower = JsonlFollower(str(path))
+        assert follower.read() == []
+
+        with open(path, "w") as f:
+            f.write('{"event": "test", "nodeid": "a"}\n{"event": "te')
+        assert [e["nodeid"] for e in follower.read()] == ["a"]
+
+        with open(path, "a") as f:
+            f.write('st", "nodeid": "b"}\n')
+        assert [e["nodeid"] for e in follower.read()] == ["b"]
+        assert follower.read() == []
+
+    def test_reporter_events_summarize_timings(self, tmp_path):
+        """Passing setups are skipped; failures keep their traceback; slowest first"""
+        path = tmp_path / "events.jsonl"
+        reporter = JsonlReporter(str(path))
+        follower = JsonlFollower(str(path))
+
+        reporter.pytest_runtest_logreport(make_report("t.py::fast", "setup", "passed", 0.2))
+        reporter.pytest_runtest_logreport(make_report("t.py::fast", "call", "passed", 0.1))
+        assert [e["nodeid"] for e in follower.read()] == ["t.py::fast"]
+
+        reporter.pytest_runtest_logreport(make_report("t.py::slow", "call", "failed", 2.5))
+        reporter.pytest_sessionfinish(None, 1)
+        reporter.pytest_unconfigure(None)
+
+        events = follower.read()
+        assert events[-1]["event"] == "summary" and events[-1]["exit_code"] == 1
+        assert events[-1]["passed"] == 1 and events[-1]["failed"] == 1
+
+        summary = summarize_tests(JsonlFollower(str(path)).read())
+        assert summary["passed"] == 1 and summary["failed"] == 1
+        assert summary["test_seconds"] == 2.6
+        assert [t["nodeid"] for t in summary["slowest"]] == ["t.py::slow", "t.py::fast"]
+        assert summary["failures"] == [{"nodeid": "t.py::slow", "when": "call", "longrepr": "E   assert 0"}]
+
+    def test_teardown_failure_counts_once(self, tmp_path):
+        """A passing call with a failing teardown is one failed test, not a pass and a failure"""
+        path = tmp_path / "events.jsonl"
+        reporter = JsonlReporter(str(path))
+
+        reporter.pytest_runtest_logreport(make_report("t.py::leaky", "call", "passed", 0.3))
+        reporter.pytest_runtest_logreport(make_report("t.py::leaky", "teardown", "failed", 0.1))
+        reporter.pytest_runtest_logreport(make_report("t.py::fine", "call", "passed", 0.2))
+        reporter.pytest_sessionfinish(None, 1)
+        reporter.pytest_unconfigure(None)
+
+        events = JsonlFollower(str(path)).read()
+        assert [e["when"] for e in events[:-1]] == ["call", "teardown", "call"]
+        assert (events[-1]["passed"], events[-1]["failed"]) == (1, 1)
+
+        summary = summarize_tests(events)
+        assert (summary["passed"], summary["failed"], summary["skipped"]) == (1, 1, 0)
+        assert summary["slowest"][0] == {"nodeid": "t.py::leaky", "duration": 0.4}
+        assert [f["when"] for f in summary["failures"]] == ["teardown"]
@@ -2,8 +2,11 @@
 Specific reentrancy vulnerability testing
 """
 import pytest
-from brownie import network, accounts, VulnerableVault
-from utils.security_helpers import ReentrancyTester
+from types import SimpleNamespace
+from brownie import network, accounts, chain, TokenSale, Wei
+from utils.security_helpers import ReentrancyTester, TraceReentrancyTester
+from utils.state_builder import StorageStateBuilder
+from utils.batch_reads import BatchReader
 
 
 @pytest.mark.security
@@ -17,15 +20,12 @@ class TestReentrancyVulnerabilities:
         self.accounts = accounts
         self.reentrancy_tester = ReentrancyTester()
     
-    def test_vault_reentrancy_detection(self):
+    def test_vault_reentrancy_detection(self, base_state):
         """Test reentrancy detection in VulnerableVault"""
         print("\n🔍 Testing reentrancy in VulnerableVault...")
         
-        # Deploy vulnerable vault
-        vault = VulnerableVault.deploy({"from": self.accounts[0]})
-        
-        # Fund the vault
-        self.accounts[0].transfer(vault.address, "10 ether")
+        # Funded vulnerable vault from the shared snapshot
+        vault = base_state("funded_vulnerable_vault")["vault"]
         
         # Deposit from victim
         victim = self.accounts[1]
@@ -40,13 +40,13 @@ class TestReentrancyVulnerabilities:
         
         try:
             # This should be vulnerable to reentrancy
-            vault.withdraw(1 ether, {"from": victim})
+            vault.withdraw("1 ether", {"from": victim})
             
             final_vault_balance = vault.balance()
             final_victim_balance = vault.balances(victim)
             
             # Check if reentrancy occurred
-            if final_vault_balance < initial_vault_balance - 1 ether:
+            if final_vault_balance < initial_vault_balance - Wei("1 ether"):
                 print("⚠️  Possible reentrancy detected in withdraw function")
                 self.reentrancy_tester.log_vulnerability(
                     "REENTRANCY",
@@ -59,14 +59,11 @@ class TestReentrancyVulnerabilities:
         except Exception as e:
             print(f"❌ Withdraw failed: {e}")
     
-    def test_secure_withdraw_protection(self):
+    def test_secure_withdraw_protection(self, base_state):
         """Test that withdrawSecure has reentrancy protection"""
         print("\n🛡️ Testing reentrancy protection in withdrawSecure...")
         
-        vault = VulnerableVault.deploy({"from": self.accounts[0]})
-        
-        # Fund the vault
-        self.accounts[0].transfer(vault.address, "10 ether")
+        vault = base_state("funded_vulnerable_vault")["vault"]
         
         # Deposit from victim
         victim = self.accounts[1]
@@ -74,25 +71,20 @@ class TestReentrancyVulnerabilities:
         
         try:
             # This should be protected against reentrancy
-            vault.withdrawSecure(1 ether, {"from": victim})
+            vault.withdrawSecure("1 ether", {"from": victim})
             print("✅ withdrawSecure function executed successfully")
             
         except Exception as e:
             print(f"❌ withdrawSecure failed: {e}")
     
-    def test_reentrancy_with_multiple_attacks(self):
+    def test_reentrancy_with_multiple_attacks(self, base_state):
         """Test reentrancy with multiple attack scenarios"""
         print("\n🎭 Testing multiple reentrancy scenarios...")
         
-        vault = VulnerableVault.deploy({"from": self.accounts[0]})
-        
-        # Fund vault
-        self.accounts[0].transfer(vault.address, "20 ether")
-        
-        # Multiple victims deposit
-        victims = self.accounts[1:4]
-        for victim in victims:
-            vault.deposit({"from": victim, "value": "3 ether"})
+        # Funded vault where three victims have deposited 3 ether each
+        contracts = base_state("vulnerable_vault_with_depositors")
+        vault = contracts["vault"]
+        victims = contracts["depositors"]
         
         print(f"Vault balance: {vault.balance()}")
         
@@ -103,63 +95,59 @@ class TestReentrancyVulnerabilities:
             initial_balance = vault.balances(victim)
             
             try:
-                vault.withdraw(0.5 ether, {"from": victim})
+                vault.withdraw("0.5 ether", {"from": victim})
                 final_balance = vault.balances(victim)
                 
                 print(f"Victim {i+1} balance: {initial_balance} -> {final_balance}")
                 
-                if final_balance > initial_balance - 0.5 ether:
+                if final_balance > initial_balance - Wei("0.5 ether"):
                     print(f"⚠️  Possible reentrancy from victim {i+1}")
                     
             except Exception as e:
                 print(f"Victim {i+1} withdraw failed: {e}")
     
-    def test_reentrancy_gas_analysis(self):
+    def test_reentrancy_gas_analysis(self, base_state, gas_profiler):
         """Analyze gas usage in reentrancy scenarios"""
         print("\n⛽ Analyzing gas usage in reentrancy scenarios...")
         
-        vault = VulnerableVault.deploy({"from": self.accounts[0]})
-        
-        # Fund vault
-        self.accounts[0].transfer(vault.address, "10 ether")
+        vault = base_state("funded_vulnerable_vault")["vault"]
         
         # Deposit
         victim = self.accounts[1]
         deposit_tx = vault.deposit({"from": victim, "value": "5 ether"})
         print(f"Deposit gas: {deposit_tx.gas_used}")
+        gas_profiler.profile_transaction(deposit_tx)
         
         # Test vulnerable withdraw
         try:
-            withdraw_tx = vault.withdraw(1 ether, {"from": victim})
+            withdraw_tx = vault.withdraw("1 ether", {"from": victim})
             print(f"Vulnerable withdraw gas: {withdraw_tx.gas_used}")
+            gas_profiler.profile_transaction(withdraw_tx)
         except Exception as e:
             print(f"Vulnerable withdraw failed: {e}")
         
         # Test secure withdraw
         try:
-            secure_tx = vault.withdrawSecure(1 ether, {"from": victim})
+            secure_tx = vault.withdrawSecure("1 ether", {"from": victim})
             print(f"Secure withdraw gas: {secure_tx.gas_used}")
+            gas_profiler.profile_transaction(secure_tx)
         except Exception as e:
             print(f"Secure withdraw failed: {e}")
     
-    def test_reentrancy_state_consistency(self):
+    def test_reentrancy_state_consistency(self, base_state):
         """Test state consistency during reentrancy"""
         print("\n🔍 Testing state consistency during reentrancy...")
         
-        vault = VulnerableVault.deploy({"from": self.accounts[0]})
-        
-        # Fund vault
-        self.accounts[0].transfer(vault.address, "15 ether")
-        
-        # Multiple deposits
-        users = self.accounts[1:4]
-        for user in users:
-            vault.deposit({"from": user, "value": "2 ether"})
+        # Funded vault where three users have deposited 2 ether each
+        contracts = base_state("vulnerable_vault_with_small_deposits")
+        vault = contracts["vault"]
+        users = contracts["depositors"]
+        reader = BatchReader()
         
         # Record initial state
         initial_vault_balance = vault.balance()
         initial_total_deposits = vault.totalDeposits()
-        initial_user_balances = [vault.balances(user) for user in users]
+        initial_user_balances = reader.read(vault.balances, users)
         
         print(f"Initial vault balance: {initial_vault_balance}")
         print(f"Initial total deposits: {initial_total_deposits}")
@@ -168,20 +156,20 @@ class TestReentrancyVulnerabilities:
         # Attempt reentrancy attack
         attacker = users[0]
         try:
-            vault.withdraw(1 ether, {"from": attacker})
+            vault.withdraw("1 ether", {"from": attacker})
             
             # Check final state
             final_vault_balance = vault.balance()
             final_total_deposits = vault.totalDeposits()
-            final_user_balances = [vault.balances(user) for user in users]
+            final_user_balances = reader.read(vault.balances, users)
             
             print(f"Final vault balance: {final_vault_balance}")
             print(f"Final total deposits: {final_total_deposits}")
             print(f"Final user balances: {final_user_balances}")
             
             # Check for state inconsistencies
-            expected_vault_balance = initial_vault_balance - 1 ether
-            expected_total_deposits = initial_total_deposits - 1 ether
+            expected_vault_balance = initial_vault_balance - Wei("1 ether")
+            expected_total_deposits = initial_total_deposits - Wei("1 ether")
             
             if final_vault_balance != expected_vault_balance:
                 print(f"⚠️  Vault balance inconsistency: expected {expected_vault_balance}, got {final_vault_balance}")
@@ -193,19 +181,194 @@ class TestReentrancyVulnerabilities:
             print(f"Reentrancy test failed: {e}")
 
 
+@pytest.mark.security
+@pytest.mark.reentrancy
+class TestReentrancyAttackerContract:
+    """Real attacks through the shared, re-pointable ReentrancyAttacker"""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test environment"""
+        self.accounts = accounts
+        self.reentrancy_tester = ReentrancyTester()
+    
+    def test_attacker_deployed_once(self, base_state):
+        """Every target reuses the attacker deployed first on the clean chain"""
+        attacker = self.reentrancy_tester.get_attacker()
+        
+        base_state("marketplace")
+        base_state("funded_vulnerable_vault")
+        
+        assert ReentrancyTester().get_attacker().address == attacker.address
+    
+    def test_vault_withdraw_attack(self, base_state):
+        """VulnerableVault.withdraw can be re-entered, withdrawSecure cannot"""
+        print("\n🎯 Attacking VulnerableVault.withdraw...")
+        
+        vault = base_state("funded_vulnerable_vault")["vault"]
+        
+        assert self.reentrancy_tester.test_reentrancy(vault, "withdraw", 10**18)
+        assert not self.reentrancy_tester.test_reentrancy(vault, "withdrawSecure", 10**18)
+        result = self.reentrancy_tester.attack_results["VulnerableVault.withdraw"]
+        assert result["reentries"] == 2
+        # One deposit of 1 ether, three withdrawals of it
+        assert result["drained"] == 2 * 10**18
+    
+    def test_reentry_within_own_deposit_not_flagged(self, base_state):
+        """Re-entries that only return what the attacker deposited are not a drain"""
+        vault = base_state("funded_vulnerable_vault")["vault"]
+        
+        assert not self.reentrancy_tester.test_reentrancy(vault, "withdraw", 10**18, setup_value=3 * 10**18)
+        result = self.reentrancy_tester.attack_results["VulnerableVault.withdraw"]
+        assert result["reentries"] == 2
+        assert result["drained"] == 0
+        assert self.reentrancy_tester.vulnerabilities_found == []
+    
+    def test_auction_withdraw_attack(self, base_state):
+        """AuctionContract.withdraw zeroes pending returns before paying out"""
+        print("\n🎯 Attacking AuctionContract.withdraw...")
+        
+        contracts = base_state("auction")
+        auction, auction_id = contracts["auction"], contracts["auction_id"]
+        attacker = self.reentrancy_tester.get_attacker()
+        
+        # Nothing credits pendingReturns, so inject the attacker's refund directly
+        builder = StorageStateBuilder(auction)
+        builder.set_mapping("pendingReturns", (auction_id, attacker.address), 10**17)
+        builder.commit()
+        builder.set_ether_balance(auction.balance() + 10**18)
+        
+        assert not self.reentrancy_tester.test_reentrancy(
+            auction, "withdraw", 0, args=[auction_id], setup_function=None
+        )
+        assert auction.pendingReturns(auction_id, attacker) == 0
+    
+    def test_token_sale_claim_attack(self, base_state):
+        """TokenSale.claimTokens is re-entered through the token callback"""
+        print("\n🎯 Attacking TokenSale.claimTokens...")
+        
+        base_state("simple_token")  # clean snapshot to deploy on top of
+        attacker = self.reentrancy_tester.get_attacker()
+        
+        # The attacker doubles as the sale token, so token.transfer calls back into it
+        token_sale = TokenSale.deploy(attacker, accounts[0], chain.time(), 3600, {"from": accounts[0]})
+        token_sale.createSaleTier(1, 1000, "0.1 ether", "10 ether", "100 ether", {"from": accounts[0]})
+        token_sale.startSale({"from": accounts[0]})
+        self.reentrancy_tester.attacker_execute(token_sale, "buyTokens", 1, value=10**18)
+        
+        chain.sleep(3601)
+        chain.mine()
+        
+        assert self.reentrancy_tester.test_reentrancy(token_sale, "claimTokens", 0, setup_function=None)
+    
+    def test_marketplace_accept_offer_attack(self, base_state):
+        """NFTMarketplace.acceptOffer pays the seller repeatedly when re-entered"""
+        print("\n🎯 Attacking NFTMarketplace.acceptOffer...")
+        
+        marketplace = base_state("marketplace")["marketplace"]
+        attacker = self.reentrancy_tester.get_attacker()
+        
+        # Attacker lists its own "NFT" so transferFrom calls back into it
+        self.reentrancy_tester.attacker_execute(marketplace, "createListing", attacker, 1, 10**18, 86400)
+        for buyer in self.accounts[1:4]:
+            marketplace.makeOffer(1, {"from": buyer, "value": "1 ether"})
+        
+        initial_balance = marketplace.balance()
+        assert self.reentrancy_tester.test_reentrancy(
+            marketplace, "acceptOffer", 0, args=[1, 0], setup_function=None
+        )
+        
+        # One offer accepted, but the seller was paid once per nesting level
+        seller_amount = 10**18 - 10**18 * 250 // 10000
+        assert marketplace.balance() == initial_balance - 3 * seller_amount
+
+
+@pytest.mark.security
+@pytest.mark.reentrancy
+class TestTraceReentrancyDetection:
+    """Trace-based detection: one traced call per function, no attacker"""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test environment"""
+        self.accounts = accounts
+        self.trace_tester = TraceReentrancyTester()
+    
+    def test_candidates_match_whole_words(self):
+        """Name words pick candidates; substrings such as the "end" in append do not"""
+        abi = [
+            {"type": "function", "name": name, "stateMutability": "nonpayable", "inputs": []}
+            for name in ("endAuction", "emergencyWithdraw", "append", "sendBatch", "extendAuction", "claim_rewards")
+        ]
+        
+        candidates = self.trace_tester.candidate_functions(SimpleNamespace(abi=abi))
+        
+        assert candidates == ["endAuction", "emergencyWithdraw", "claim_rewards"]
+    
+    def test_vault_withdraw_flagged(self, base_state):
+        """The ether transfer in withdraw precedes the balance update"""
+        vault = base_state("funded_vulnerable_vault")["vault"]
+        
+        result = self.trace_tester.check_function(vault, "withdraw", 10**18)
+        
+        assert result["status"] == "flagged"
+        assert any(finding["balance_slot"] for finding in result["findings"])
+    
+    def test_vault_withdraw_secure_clean(self, base_state):
+        """withdrawSecure only releases its lock after the transfer"""
+        vault = base_state("funded_vulnerable_vault")["vault"]
+        
+        result = self.trace_tester.check_function(vault, "withdrawSecure", 10**18)
+        
+        assert result["status"] == "clean"
+    
+    def test_trace_leaves_state_untouched(self, base_state):
+        """Traced calls run inside a snapshot and are rolled back"""
+        vault = base_state("funded_vulnerable_vault")["vault"]
+        initial_balance = vault.balance()
+        
+        self.trace_tester.check_function(vault, "withdraw", 10**18)
+        
+        assert vault.balance() == initial_balance
+        assert vault.balances(self.accounts[1]) == 0
+    
+    def test_trace_reused_from_cache(self, base_state):
+        """Tracing the same call on the same state reads the cached trace"""
+        vault = base_state("funded_vulnerable_vault")["vault"]
+        
+        first = self.trace_tester.check_function(vault, "withdraw", 10**18)
+        second = TraceReentrancyTester().check_function(vault, "withdraw", 10**18)
+        
+        assert second == first
+        assert self.trace_tester.trace_cache.get_stats()["bytes"] > 0
+    
+    def test_sweep_all_contracts(self, base_state):
+        """Sweep payable and withdraw-like functions of every sample contract"""
+        print("\n🔍 Sweeping all contracts with trace-based detection...")
+        
+        results = {}
+        for state in ("vault_pair", "simple_token", "defi_pool", "auction", "marketplace", "token_sale_active"):
+            contracts = [c for c in base_state(state).values() if hasattr(c, "abi")]
+            results.update(self.trace_tester.sweep(contracts))
+        
+        for name, result in sorted(results.items()):
+            print(f"  {name}: {result['status']}")
+        
+        assert results["VulnerableVault.withdraw"]["status"] == "flagged"
+        assert results["VulnerableVault.withdrawSecure"]["status"] == "clean"
+        assert "NFTMarketplace.acceptOffer" in results
+
+
 @pytest.mark.security
 @pytest.mark.reentrancy
 class TestReentrancyMitigation:
     """Test reentrancy mitigation techniques"""
     
-    def test_checks_effects_interactions_pattern(self):
+    def test_checks_effects_interactions_pattern(self, base_state):
         """Test Checks-Effects-Interactions pattern"""
         print("\n🛡️ Testing Checks-Effects-Interactions pattern...")
         
-        vault = VulnerableVault.deploy({"from": accounts[0]})
-        
-        # Fund vault
-        accounts[0].transfer(vault.address, "10 ether")
+        vault = base_state("funded_vulnerable_vault")["vault"]
         
         # Deposit
         user = accounts[1]
@@ -214,7 +377,7 @@ class TestReentrancyMitigation:
         # Test vulnerable function (Effects before Interactions)
         print("Testing vulnerable pattern (Effects before Interactions)...")
         try:
-            vault.withdraw(1 ether, {"from": user})
+            vault.withdraw("1 ether", {"from": user})
             print("⚠️  Vulnerable pattern executed")
         except Exception as e:
             print(f"Vulnerable pattern failed: {e}")
@@ -222,23 +385,20 @@ class TestReentrancyMitigation:
         # Test secure function (Interactions after Effects)
         print("Testing secure pattern (Interactions after Effects)...")
         try:
-            vault.withdrawSecure(1 ether, {"from": user})
+            vault.withdrawSecure("1 ether", {"from": user})
             print("✅ Secure pattern executed")
         except Exception as e:
             print(f"Secure pattern failed: {e}")
     
-    def test_reentrancy_guard_effectiveness(self):
+    def test_reentrancy_guard_effectiveness(self, base_state):
         """Test effectiveness of reentrancy guard"""
         print("\n🔒 Testing reentrancy guard effectiveness...")
         
-        vault = VulnerableVault.deploy({"from": accounts[0]})
-        
-        # Fund vault
-        accounts[0].transfer(vault.address, "10 ether")
+        vault = base_state("funded_vulnerable_vault")["vault"]
         
         # Deposit
         user = accounts[1]
-        vault.deposit({"from": user, "value": "5 ether}")
+        vault.deposit({"from": user, "value": "5 ether"})
         
         # Test if reentrancy guard is working
         # This would require a malicious contract to properly test
@@ -246,11 +406,11 @@ class TestReentrancyMitigation:
         
         try:
             # First withdraw should work
-            vault.withdrawSecure(1 ether, {"from": user})
+            vault.withdrawSecure("1 ether", {"from": user})
             print("✅ First withdraw with reentrancy guard succeeded")
             
             # Second withdraw should also work
-            vault.withdrawSecure(1 ether, {"from": user})
+            vault.withdrawSecure("1 ether", {"from": user})
             print("✅ Second withdraw with reentrancy guard succeeded")
             
         except Exception as e:
@@ -0,0 +1,97 @@
+"""
+Tester result cache tests
+"""
+import pytest
+from brownie import VulnerableVault, SecureVault
+from utils.evm_backend import InProcessEVMBackend
+from utils.result_cache import ResultCache
+from utils.security_helpers import SecurityTestSuite
+from utils.tester_registry import TesterSpec
+
+
+REPORT = {
+    "total_vulnerabilities": 1,
+    "vulnerabilities": [{"type": "REENTRANCY", "description": "withdraw", "severity": "HIGH"}],
+    "severity_counts": {"HIGH": 1, "MEDIUM": 0, "LOW": 0},
+    "attack_results": {"Vault.withdraw": {"reentries": 2}},
+}
+
+
+@pytest.mark.unit
+class TestResultCache:
+    """Results are stored per bytecode, config and tester version"""
+
+    def test_key_covers_every_input(self):
+        """Changing bytecode, config or tester version changes the key"""
+        base = ResultCache.key("0xaa", {"reentrancy_functions": ["withdraw"]}, "reentrancy", "1:abc")
+
+        assert base == ResultCache.key("0xaa", {"reentrancy_functions": ["withdraw"]}, "reentrancy", "1:abc")
+        assert base != ResultCache.key("0xbb", {"reentrancy_functions": ["withdraw"]}, "reentrancy", "1:abc")
+        assert base != ResultCache.key("0xaa", {"reentrancy_functions": ["claim"]}, "reentrancy", "1:abc")
+        assert base != ResultCache.key("0xaa", {"reentrancy_functions": ["withdraw"]}, "reentrancy", "2:abc")
+
+    def test_round_trip_and_clear(self, tmp_path):
+        """Stored findings come back; clear removes only matching entries"""
+        cache = ResultCache(str(tmp_path))
+        cache.put("k1", REPORT, REPORT["vulnerabilities"], contract="Vault", tester="reentrancy", code_hash="0xaa")
+        cache.put("k2", REPORT, [], contract="Token", tester="reentrancy", code_hash="0xbb")
+
+        entry = cache.get("k1")
+        assert entry["findings"] == REPORT["vulnerabilities"]
+        assert entry["report"] == {"attack_results": REPORT["attack_results"]}
+        assert cache.get("missing") is None
+        assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+        assert cache.clear(contract="Vault") == 1
+        assert cache.get("k1") is None
+        assert [e["contract"] for e in cache.entries()] == ["Token"]
+
+    def test_fingerprint_follows_version(self):
+        """Bumping a spec's version invalidates its cached results"""
+        run = lambda tester, contract, config: None
+        first = TesterSpec("example", "utils.result_cache:ResultCache", run, version=1)
+        second = TesterSpec("example", "utils.result_cache:ResultCache", run, version=2)
+
+        assert first.fingerprint() != second.fingerprint()
+        assert first.fingerprint().split(":")[1] == second.fingerprint().split(":")[1]
+
+
+@pytest.mark.unit
+class TestSuiteResultCache:
+    """SecurityTestSuite reuses and stores cached category results"""
+
+    @pytest.fixture
+    def backend(self):
+        """Fresh in-process chain"""
+        return InProcessEVMBackend()
+
+    def test_result_cache_skips_unchanged_contract(self, backend, tmp_path):
+        """A second scan of the same bytecode and config reuses every category"""
+        vault = backend.deploy(VulnerableVault, {"from": backend.accounts[0]})
+        test_config = {"restricted_functions": ["emergencyWithdraw", "transferOwnership"]}
+        cache = ResultCache(str(tmp_path))
+
+        first = SecurityTestSuite(backend, cache).run_all_tests(vault, test_config)
+        second = SecurityTestSuite(backend, cache).run_all_tests(vault, test_config)
+
+        assert second["access_control"]["cached"]
+        assert second["access_control"]["severity_counts"] == first["access_control"]["severity_counts"]
+        assert cache.stats["writes"] == 1
+
+    def test_cached_report_holds_only_its_own_contract(self, backend, tmp_path):
+        """Entries from a contract scanned earlier by the same suite are not cached again"""
+        vulnerable = backend.deploy(VulnerableVault, {"from": backend.accounts[0]})
+        secure = backend.deploy(SecureVault, {"from": backend.accounts[0]})
+        cache = ResultCache(str(tmp_path))
+        suite = SecurityTestSuite(backend, cache)
+
+        suite.run_all_tests(vulnerable, {"restricted_functions": ["emergencyWithdraw"], "access_control_dry_run": True})
+        results = suite.run_all_tests(secure, {"restricted_functions": ["updateDailyLimit"], "access_control_dry_run": True})
+
+        assert set(results["access_control"]["probe_results"]) == {"emergencyWithdraw", "updateDailyLimit"}
+        cached = SecurityTestSuite(backend, cache).run_all_tests(
+            secure, {"restricted_functions": ["updateDailyLimit"], "access_control_dry_run": True}
+        )
+        assert cached["access_control"]["cached"]
+        assert set(cached["access_control"]["probe_results"]) == {"updateDailyLimit"}
+        assert cached["access_control"]["severity_counts"] == {"HIGH": 0, "MEDIUM": 0, "LOW": 0}
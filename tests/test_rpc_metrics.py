@@ -0,0 +1,104 @@
+"""
+RPC instrumentation tests
+"""
+import threading
+import pytest
+from utils.rpc_metrics import RPCMetrics, merge_rpc_reports
+
+
+class EchoProvider:
+    """Minimal provider answering every request with its params"""
+
+    def make_request(self, method, params):
+        if method == "eth_fail":
+            return {"jsonrpc": "2.0", "id": 1, "error": {"message": "failed"}}
+        return {"jsonrpc": "2.0", "id": 1, "result": params}
+
+
+class EchoWeb3:
+    def __init__(self):
+        self.provider = EchoProvider()
+
+
+@pytest.mark.unit
+class TestRPCMetrics:
+    """Calls are counted per method and per active scope"""
+
+    def test_counts_by_method(self):
+        """Every request through the provider is counted with its sizes"""
+        w3 = EchoWeb3()
+        metrics = RPCMetrics().install(w3)
+
+        w3.provider.make_request("eth_call", [{"to": "0x01"}, "latest"])
+        w3.provider.make_request("eth_call", [{"to": "0x02"}, "latest"])
+        w3.provider.make_request("eth_fail", [])
+
+        assert metrics.by_method["eth_call"]["calls"] == 2
+        assert metrics.by_method["eth_call"]["request_bytes"] > 0
+        assert metrics.by_method["eth_call"]["response_bytes"] > 0
+        assert metrics.by_method["eth_fail"]["errors"] == 1
+        assert metrics.totals()["calls"] == 3
+
+    def test_nested_scopes(self):
+        """A call is attributed to every scope active at the time"""
+        w3 = EchoWeb3()
+        metrics = RPCMetrics().install(w3)
+
+        with metrics.scope("test_a"):
+            w3.provider.make_request("eth_getBalance", ["0x01", "latest"])
+            with metrics.scope("tester:reentrancy"):
+                w3.provider.make_request("eth_sendTransaction", [{}])
+        w3.provider.make_request("eth_blockNumber", [])
+
+        assert metrics.totals("test_a")["calls"] == 2
+        assert metrics.totals("tester:reentrancy")["calls"] == 1
+        assert metrics.totals()["calls"] == 3
+
+    def test_install_is_idempotent(self):
+        """Installing twice does not double count; uninstall restores the provider"""
+        w3 = EchoWeb3()
+        metrics = RPCMetrics().install(w3).install(w3)
+
+        w3.provider.make_request("eth_chainId", [])
+        assert metrics.totals()["calls"] == 1
+
+        metrics.uninstall()
+        w3.provider.make_request("eth_chainId", [])
+        assert metrics.totals()["calls"] == 1
+
+    def test_concurrent_calls_are_all_counted(self):
+        """Worker threads inside a scope neither lose counts nor miss the scope"""
+        w3 = EchoWeb3()
+        metrics = RPCMetrics(measure_bytes=False).install(w3)
+        threads, calls = 8, 2000
+
+        def worker(index):
+            with metrics.scope(f"worker:{index}"):
+                for _ in range(calls):
+                    w3.provider.make_request("eth_call", [])
+
+        with metrics.scope("tester:access_control"):
+            pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+            for thread in pool:
+                thread.start()
+            for thread in pool:
+                thread.join()
+
+        assert metrics.totals()["calls"] == threads * calls
+        assert metrics.totals("tester:access_control")["calls"] == threads * calls
+        assert metrics.get_report()["by_scope"]["worker:0"]["totals"]["calls"] >= calls
+
+    def test_merge_reports(self):
+        """Reports from parallel jobs add up"""
+        reports = []
+        for scope in ("tests/a.py::test_one", "tests/b.py::test_two"):
+            metrics = RPCMetrics()
+            with metrics.scope(scope):
+                metrics.record("eth_call", seconds=0.5, request_bytes=10, response_bytes=20)
+            reports.append(metrics.get_report())
+
+        merged = merge_rpc_reports(reports)
+
+        assert merged["by_method"]["eth_call"]["calls"] == 2
+        assert merged["totals"]["response_bytes"] == 40
+        assert set(merged["by_scope"]) == {"tests/a.py::test_one", "tests/b.py::test_two"}
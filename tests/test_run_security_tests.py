@@ -0,0 +1,173 @@
+"""
+Test job discovery, scheduling and report merging in scripts/run_security_tests.py
+"""
+import io
+import json
+import threading
+import time
+import pytest
+from scripts import run_security_tests as runner
+from utils.gas_profiler import GasProfiler
+
+
+@pytest.mark.unit
+class TestJobDiscovery:
+    """Test files expand into one job per file or per test class"""
+
+    def test_files_kept_whole_by_default(self):
+        """Without splitting every file is one job with its own report"""
+        files = [("tests/a.py", "a.html"), ("tests/b.py", "b.html")]
+        assert runner.discover_test_jobs(files) == files
+
+    def test_split_classes(self, tmp_path):
+        """Each Test class gets its own job and report; class-less files stay whole"""
+        with_classes = tmp_path / "test_with_classes.py"
+        with_classes.write_text(
+            "class TestFirst:\n    pass\n\n"
+            "class Helper:\n    pass\n\n"
+            "class TestSecond:\n    pass\n"
+        )
+        plain = tmp_path / "test_plain.py"
+        plain.write_text("def test_alone():\n    pass\n")
+
+        jobs = runner.discover_test_jobs(
+            [(str(with_classes), "classes.html"), (str(plain), "plain.html")],
+            split_classes=True,
+        )
+
+        assert jobs == [
+            (f"{with_classes}::TestFirst", "classes_TestFirst.html"),
+            (f"{with_classes}::TestSecond", "classes_TestSecond.html"),
+            (str(plain), "plain.html"),
+        ]
+
+    def test_job_report_paths_are_distinct(self):
+        """Concurrent jobs never share a report file"""
+        first = runner.job_report_env("tests/test_x.py::TestA")
+        second = runner.job_report_env("tests/test_x.py::TestB")
+
+        assert set(first) == {"RPC_METRICS_FILE", "FIXTURE_TIMINGS_FILE", "GAS_PROFILE_FILE"}
+        assert not set(first.values()) & set(second.values())
+
+
+@pytest.mark.unit
+class TestJobScheduling:
+    """Jobs share a pool of workers, each with its own chain and workspace"""
+
+    @pytest.fixture
+    def fake_workers(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(runner, "ensure_worker_network", lambda worker_id: f"worker-{worker_id}")
+        monkeypatch.setattr(runner, "prepare_workspace", lambda name: tmp_path / name)
+        return tmp_path
+
+    def test_jobs_never_share_a_worker(self, monkeypatch, fake_workers):
+        """No two running jobs hold the same network, and the pool size is respected"""
+        lock = threading.Lock()
+        running = set()
+        peak = []
+
+        def fake_run(test_target, output_file, network_name, cwd=None):
+            with lock:
+                assert network_name not in running
+                running.add(network_name)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.discard(network_name)
+            return {"success": True, "returncode": 0, "cwd": str(cwd)}
+
+        monkeypatch.setattr(runner, "run_brownie_tests", fake_run)
+        jobs = [(f"tests/test_{i}.py", f"report_{i}.html") for i in range(6)]
+
+        results = runner.run_test_jobs(jobs, max_workers=2)
+
+        assert max(peak) <= 2
+        assert list(results) == [target for target, _ in jobs]
+        for target, outcome in results.items():
+            assert outcome["network"] in ("worker-0", "worker-1")
+            assert outcome["cwd"] == str(fake_workers / outcome["network"])
+            assert outcome["report"].startswith("reports/report_")
+
+    def test_failed_job_keeps_its_worker_available(self, monkeypatch, fake_workers):
+        """A job that raises still returns its worker to the pool"""
+        calls = []
+
+        def fake_run(test_target, output_file, network_name, cwd=None):
+            calls.append(network_name)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            return {"success": True, "returncode": 0}
+
+        monkeypatch.setattr(runner, "run_brownie_tests", fake_run)
+
+        with pytest.raises(RuntimeError):
+            runner.run_test_jobs([("tests/test_a.py", "a.html")], max_workers=1)
+        results = runner.run_test_jobs([("tests/test_b.py", "b.html")], max_workers=1)
+
+        assert results["tests/test_b.py"]["success"]
+
+
+@pytest.mark.unit
+class TestJobReportMerging:
+    """Per-job timing and gas files combine into the shared reports"""
+
+    def test_merge_job_reports(self, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)
+        reports = tmp_path / "reports"
+        reports.mkdir()
+
+        for job, builds in (("a", 1), ("b", 2)):
+            (reports / f"fixture_timings_{job}.json").write_text(json.dumps({
+                "states": {"vault": {"builds": builds, "build_seconds": 0.5, "reverts": 3, "revert_seconds": 0.1}},
+            }))
+            profiler = GasProfiler(w3=object())
+            profiler.transactions["withdraw"] = [{"gas_used": 30000, "execution_gas": 9000}]
+            profiler._add("opcode", "SSTORE", 5000)
+            profiler.folded["withdraw;SSTORE"] = 5000
+            profiler.save(str(reports / f"gas_profile_{job}.json"))
+
+        runner.merge_job_reports()
+
+        timings = json.loads((reports / "fixture_timings.json").read_text())
+        assert timings["states"]["vault"]["builds"] == 3
+        assert timings["total_reverts"] == 6
+        assert (reports / "gas_hotspots.csv").read_text().splitlines()[1].startswith("opcode,SSTORE,10000,2,")
+        assert (reports / "gas_profile.folded").read_text() == "withdraw;SSTORE 10000\n"
+
+
+@pytest.mark.unit
+class TestResultStreaming:
+    """Per-test results are read from the job's JSONL file while it runs"""
+
+    def test_results_file_polled_on_a_timer(self, monkeypatch, tmp_path):
+        """Many output lines do not mean many reads of the results file"""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "reports").mkdir()
+        reads = []
+        original_read = runner.JsonlFollower.read
+
+        def counting_read(follower):
+            reads.append(1)
+            return original_read(follower)
+
+        class FakeProcess:
+            def __init__(self, cmd, env=None, **kwargs):
+                results = env[runner.JSONL_ENV_VAR]
+                with open(results, "w") as f:
+                    f.write(json.dumps({"event": "test", "nodeid": "t.py::a", "outcome": "passed",
+                                        "when": "call", "duration": 0.1}) + "\n")
+                self.stdout = io.StringIO("".join(f"line {i}\n" for i in range(2000)))
+
+            def wait(self):
+                return 0
+
+            def kill(self):
+                pass
+
+        monkeypatch.setattr(runner.JsonlFollower, "read", counting_read)
+        monkeypatch.setattr(runner.subprocess, "Popen", FakeProcess)
+
+        outcome = runner.run_brownie_tests("tests/test_x.py")
+
+        assert outcome["tests"]["passed"] == 1
+        assert len(reads) < 10
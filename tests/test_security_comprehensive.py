@@ -2,8 +2,8 @@
 Comprehensive security testing suite for smart contracts
 """
 import pytest
-from brownie import network, accounts, SimpleToken, VulnerableVault, DeFiPool
-from utils.security_helpers import SecurityTestSuite
+from brownie import network, accounts, chain
+from utils.security_helpers import SecurityTestSuite, IntegerOverflowTester, AccessControlTester, GasLimitTester
 import json
 
 
@@ -17,15 +17,12 @@ class TestSmartContractSecurity:
         self.accounts = accounts
         self.security_suite = SecurityTestSuite()
         
-    def test_vulnerable_vault_security(self):
+    def test_vulnerable_vault_security(self, base_state):
         """Test security of VulnerableVault contract"""
         print("\n🔍 Testing VulnerableVault security...")
         
-        # Deploy vulnerable vault
-        vault = VulnerableVault.deploy({"from": self.accounts[0]})
-        
-        # Fund the vault
-        self.accounts[0].transfer(vault.address, "10 ether")
+        # Funded vulnerable vault from the shared snapshot
+        vault = base_state("funded_vulnerable_vault")["vault"]
         
         # Test configuration
         test_config = {
@@ -34,7 +31,7 @@ class TestSmartContractSecurity:
             "restricted_functions": ["emergencyWithdraw", "transferOwnership"],
             "gas_functions": ["distributeToAll"],
             "oracle_functions": ["getTokenPrice"],
-            "swap_functions": ["placeBid"],
+            "swap_functions": [],
             "flash_loan_functions": [],
             "amount": 1000,
             "large_input": 2**256 - 1
@@ -61,17 +58,11 @@ class TestSmartContractSecurity:
         assert total_vulns > 0, "Expected vulnerabilities not found in VulnerableVault"
         print(f"✅ Found {total_vulns} vulnerabilities in VulnerableVault")
     
-    def test_simple_token_security(self):
+    def test_simple_token_security(self, base_state):
         """Test security of SimpleToken contract"""
         print("\n🔍 Testing SimpleToken security...")
         
-        # Deploy token
-        token = SimpleToken.deploy(
-            "Test Token",
-            "TEST",
-            1000000 * 10**18,
-            {"from": self.accounts[0]}
-        )
+        token = base_state("simple_token")["token"]
         
         # Test configuration
         test_config = {
@@ -106,20 +97,13 @@ class TestSmartContractSecurity:
         
         print(f"✅ Found {total_vulns} vulnerabilities in SimpleToken")
     
-    def test_defi_pool_security(self):
+    def test_defi_pool_security(self, base_state):
         """Test security of DeFiPool contract"""
         print("\n🔍 Testing DeFiPool security...")
         
-        # Deploy mock tokens for testing
+        # DeFi pool deployed with mock token addresses
         # Note: This would need actual ERC20 token contracts
-        # For now, we'll test with mock addresses
-        
-        # Deploy DeFi pool
-        pool = DeFiPool.deploy(
-            self.accounts[1],  # Mock token address
-            self.accounts[2],  # Mock reward token address
-            {"from": self.accounts[0]}
-        )
+        pool = base_state("defi_pool")["pool"]
         
         # Test configuration
         test_config = {
@@ -159,9 +143,9 @@ class TestSmartContractSecurity:
 class TestReentrancyAttacks:
     """Specific tests for reentrancy vulnerabilities"""
     
-    def test_vault_reentrancy_attack(self):
+    def test_vault_reentrancy_attack(self, base_state):
         """Test reentrancy attack on VulnerableVault"""
-        vault = VulnerableVault.deploy({"from": accounts[0]})
+        vault = base_state("vulnerable_vault")["vault"]
         
         # Deposit funds
         vault.deposit({"from": accounts[0], "value": "5 ether"})
@@ -174,27 +158,49 @@ class TestReentrancyAttacks:
         
         try:
             # This should fail due to reentrancy protection in secure version
-            vault.withdrawSecure(1 ether, {"from": accounts[0]})
+            vault.withdrawSecure("1 ether", {"from": accounts[0]})
             print("✅ Secure withdraw function works correctly")
         except Exception as e:
             print(f"❌ Secure withdraw failed: {e}")
         
         # Test vulnerable withdraw function
         try:
-            vault.withdraw(1 ether, {"from": accounts[0]})
+            vault.withdraw("1 ether", {"from": accounts[0]})
             print("⚠️  Vulnerable withdraw function succeeded (expected)")
         except Exception as e:
             print(f"✅ Vulnerable withdraw failed: {e}")
 
 
+@pytest.mark.security
+class TestOverflowPipelining:
+    """Pipelined overflow inputs must give the same verdicts as sending them one by one"""
+    
+    def test_pipelined_matches_serial(self, base_state):
+        """Every input gets the same outcome and the same overflows are reported"""
+        vault = base_state("vulnerable_vault")["vault"]
+        # placeBid(0) succeeds without value, other amounts revert, negatives never encode
+        inputs = IntegerOverflowTester.boundary_inputs(16) + [2**256 - 1, 2**256]
+        
+        serial = IntegerOverflowTester()
+        serial_outcomes = serial.test_overflow(vault, "placeBid", 0, test_cases=inputs)
+        pipelined = IntegerOverflowTester()
+        pipelined_outcomes = pipelined.test_overflow(vault, "placeBid", 0, pipelined=True, test_cases=inputs)
+        
+        assert {o["outcome"] for o in serial_outcomes} == {"success", "reverted", "rejected"}
+        assert [(o["input"], o["outcome"]) for o in pipelined_outcomes] == \
+            [(o["input"], o["outcome"]) for o in serial_outcomes]
+        assert pipelined.get_vulnerability_report()["vulnerabilities"] == [] == \
+            serial.get_vulnerability_report()["vulnerabilities"]
+
+
 @pytest.mark.security
 @pytest.mark.gas
 class TestGasOptimization:
     """Tests for gas optimization and DoS vulnerabilities"""
     
-    def test_gas_consumption(self):
+    def test_gas_consumption(self, base_state, gas_profiler):
         """Test gas consumption patterns"""
-        vault = VulnerableVault.deploy({"from": accounts[0]})
+        vault = base_state("vulnerable_vault")["vault"]
         
         # Test gas consumption of different functions
         functions_to_test = [
@@ -218,6 +224,7 @@ class TestGasOptimization:
                     
                     gas_results[func_name] = tx.gas_used
                     print(f"⛽ {func_name}: {tx.gas_used} gas")
+                    gas_profiler.profile_transaction(tx, f"VulnerableVault.{func_name}")
                     
             except Exception as e:
                 print(f"❌ {func_name} failed: {e}")
@@ -227,6 +234,31 @@ class TestGasOptimization:
         for func_name, gas_used in gas_results.items():
             if gas_used > high_gas_threshold:
                 print(f"⚠️  High gas usage in {func_name}: {gas_used}")
+    
+    def test_distribute_gas_threshold(self, base_state):
+        """distributeToAll stops fitting in a block once the recipient list is long enough"""
+        vault = base_state("vulnerable_vault")["vault"]
+        tester = GasLimitTester()
+        
+        result = tester.find_gas_threshold(vault, "distributeToAll")
+        
+        assert result["measurable"]
+        assert result["threshold"] is not None
+        curve = {point["n"]: point for point in result["curve"]}
+        assert curve[result["threshold"]]["status"] == "over"
+        assert curve[result["threshold"] - 1]["status"] == "fits"
+    
+    def test_revert_at_smallest_size_is_not_a_dos(self, base_state):
+        """A caller the function rejects outright gives no threshold and no finding"""
+        vault = base_state("vulnerable_vault")["vault"]
+        tester = GasLimitTester()
+        
+        result = tester.find_gas_threshold(vault, "distributeToAll", sender=accounts[1])
+        
+        assert not result["measurable"]
+        assert result["threshold"] is None
+        assert result["probes"] == 1
+        assert tester.vulnerabilities_found == []
 
 
 @pytest.mark.security
@@ -234,13 +266,13 @@ class TestGasOptimization:
 class TestAccessControl:
     """Tests for access control vulnerabilities"""
     
-    def test_unauthorized_access(self):
+    def test_unauthorized_access(self, base_state):
         """Test unauthorized access to restricted functions"""
-        vault = VulnerableVault.deploy({"from": accounts[0]})
+        vault = base_state("vulnerable_vault")["vault"]
         
         restricted_functions = [
             ("transferOwnership", {"newOwner": accounts[1]}),
-            ("distributeToAll", {"amount": 100}),
+            ("distributeToAll", {"users": [accounts[2]], "amount": 100}),
         ]
         
         for func_name, params in restricted_functions:
@@ -256,6 +288,35 @@ class TestAccessControl:
                     
             except Exception as e:
                 print(f"✅ Access control working in {func_name}: {e}")
+    
+    def test_probe_reports_restricted_function(self, base_state):
+        """eth_call probes tell an owner check from an open function"""
+        vault = base_state("funded_vulnerable_vault")["vault"]
+        tester = AccessControlTester()
+        
+        denied = tester.probe_function(vault, "distributeToAll", accounts[1])
+        allowed = tester.probe_function(vault, "emergencyWithdraw", accounts[1])
+        
+        assert denied["result"] == "denied"
+        assert "Not owner" in denied["reason"]
+        assert allowed["result"] == "allowed"
+    
+    def test_probe_commits_no_state(self, base_state):
+        """A dry run finds the bypasses without mining or changing anything"""
+        vault = base_state("funded_vulnerable_vault")["vault"]
+        tester = AccessControlTester()
+        height = chain.height
+        vault_balance = vault.balance()
+        
+        tester.test_access_control(vault, ["emergencyWithdraw", "transferOwnership", "distributeToAll"],
+                                   dry_run=True)
+        
+        report = tester.get_vulnerability_report()
+        assert report["severity_counts"]["HIGH"] == 2
+        assert report["probe_results"]["distributeToAll"]["result"] == "denied"
+        assert chain.height == height
+        assert vault.balance() == vault_balance
+        assert vault.owner() == accounts[0]
 
 
 @pytest.mark.security
@@ -263,12 +324,12 @@ class TestAccessControl:
 class TestSecurityIntegration:
     """Integration tests for security scenarios"""
     
-    def test_complete_attack_scenario(self):
+    def test_complete_attack_scenario(self, base_state):
         """Test complete attack scenario combining multiple vulnerabilities"""
         print("\n🎭 Testing complete attack scenario...")
         
         # Setup
-        vault = VulnerableVault.deploy({"from": accounts[0]})
+        vault = base_state("vulnerable_vault")["vault"]
         attacker = accounts[1]
         victim = accounts[2]
         
@@ -284,7 +345,7 @@ class TestSecurityIntegration:
         try:
             # 1. Attempt reentrancy attack
             print("🎯 Attempting reentrancy attack...")
-            vault.withdraw(0.5 ether, {"from": attacker})
+            vault.withdraw("0.5 ether", {"from": attacker})
             
             # 2. Attempt emergency withdraw (if accessible)
             print("🎯 Attempting emergency withdraw...")
@@ -0,0 +1,55 @@
+"""
+Incremental Slither scan tests
+"""
+import pytest
+from utils.artifact_store import closure_hash, source_closure
+from utils.slither_scan import merge_detectors
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+@pytest.mark.unit
+class TestSourceClosure:
+    """Cache keys follow a contract's own source and everything it imports"""
+
+    @pytest.fixture
+    def project(self, tmp_path):
+        package = tmp_path / "packages" / "OpenZeppelin"
+        _write(package / "contracts" / "access" / "Ownable.sol", 'import "../utils/Context.sol";\ncontract Ownable {}')
+        _write(package / "contracts" / "utils" / "Context.sol", "contract Context {}")
+        vault = _write(tmp_path / "contracts" / "Vault.sol",
+                       'import "@openzeppelin/contracts/access/Ownable.sol";\ncontract Vault is Ownable {}')
+        token = _write(tmp_path / "contracts" / "Token.sol", "contract Token {}")
+        return {"vault": str(vault), "token": str(token), "remappings": {"@openzeppelin": package},
+                "context": package / "contracts" / "utils" / "Context.sol"}
+
+    def test_imports_are_followed(self, project):
+        """Remapped and relative imports join the closure"""
+        closure = source_closure(project["vault"], project["remappings"])
+
+        assert sorted(path.split("/")[-1] for path in closure) == ["Context.sol", "Ownable.sol", "Vault.sol"]
+        assert all(digest is not None for digest in closure.values())
+
+    def test_imported_change_invalidates_importer_only(self, project):
+        """Editing an OpenZeppelin file changes the importer's hash, not unrelated contracts'"""
+        vault_before = closure_hash(project["vault"], remappings=project["remappings"])
+        token_before = closure_hash(project["token"], remappings=project["remappings"])
+
+        project["context"].write_text("contract Context { uint256 x; }")
+
+        assert closure_hash(project["vault"], remappings=project["remappings"]) != vault_before
+        assert closure_hash(project["token"], remappings=project["remappings"]) == token_before
+
+    def test_shared_findings_merge_once(self):
+        """A finding in a shared import is reported once"""
+        shared = {"id": "abc", "check": "solc-version", "description": "Ownable pragma"}
+        reports = {
+            "contracts/A.sol": {"results": {"detectors": [shared, {"id": "a1", "check": "reentrancy-eth"}]}},
+            "contracts/B.sol": {"results": {"detectors": [shared]}},
+        }
+
+        assert [d["id"] for d in merge_detectors(reports)] == ["abc", "a1"]
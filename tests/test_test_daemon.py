@@ -0,0 +1,130 @@
+"""
+Warm test daemon protocol tests
+"""
+import sys
+import threading
+import time
+import pytest
+from types import SimpleNamespace
+from utils.test_daemon import ResultStream, TestDaemon, daemon_available, request, submit
+
+
+class EchoDaemon(TestDaemon):
+    """Daemon whose jobs stream their arguments back instead of running pytest"""
+
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def run(self, args, env, send, timeout=None):
+        self.started.set()
+        self.release.wait(5)
+        send({"event": "output", "text": " ".join(args)})
+        self.jobs += 1
+        return {"event": "done", "exit_code": 0, "env": env, "timeout": timeout}
+
+
+@pytest.fixture
+def serving(tmp_path):
+    """An EchoDaemon serving on a temporary socket until the test ends"""
+    path = str(tmp_path / "daemon.sock")
+    daemon = EchoDaemon()
+    server = threading.Thread(target=daemon.serve, args=(path,))
+    server.start()
+    for _ in range(100):
+        if daemon_available(path):
+            break
+        time.sleep(0.05)
+
+    yield daemon, path
+
+    daemon.release.set()
+    list(request({"command": "stop"}, path))
+    server.join(timeout=5)
+    assert not server.is_alive()
+    assert not daemon_available(path)
+
+
+@pytest.mark.unit
+class TestTestDaemon:
+    """Jobs and results travel over the daemon socket"""
+
+    def test_result_stream_reports_outcomes(self):
+        """Failing phases are forwarded; a test counts once, with its worst outcome"""
+        events = []
+        stream = ResultStream(events.append)
+        report = lambda when, outcome: SimpleNamespace(
+            nodeid="tests/test_x.py::test_a", when=when, outcome=outcome, duration=0.5,
+            passed=outcome == "passed", failed=outcome == "failed", longrepr="boom")
+
+        stream.pytest_runtest_logreport(report("setup", "passed"))
+        stream.pytest_runtest_logreport(report("call", "passed"))
+        stream.pytest_runtest_logreport(report("teardown", "failed"))
+
+        assert [(e["when"], e["outcome"]) for e in events] == [("call", "passed"), ("teardown", "failed")]
+        assert events[1]["longrepr"] == "boom"
+        assert stream.counts == {"passed": 0, "failed": 1, "skipped": 0}
+
+    def test_submit_streams_job_events(self, serving):
+        """A job's output streams back before its done event"""
+        daemon, path = serving
+
+        events = []
+        done = submit(["tests/test_x.py", "-k", "withdraw"], env={"A": "1"}, path=path,
+                      on_event=events.append, timeout=30)
+
+        assert [e["event"] for e in events] == ["output", "done"]
+        assert events[0]["text"] == "tests/test_x.py -k withdraw"
+        assert done["exit_code"] == 0 and done["env"] == {"A": "1"}
+        assert done["timeout"] == 30
+        assert next(request({"command": "ping"}, path))["jobs"] == 1
+
+    def test_ping_answered_during_a_job(self, serving):
+        """A running job does not make the daemon look unavailable"""
+        daemon, path = serving
+        daemon.release.clear()
+        job = threading.Thread(target=submit, args=(["tests/test_x.py"],), kwargs={"path": path, "on_event": list})
+        job.start()
+        assert daemon.started.wait(5)
+
+        assert daemon_available(path)
+        assert next(request({"command": "ping"}, path, timeout=2))["busy"]
+
+        daemon.release.set()
+        job.join(timeout=5)
+        assert not next(request({"command": "ping"}, path, timeout=2))["busy"]
+
+    def test_reset_goes_through_the_chain_api(self, monkeypatch):
+        """Jobs are undone with chain.reset(), not raw evm_revert"""
+        chain = SimpleNamespace(resets=0)
+        chain.reset = lambda: setattr(chain, "resets", chain.resets + 1)
+        monkeypatch.setitem(sys.modules, "brownie", SimpleNamespace(chain=chain))
+
+        TestDaemon().reset()
+
+        assert chain.resets == 1
+
+    def test_job_timeout_interrupts_the_run(self, monkeypatch):
+        """A job past its timeout is interrupted, reported and the chain still reset"""
+        daemon = TestDaemon(job_timeout=0.2)
+        resets = []
+        monkeypatch.setattr(daemon, "_purge_modules", lambda: None)
+        monkeypatch.setattr(daemon, "_markers", lambda: {})
+        monkeypatch.setattr(daemon, "reset", lambda: resets.append(True))
+
+        def hang(args, plugins=None):
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                time.sleep(0.01)
+            return 0
+
+        monkeypatch.setattr(pytest, "main", hang)
+
+        done = daemon.run(["tests/test_x.py"], {}, lambda event: None)
+
+        assert done["timed_out"] and "timed out" in done["error"]
+        assert done["exit_code"] == int(pytest.ExitCode.INTERRUPTED)
+        assert done["seconds"] < 5
+        assert resets == [True]
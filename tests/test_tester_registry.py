@@ -0,0 +1,63 @@
+"""
+Tester registry and run plan tests
+"""
+import pytest
+from utils.tester_registry import TesterSpec, TESTER_REGISTRY, build_run_plan, register_tester
+
+
+VAULT_ABI = [
+    {"type": "function", "name": "deposit", "stateMutability": "payable", "inputs": [], "outputs": []},
+    {"type": "function", "name": "withdraw", "stateMutability": "nonpayable",
+     "inputs": [{"name": "amount", "type": "uint256"}], "outputs": []},
+    {"type": "function", "name": "balances", "stateMutability": "view",
+     "inputs": [{"name": "", "type": "address"}], "outputs": [{"name": "", "type": "uint256"}]},
+]
+
+
+def _plan(test_config, abi=VAULT_ABI):
+    return {entry["name"]: entry for entry in build_run_plan(abi, test_config)}
+
+
+@pytest.mark.unit
+class TestRunPlan:
+    """The plan is decided from the config and ABI alone"""
+
+    def test_unconfigured_categories_are_skipped(self):
+        """Only categories switched on by the config run"""
+        plan = _plan({"reentrancy_functions": ["withdraw"]})
+
+        assert plan["reentrancy"]["skipped"] is None
+        assert plan["overflow"]["skipped"] == "no overflow_functions in test_config"
+        assert plan["front_running"]["skipped"]
+        assert list(plan) == list(TESTER_REGISTRY)
+
+    def test_missing_functions_are_dropped(self):
+        """Functions absent from the ABI are removed, and empty categories skipped"""
+        plan = _plan({
+            "reentrancy_functions": ["withdraw", "emergencyWithdraw"],
+            "oracle_functions": ["getTokenPrice"],
+        })
+
+        assert plan["reentrancy"]["config"]["reentrancy_functions"] == ["withdraw"]
+        assert plan["oracle"]["skipped"] == "contract has none of the oracle_functions"
+
+    def test_abi_requirements(self):
+        """A view-only contract has nothing for the access matrix to probe"""
+        view_only = [entry for entry in VAULT_ABI if entry["stateMutability"] == "view"]
+
+        plan = _plan({"access_matrix": True}, abi=view_only)
+
+        assert plan["access_matrix"]["skipped"] == "no state-changing functions to probe"
+
+    def test_registered_plugin_is_planned(self):
+        """Registered categories join the plan without being imported"""
+        spec = register_tester(TesterSpec(
+            "example_plugin", "example_plugins.missing:Tester", lambda tester, contract, config: None,
+            "example_functions", function_keys=["example_functions"],
+        ))
+        try:
+            plan = _plan({"example_functions": ["deposit"]})
+            assert plan["example_plugin"]["skipped"] is None
+            assert spec._class is None
+        finally:
+            del TESTER_REGISTRY["example_plugin"]
@@ -0,0 +1,54 @@
+"""
+On-disk trace cache tests
+"""
+import pytest
+import os
+from utils.trace_cache import TraceCache
+
+
+def _ops(count: int):
+    return [{"pc": i, "op": "PUSH1", "gas": 1000 - i, "gas_cost": 3, "depth": 1} for i in range(count)]
+
+
+@pytest.mark.unit
+class TestTraceCache:
+    """Compressed traces keyed by code, calldata and pre-state"""
+    
+    def test_round_trip(self, tmp_path):
+        """Stored traces load back unchanged"""
+        cache = TraceCache(root=str(tmp_path))
+        key = TraceCache.key("0xcode", "0x2e1a7d4d", "0xroot")
+        
+        cache.put(key, _ops(10))
+        
+        assert cache.get(key) == _ops(10)
+        assert cache.stats["hits"] == 1
+    
+    def test_key_depends_on_pre_state(self):
+        """The same call against a different state is a different entry"""
+        assert TraceCache.key("0xcode", "0x00", "0xroot1") != TraceCache.key("0xcode", "0x00", "0xroot2")
+    
+    def test_get_or_compute_skips_recomputation(self, tmp_path):
+        """A cached trace is not recomputed"""
+        cache = TraceCache(root=str(tmp_path))
+        calls = []
+        compute = lambda: calls.append(1) or _ops(5)
+        
+        cache.get_or_compute("abc", compute)
+        cache.get_or_compute("abc", compute)
+        
+        assert len(calls) == 1
+    
+    def test_lru_eviction(self, tmp_path):
+        """The least recently used trace goes first once over budget"""
+        cache = TraceCache(root=str(tmp_path), max_mb=1)
+        cache.put("old", _ops(10))
+        cache.put("recent", _ops(10))
+        os.utime(tmp_path / "old.jsonl.gz", (1, 1))
+        
+        cache.max_bytes = cache.size() - 1
+        cache.evict()
+        
+        assert cache.get("old") is None
+        assert cache.get("recent") is not None
+        assert cache.stats["evictions"] == 1
@@ -0,0 +1,89 @@
+"""
+Trace parsing tests
+"""
+import pytest
+import json
+from utils.trace_tools import iter_struct_log_objects, iter_trace_ops, find_stores_after_calls
+from utils.gas_profiler import iter_op_costs
+
+
+def _response(struct_logs):
+    result = {"gas": 21000, "failed": False, "returnValue": "", "structLogs": struct_logs}
+    return json.dumps({"jsonrpc": "2.0", "id": 1, "result": result}).encode()
+
+
+def _log(pc, op, stack=None, depth=1):
+    return {"pc": pc, "op": op, "gas": 100000 - pc, "gasCost": 3, "depth": depth, "stack": stack or []}
+
+
+@pytest.mark.unit
+class TestStreamingTraceParser:
+    """structLogs are parsed incrementally, whatever the chunk boundaries"""
+    
+    @pytest.mark.parametrize("chunk_size", [1, 3, 17, 4096])
+    def test_chunk_boundaries(self, chunk_size):
+        """Objects split across chunks are reassembled"""
+        logs = [_log(i, "PUSH1", ["0x" + f"{i:064x}"]) for i in range(40)]
+        logs[7]["error"] = 'odd "{string}" \\ with braces'
+        raw = _response(logs)
+        chunks = [raw[i:i + chunk_size] for i in range(0, len(raw), chunk_size)]
+        
+        assert list(iter_struct_log_objects(chunks)) == logs
+    
+    def test_rpc_error_raises(self):
+        """Error responses without structLogs raise"""
+        raw = b'{"jsonrpc": "2.0", "id": 1, "error": {"code": -32601, "message": "not supported"}}'
+        
+        with pytest.raises(RuntimeError, match="not supported"):
+            list(iter_struct_log_objects([raw]))
+    
+    def test_compact_records(self):
+        """Records carry the touched slot and call target/value"""
+        target = "0x" + "ab" * 20
+        logs = [
+            _log(0, "SLOAD", ["0x05"]),
+            _log(1, "CALL", ["0x0", "0x0", "0x0", "0x0", "0xde0b6b3a7640000", target, "0x2300"]),
+        ]
+        
+        ops = list(iter_trace_ops(iter_struct_log_objects([_response(logs)])))
+        
+        assert ops[0]["slot"] == 5
+        assert ops[1]["to"] == target
+        assert ops[1]["value"] == 10**18
+    
+    def test_store_after_value_call_found(self):
+        """A balance write after the ether transfer is reported; lock resets are not"""
+        ops = [
+            {"pc": 0, "op": "SSTORE", "depth": 1, "slot": 4},
+            {"pc": 1, "op": "CALL", "depth": 1, "to": "0x" + "00" * 20, "value": 1},
+            {"pc": 2, "op": "SSTORE", "depth": 2, "slot": 9},
+            {"pc": 3, "op": "SSTORE", "depth": 1, "slot": 4},
+            {"pc": 4, "op": "SSTORE", "depth": 1, "slot": 7},
+        ]
+        
+        findings = find_stores_after_calls(iter(ops))
+        
+        assert [f["slot"] for f in findings] == [7]
+
+
+@pytest.mark.unit
+class TestGasAttribution:
+    """Depth-aware gas deltas count every unit of gas exactly once"""
+    
+    def test_call_cost_excludes_callee(self):
+        """A CALL is charged only its own overhead, the callee its opcodes"""
+        callee = "0x" + "11" * 20
+        ops = [
+            {"pc": 0, "op": "PUSH1", "gas": 100, "gas_cost": 3, "depth": 1},
+            {"pc": 2, "op": "CALL", "gas": 97, "gas_cost": 50, "depth": 1, "to": callee, "value": 0},
+            {"pc": 0, "op": "PUSH1", "gas": 50, "gas_cost": 3, "depth": 2},
+            {"pc": 2, "op": "STOP", "gas": 47, "gas_cost": 0, "depth": 2},
+            {"pc": 3, "op": "POP", "gas": 80, "gas_cost": 2, "depth": 1},
+            {"pc": 4, "op": "STOP", "gas": 78, "gas_cost": 0, "depth": 1},
+        ]
+        
+        costs = [(record["op"], cost, frame["code"]) for record, cost, frame in iter_op_costs(ops, "root")]
+        
+        assert ("CALL", 14, "root") in costs
+        assert ("PUSH1", 3, callee) in costs
+        assert sum(cost for _, cost, _ in costs) == 100 - 78
@@ -4,6 +4,7 @@ Run this script in Brownie console: brownie run tutorials/01_brownie_basics.py
 """
 
 from brownie import accounts, network, SimpleToken, VulnerableVault
+from utils.gas_profiler import GasProfiler
 import json
 
 
@@ -217,6 +218,15 @@ def demo_gas_analysis():
     # Contract deployment gas usage
     print(f"  - Token deployment: {token.tx.gas_used} gas")
     print(f"  - Vault deployment: {vault.tx.gas_used} gas")
+    
+    # Where the withdraw gas goes, per opcode and storage slot
+    profiler = GasProfiler()
+    breakdown = profiler.profile_transaction(withdraw_tx)
+    print(f"  - Withdraw breakdown ({breakdown['intrinsic_and_refunds']} intrinsic/refunds):")
+    for op, gas in sorted(breakdown["by_opcode"].items(), key=lambda item: -item[1])[:5]:
+        print(f"      {op}: {gas} gas")
+    for slot, gas in breakdown["by_slot"].items():
+        print(f"      {slot}: {gas} gas")
 
 
 def demo_testing_patterns():
@@ -0,0 +1,262 @@
+"""
+Shared compilation artifact store
+
+Compiles a contract file with solc (through py-solc-x, as brownie does) using
+the ``compiler.solc`` settings of brownie-config.yaml, and keeps the result:
+ABI, bytecode, deployed bytecode, source maps and storage layout for every
+contract in the file. Entries are keyed by the hash of the file together with
+everything it imports and the compiler settings, so each unique source
+closure is compiled once and then shared by the testers, the state builder
+and the Slither scan. A file lock keeps concurrent workers from compiling the
+same closure twice.
+"""
+from typing import Dict, List, Any, Optional
+from pathlib import Path
+from utils.evm_backend import security_config
+import fcntl
+import hashlib
+import json
+import os
+import posixpath
+import re
+
+
+DEFAULT_STORE_DIR = "reports/artifact_store"
+CONTRACTS_DIR = "contracts"
+BROWNIE_PACKAGES = Path.home() / ".brownie" / "packages"
+
+OUTPUT_SELECTION = [
+    "abi",
+    "evm.bytecode.object",
+    "evm.bytecode.sourceMap",
+    "evm.deployedBytecode.object",
+    "evm.deployedBytecode.sourceMap",
+    "storageLayout",
+]
+
+_IMPORT_RE = re.compile(r'^\s*import\s+(?:[^"\']*\bfrom\s+)?["\']([^"\']+)["\']', re.M)
+
+
+def compiler_settings() -> Dict[str, Any]:
+    """The ``compiler.solc`` section of brownie-config.yaml"""
+    try:
+        from brownie import config
+        return dict(config["compiler"]["solc"])
+    except Exception:
+        return {}
+
+
+def resolve_remappings(remappings: Optional[List[str]] = None) -> Dict[str, Path]:
+    """Map import prefixes to directories; brownie packages live under ~/.brownie/packages"""
+    if remappings is None:
+        remappings = compiler_settings().get("remappings") or []
+    resolved = {}
+    for remapping in remappings:
+        prefix, _, target = remapping.partition("=")
+        target_path = Path(target)
+        if not target_path.is_absolute() and not target_path.exists():
+            target_path = BROWNIE_PACKAGES / target
+        resolved[prefix] = target_path
+    return resolved
+
+
+def _unit_path(unit: str, remappings: Dict[str, Path]) -> Path:
+    for prefix, target in remappings.items():
+        if unit.startswith(prefix + "/"):
+            return target / unit[len(prefix) + 1:]
+    return Path(unit)
+
+
+def source_units(path: str, remappings: Optional[Dict[str, Path]] = None) -> Dict[str, Path]:
+    """A source file and everything it imports, transitively, as {source unit name: file}
+
+    Unit names are the import paths solc sees (``contracts/Vault.sol``,
+    ``@openzeppelin/contracts/access/Ownable.sol``), with relative imports
+    resolved against the importing unit.
+    """
+    remappings = resolve_remappings() if remappings is None else remappings
+    units = {}
+    pending = [Path(path).as_posix()]
+    while pending:
+        unit = pending.pop()
+        if unit in units:
+            continue
+        units[unit] = _unit_path(unit, remappings)
+        try:
+            source = units[unit].read_text()
+        except OSError:
+            continue
+        for name in _IMPORT_RE.findall(source):
+            if name.startswith("."):
+                name = posixpath.normpath(posixpath.join(posixpath.dirname(unit), name))
+            pending.append(name)
+    return units
+
+
+def source_closure(path: str, remappings: Optional[Dict[str, Path]] = None) -> Dict[str, Optional[str]]:
+    """{source unit name: sha256 of its content, or None if it cannot be read}"""
+    hashes = {}
+    for unit, file_path in source_units(path, remappings).items():
+        try:
+            hashes[unit] = hashlib.sha256(file_path.read_bytes()).hexdigest()
+        except OSError:
+            # Unresolved imports still count by name, so installing them changes the hash
+            hashes[unit] = None
+    return hashes
+
+
+def closure_hash(path: str, extra: Any = None, remappings: Optional[Dict[str, Path]] = None) -> str:
+    """One hash for a file's source closure plus ``extra`` (tool version, settings)"""
+    material = json.dumps([sorted(source_closure(path, remappings).items()), extra], sort_keys=True, default=str)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def layout_from_storage(storage_layout: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Convert solc's ``storageLayout`` to the STORAGE_LAYOUTS format of utils/state_builder.py"""
+    types = storage_layout.get("types") or {}
+    layout = {}
+    for variable in storage_layout.get("storage", []):
+        type_info = types.get(variable["type"], {})
+        encoding = type_info.get("encoding")
+        entry = {"slot": int(variable["slot"])}
+        if encoding == "mapping":
+            entry["type"] = "mapping"
+            element = types.get(type_info.get("value"), {})
+        elif encoding == "dynamic_array":
+            entry["type"] = "array"
+            element = types.get(type_info.get("base"), {})
+        else:
+            entry["type"] = "value"
+            element = {}
+            if variable.get("offset"):
+                entry["offset"] = variable["offset"]
+        if element.get("members"):
+            entry["struct_size"] = -(-int(element["numberOfBytes"]) // 32)
+        layout[variable["label"]] = entry
+    return layout
+
+
+class ArtifactStore:
+    """Compile each unique source closure once and serve its artifacts"""
+
+    def __init__(self, root: Optional[str] = None, settings: Optional[Dict[str, Any]] = None,
+                 contracts_dir: str = CONTRACTS_DIR):
+        self.root = Path(root or security_config().get("artifact_store_dir") or DEFAULT_STORE_DIR)
+        self.settings = compiler_settings() if settings is None else settings
+        self.remappings = resolve_remappings(self.settings.get("remappings") or [])
+        self.contracts_dir = Path(contracts_dir)
+        self.stats = {"hits": 0, "compiles": 0}
+
+    @property
+    def solc_version(self) -> Optional[str]:
+        return self.settings.get("version")
+
+    def solc_settings(self) -> Dict[str, Any]:
+        """The standard-JSON ``settings`` object built from brownie-config.yaml"""
+        settings = {
+            "optimizer": {"enabled": bool(self.settings.get("optimize", True)),
+                          "runs": int(self.settings.get("runs", 200))},
+            "outputSelection": {"*": {"*": OUTPUT_SELECTION}},
+        }
+        if self.settings.get("evm_version"):
+            settings["evmVersion"] = self.settings["evm_version"]
+        return settings
+
+    def key(self, path: str) -> str:
+        return closure_hash(path, [self.solc_version, self.solc_settings()], self.remappings)
+
+    def _entry_path(self, path: str, key: str) -> Path:
+        return self.root / f"{Path(path).stem}-{key[:16]}.json"
+
+    def solc_executable(self) -> str:
+        """Path of the pinned solc binary, installed on first use"""
+        import solcx
+        if self.solc_version not in [str(v) for v in solcx.get_installed_solc_versions()]:
+            solcx.install_solc(self.solc_version)
+        return str(solcx.get_executable(self.solc_version))
+
+    def compile(self, path: str) -> Dict[str, Dict[str, Any]]:
+        """Run solc on one file and its imports; returns artifacts by contract name"""
+        import solcx
+
+        units = source_units(path, self.remappings)
+        missing = [unit for unit, file_path in units.items() if not file_path.exists()]
+        if missing:
+            raise FileNotFoundError(f"Unresolved imports in {path}: {', '.join(missing)}")
+
+        root_unit = next(iter(units))
+        standard_input = {
+            "language": "Solidity",
+            "sources": {unit: {"content": file_path.read_text()} for unit, file_path in units.items()},
+            "settings": self.solc_settings(),
+        }
+        output = solcx.compile_standard(standard_input, solc_binary=self.solc_executable())
+        self.stats["compiles"] += 1
+
+        artifacts = {}
+        for name, compiled in output.get("contracts", {}).get(root_unit, {}).items():
+            evm = compiled.get("evm", {})
+            artifacts[name] = {
+                "contractName": name,
+                "sourcePath": root_unit,
+                "abi": compiled.get("abi", []),
+                "bytecode": evm.get("bytecode", {}).get("object", ""),
+                "sourceMap": evm.get("bytecode", {}).get("sourceMap", ""),
+                "deployedBytecode": evm.get("deployedBytecode", {}).get("object", ""),
+                "deployedSourceMap": evm.get("deployedBytecode", {}).get("sourceMap", ""),
+                "storageLayout": compiled.get("storageLayout", {}),
+                "compiler": {"version": self.solc_version, "settings": self.solc_settings()},
+            }
+        return artifacts
+
+    def get(self, path: str) -> Dict[str, Dict[str, Any]]:
+        """Artifacts of every contract in ``path``, compiling only if the closure is new"""
+        key = self.key(path)
+        entry_path = self._entry_path(path, key)
+        if entry_path.exists():
+            self.stats["hits"] += 1
+            with open(entry_path) as f:
+                return json.load(f)["contracts"]
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / f"{entry_path.stem}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # Another worker may have compiled it while we waited
+            if entry_path.exists():
+                self.stats["hits"] += 1
+                with open(entry_path) as f:
+                    return json.load(f)["contracts"]
+
+            artifacts = self.compile(path)
+            tmp_path = entry_path.with_name(f"{entry_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"key": key, "source": str(path), "contracts": artifacts}, f)
+            os.replace(tmp_path, entry_path)
+
+        for stale in self.root.glob(f"{Path(path).stem}-*.json"):
+            if stale != entry_path:
+                stale.unlink(missing_ok=True)
+        return artifacts
+
+    def contract(self, name: str, path: Optional[str] = None) -> Dict[str, Any]:
+        """Artifact of one contract, from ``contracts/<name>.sol`` unless ``path`` is given"""
+        candidates = [path] if path else [str(self.contracts_dir / f"{name}.sol")]
+        if not path:
+            candidates += sorted(str(p) for p in self.contracts_dir.glob("*.sol") if p.stem != name)
+        for candidate in candidates:
+            if Path(candidate).exists():
+                artifacts = self.get(candidate)
+                if name in artifacts:
+                    return artifacts[name]
+        raise KeyError(f"Contract {name} not found under {self.contracts_dir}")
+
+    def compile_all(self) -> Dict[str, Dict[str, Any]]:
+        """Artifacts of every contract in the contracts directory"""
+        artifacts = {}
+        for path in sorted(self.contracts_dir.glob("*.sol")):
+            artifacts.update(self.get(str(path)))
+        return artifacts
+
+    def storage_layout(self, name: str) -> Dict[str, Dict[str, Any]]:
+        """Storage layout of a contract in the STORAGE_LAYOUTS format"""
+        return layout_from_storage(self.contract(name).get("storageLayout") or {})
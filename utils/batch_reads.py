@@ -0,0 +1,148 @@
+"""
+Batched state reads over JSON-RPC
+
+View calls are encoded with brownie's ABI helpers and sent as JSON-RPC batch
+requests, so reading a mapping for thousands of accounts costs a handful of
+round trips instead of one per account. Results come back in request order.
+Non-HTTP providers, nodes that reject batches and the in-process backend fall
+back to ordinary sequential calls.
+"""
+from typing import Dict, List, Any, Iterable, Tuple
+from utils.rpc_metrics import get_rpc_metrics
+import json
+import time
+
+
+DEFAULT_BATCH_SIZE = 500
+BATCH_TIMEOUT = 30  # seconds, unless the provider configures its own
+
+
+def _ordered_results(responses: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+    """Batch responses may arrive in any order; put them back in request order"""
+    by_id = {response.get("id"): response for response in responses}
+    missing = [i for i in range(count) if i not in by_id]
+    if missing:
+        raise RuntimeError(f"Batch response is missing request ids {missing[:5]}")
+    return [by_id[i] for i in range(count)]
+
+
+def _post_batch(provider, body: str) -> Tuple[Any, int]:
+    """POST a batch to an HTTP provider's endpoint with its own request settings
+
+    Returns the decoded response and its size. The provider's request
+    kwargs (headers, auth, timeout) are reused; a timeout is always set so a
+    stalled node cannot hang the caller.
+    """
+    import requests
+
+    kwargs = dict(provider.get_request_kwargs()) if hasattr(provider, "get_request_kwargs") else {}
+    kwargs.setdefault("timeout", BATCH_TIMEOUT)
+    headers = dict(kwargs.pop("headers", None) or {})
+    headers["Content-Type"] = "application/json"
+
+    response = requests.post(provider.endpoint_uri, data=body, headers=headers, **kwargs)
+    response.raise_for_status()
+    return response.json(), len(response.content)
+
+
+def batch_request(w3, calls: List[Tuple[str, List[Any]]], batch_size: int = DEFAULT_BATCH_SIZE) -> List[Dict[str, Any]]:
+    """Send ``(method, params)`` requests in JSON-RPC batches; responses keep request order
+
+    Providers with native batching (``make_batch_request``) are used
+    directly; other HTTP providers get the batch posted to their endpoint.
+    """
+    provider = w3.provider
+    native = hasattr(provider, "make_batch_request")
+    endpoint_uri = str(getattr(provider, "endpoint_uri", "") or "")
+    if not native and not endpoint_uri.startswith("http"):
+        return [provider.make_request(method, params) for method, params in calls]
+
+    responses = []
+    for offset in range(0, len(calls), batch_size):
+        chunk = calls[offset:offset + batch_size]
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(chunk)
+        ]
+        body = json.dumps(payload)
+
+        start = time.perf_counter()
+        if native:
+            decoded = provider.make_batch_request([(method, params) for method, params in chunk])
+            # Native batches answer in request order; number them for _ordered_results
+            if isinstance(decoded, list):
+                decoded = [dict(item, id=i) for i, item in enumerate(decoded)]
+            response_bytes = len(json.dumps(decoded, default=str))
+        else:
+            decoded, response_bytes = _post_batch(provider, body)
+
+        # Batches are one request for many calls, so they are recorded here
+        methods = {method for method, _ in chunk}
+        label = methods.pop() if len(methods) == 1 else "mixed"
+        get_rpc_metrics().record(
+            f"batch:{label}", seconds=time.perf_counter() - start, error=not isinstance(decoded, list),
+            request_bytes=len(body), response_bytes=response_bytes,
+        )
+
+        if isinstance(decoded, list):
+            responses.extend(_ordered_results(decoded, len(chunk)))
+        else:
+            # The node rejected the batch as a whole
+            responses.extend(provider.make_request(method, params) for method, params in chunk)
+
+    return responses
+
+
+class BatchReader:
+    """Read many view-function results in a few round trips"""
+
+    def __init__(self, w3=None, backend=None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 block_identifier: str = "latest"):
+        if w3 is None:
+            if backend is not None:
+                w3 = backend.web3
+            else:
+                from brownie import network
+                w3 = network.web3
+        self.w3 = w3
+        self.batch_size = batch_size
+        self.block_identifier = block_identifier
+
+    def call_many(self, calls: Iterable[Tuple[Any, Tuple[Any, ...]]]) -> List[Any]:
+        """Results of ``(contract.view, args)`` pairs, in order"""
+        calls = list(calls)
+        batchable = self.w3 is not None and all(hasattr(method, "encode_input") for method, _ in calls)
+        if not batchable:
+            return [method(*args) for method, args in calls]
+
+        rpc_calls = [
+            ("eth_call", [{"to": method._address, "data": method.encode_input(*args)}, self.block_identifier])
+            for method, args in calls
+        ]
+        results = []
+        for (method, args), response in zip(calls, batch_request(self.w3, rpc_calls, self.batch_size)):
+            if "error" in response:
+                raise RuntimeError(f"{method._name}{tuple(args)} failed: {response['error']}")
+            results.append(method.decode_output(response["result"]))
+        return results
+
+    def read(self, method, keys: Iterable[Any]) -> List[Any]:
+        """``method(key)`` for every key, e.g. ``read(vault.balances, users)``"""
+        return self.call_many((method, key if isinstance(key, tuple) else (key,)) for key in keys)
+
+    def read_map(self, method, keys: Iterable[Any]) -> Dict[Any, Any]:
+        """Like ``read`` but keyed by the (stringified) key"""
+        keys = list(keys)
+        return dict(zip((str(key) for key in keys), self.read(method, keys)))
+
+    def ether_balances(self, addresses: Iterable[Any]) -> List[int]:
+        """Ether balances of many accounts or contracts"""
+        addresses = [str(address) for address in addresses]
+        if self.w3 is None:
+            raise RuntimeError("Ether balances need a JSON-RPC connection")
+        rpc_calls = [("eth_getBalance", [address, self.block_identifier]) for address in addresses]
+        responses = batch_request(self.w3, rpc_calls, self.batch_size)
+        for address, response in zip(addresses, responses):
+            if "error" in response:
+                raise RuntimeError(f"eth_getBalance({address}) failed: {response['error']}")
+        return [int(response["result"], 16) for response in responses]
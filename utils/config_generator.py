@@ -0,0 +1,197 @@
+"""
+Automatic ``test_config`` generation
+
+Builds the per-contract ``test_config`` that ``SecurityTestSuite.run_all_tests``
+expects from the compiled ABI, using function names and mutability, and
+optionally from the ``@dev VULNERABLE:`` / ``@dev SECURE:`` NatSpec comments in
+the contract source. Generated configs are cached on disk by the hash of the
+creation bytecode, so an unchanged contract is only inspected once.
+"""
+from typing import Dict, List, Any, Optional
+from pathlib import Path
+from eth_utils import keccak
+from utils.evm_backend import security_config
+import json
+import re
+
+
+# Bump when the rules change so cached configs are regenerated
+GENERATOR_VERSION = 1
+
+DEFAULT_CACHE_DIR = "reports/config_cache"
+
+DEFAULT_SETTINGS = {
+    "amount": 1000,
+    "large_input": 2**256 - 1,
+}
+
+# Function-list entries of test_config, in the order they are written
+FUNCTION_KEYS = [
+    "reentrancy_functions",
+    "overflow_functions",
+    "restricted_functions",
+    "gas_functions",
+    "oracle_functions",
+    "swap_functions",
+    "flash_loan_functions",
+]
+
+# Function names that suggest a category on their own
+NAME_PATTERNS = {
+    "reentrancy_functions": re.compile(r"^(withdraw|claim|refund|redeem|unstake|exit)", re.I),
+    "restricted_functions": re.compile(
+        r"^(mint|pause|unpause|set[A-Z]|update[A-Z]|emergency|transferOwnership|renounceOwnership"
+        r"|withdrawStuck|executeDelegate|upgrade|kill|destroy|grantRole|revokeRole|freeze)"
+    ),
+    "gas_functions": re.compile(r"(distribute|batch|ToAll|ForAll|^refundAll|airdrop)", re.I),
+    "oracle_functions": re.compile(r"(price|oracle|^rate|Rate$)", re.I),
+    "swap_functions": re.compile(r"^(swap|exchange|trade)", re.I),
+    "flash_loan_functions": re.compile(r"flash", re.I),
+}
+
+# NatSpec description keywords and the config entry they point at
+NATSPEC_KEYWORDS = [
+    ("reentrancy", "reentrancy_functions"),
+    ("overflow", "overflow_functions"),
+    ("underflow", "overflow_functions"),
+    ("access control", "restricted_functions"),
+    ("gas limit", "gas_functions"),
+    ("unbounded loop", "gas_functions"),
+    ("oracle", "oracle_functions"),
+    ("price manipulation", "oracle_functions"),
+    ("slippage", "swap_functions"),
+    ("flash loan", "flash_loan_functions"),
+]
+
+_NATSPEC_RE = re.compile(r"@dev\s+(VULNERABLE|SECURE):\s*([^\n]*)")
+_FUNCTION_RE = re.compile(r"\bfunction\s+(\w+)\s*\(")
+
+
+def _is_view(entry: Dict[str, Any]) -> bool:
+    return entry.get("stateMutability") in ("view", "pure") or entry.get("constant", False)
+
+
+def _has_uint_input(entry: Dict[str, Any]) -> bool:
+    return any(i["type"].startswith("uint") for i in entry.get("inputs", []))
+
+
+def _fits(key: str, entry: Dict[str, Any]) -> bool:
+    """Whether the tester behind ``key`` can exercise the function at all"""
+    if key == "oracle_functions":
+        return _is_view(entry)
+    if key == "overflow_functions":
+        return _has_uint_input(entry)
+    return not _is_view(entry)
+
+
+def parse_natspec(source: str) -> Dict[str, Dict[str, Any]]:
+    """Map function names to their ``VULNERABLE``/``SECURE`` annotation and categories"""
+    annotations = {}
+    for match in _NATSPEC_RE.finditer(source):
+        function = _FUNCTION_RE.search(source, match.end())
+        if function is None:
+            continue
+        # A later annotation before this function belongs to something else
+        following = _NATSPEC_RE.search(source, match.end())
+        if following is not None and following.start() < function.start():
+            continue
+
+        description = match.group(2).strip().rstrip("*/").strip()
+        lowered = description.lower()
+        annotations[function.group(1)] = {
+            "label": match.group(1),
+            "description": description,
+            "categories": sorted({key for keyword, key in NATSPEC_KEYWORDS if keyword in lowered}),
+        }
+    return annotations
+
+
+def generate_test_config(abi: List[Dict[str, Any]], source: Optional[str] = None,
+                         settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Build a ``test_config`` from an ABI and, if given, the contract source"""
+    functions = {}
+    for entry in abi:
+        if entry.get("type") == "function":
+            functions.setdefault(entry["name"], entry)
+
+    selected = {key: [] for key in FUNCTION_KEYS}
+
+    def add(key, name):
+        if name in functions and _fits(key, functions[name]) and name not in selected[key]:
+            selected[key].append(name)
+
+    for name, entry in functions.items():
+        for key, pattern in NAME_PATTERNS.items():
+            if pattern.search(name):
+                add(key, name)
+        # Pure arithmetic helpers are the overflow candidates the ABI reveals
+        if entry.get("stateMutability") == "pure" and _has_uint_input(entry):
+            add("overflow_functions", name)
+
+    annotations = parse_natspec(source) if source else {}
+    for name, annotation in annotations.items():
+        for key in annotation["categories"]:
+            add(key, name)
+
+    # Test the hardened twin (``withdraw`` / ``withdrawSecure``) alongside the original
+    for key in FUNCTION_KEYS:
+        for name in list(selected[key]):
+            add(key, f"{name}Secure")
+
+    config = dict(DEFAULT_SETTINGS)
+    config.update(selected)
+    if annotations:
+        config["natspec"] = {
+            label: sorted(name for name, a in annotations.items() if a["label"] == label and name in functions)
+            for label in ("VULNERABLE", "SECURE")
+        }
+    config.update(settings or {})
+    return config
+
+
+def bytecode_hash(bytecode: str) -> str:
+    """keccak of the creation bytecode's hex text (unlinked placeholders included)"""
+    return "0x" + keccak(text=bytecode).hex() if bytecode else ""
+
+
+class ConfigGenerator:
+    """Generate test configs for compiled contracts, cached by bytecode hash"""
+
+    def __init__(self, cache_dir: Optional[str] = None, use_natspec: bool = True):
+        self.cache_dir = Path(cache_dir or security_config().get("config_cache_dir") or DEFAULT_CACHE_DIR)
+        self.use_natspec = use_natspec
+        self.stats = {"hits": 0, "misses": 0}
+
+    def _cache_path(self, code_hash: str) -> Path:
+        suffix = "natspec" if self.use_natspec else "abi"
+        return self.cache_dir / f"{code_hash[2:]}-v{GENERATOR_VERSION}-{suffix}.json"
+
+    def for_artifact(self, artifact: Dict[str, Any]) -> Dict[str, Any]:
+        """Config for a brownie build artifact (``abi``, ``bytecode``, ``source``/``sourcePath``)"""
+        code_hash = bytecode_hash(artifact.get("bytecode", ""))
+        path = self._cache_path(code_hash) if code_hash else None
+        if path is not None and path.exists():
+            self.stats["hits"] += 1
+            with open(path) as f:
+                return json.load(f)
+        self.stats["misses"] += 1
+
+        source = None
+        if self.use_natspec:
+            source = artifact.get("source")
+            if source is None and artifact.get("sourcePath") and Path(artifact["sourcePath"]).exists():
+                source = Path(artifact["sourcePath"]).read_text()
+
+        config = generate_test_config(artifact["abi"], source)
+        if path is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(config, f, indent=2)
+        return config
+
+    def for_contract(self, contract) -> Dict[str, Any]:
+        """Config for a deployed contract; brownie contracts carry their build artifact"""
+        build = getattr(contract, "_build", None)
+        if build:
+            return self.for_artifact(build)
+        return generate_test_config(contract.abi)
@@ -0,0 +1,619 @@
+"""
+Execution backends for security testers
+
+``brownie`` sends everything over JSON-RPC to the active network.
+``pyevm`` executes deployments and calls directly in an in-process py-evm
+chain, exposing contract objects that mimic brownie's ``Contract`` interface
+so the same testers can run against either backend.
+"""
+from typing import Dict, List, Any, Optional
+from decimal import Decimal
+from brownie import network, accounts, config
+from eth_abi import encode, decode
+from eth_account import Account
+from eth_utils import keccak, to_canonical_address, to_checksum_address
+import os
+import rlp
+
+
+BACKEND_ENV_VAR = "SECURITY_BACKEND"
+DEFAULT_GAS_LIMIT = 12000000
+DEFAULT_BALANCE = 100 * 10**18
+DEFAULT_MNEMONIC = "test test test test test test test test test test test junk"
+
+WEI_UNITS = {
+    "wei": 1,
+    "gwei": 10**9,
+    "ether": 10**18,
+}
+
+# Error(string) selector used by require/revert messages
+REVERT_SELECTOR = bytes.fromhex("08c379a0")
+
+
+def get_backend(name: Optional[str] = None):
+    """Create the execution backend selected by argument, environment or config
+
+    Selection order: ``name``, the ``SECURITY_BACKEND`` environment variable,
+    then ``security.backend`` in brownie-config.yaml (default ``brownie``).
+    """
+    if name is None:
+        name = os.environ.get(BACKEND_ENV_VAR) or security_config().get("backend", "brownie")
+
+    if name == "brownie":
+        return BrownieBackend()
+    if name in ("pyevm", "py-evm"):
+        return InProcessEVMBackend()
+
+    raise ValueError(f"Unknown security backend: {name}")
+
+
+def security_config() -> Dict[str, Any]:
+    """Read the ``security`` section of brownie-config.yaml"""
+    try:
+        return dict(config.get("security") or {})
+    except Exception:
+        return {}
+
+
+def _network_settings() -> Dict[str, Any]:
+    """Read the development network settings from brownie-config.yaml"""
+    try:
+        return dict(config["networks"]["development"]["cmd_settings"])
+    except Exception:
+        return {}
+
+
+def block_gas_limit() -> int:
+    """Block gas limit of the development network from brownie-config.yaml"""
+    return int(_network_settings().get("gas_limit") or DEFAULT_GAS_LIMIT)
+
+
+def to_wei(value) -> int:
+    """Convert an int or a brownie-style string such as "10 ether" to wei"""
+    if isinstance(value, str):
+        amount, _, unit = value.strip().partition(" ")
+        return int(Decimal(amount) * WEI_UNITS[unit.strip() or "wei"])
+    return int(value)
+
+
+def abi_type(param: Dict[str, Any]) -> str:
+    """Return the canonical ABI type string for a function input/output"""
+    type_str = param["type"]
+    if type_str.startswith("tuple"):
+        inner = ",".join(abi_type(component) for component in param["components"])
+        return f"({inner}){type_str[5:]}"
+    return type_str
+
+
+def function_selector(abi: Dict[str, Any]) -> bytes:
+    """Return the 4-byte selector for an ABI function entry"""
+    signature = f"{abi['name']}({','.join(abi_type(i) for i in abi.get('inputs', []))})"
+    return keccak(text=signature)[:4]
+
+
+def decode_revert_message(output: bytes) -> str:
+    """Extract the revert string from Error(string) return data"""
+    if output[:4] == REVERT_SELECTOR:
+        try:
+            return decode(["string"], output[4:])[0]
+        except Exception:
+            pass
+    return ""
+
+
+def _normalize_arg(value):
+    """Convert accounts/contracts to addresses, recursively for arrays"""
+    if isinstance(value, (list, tuple)):
+        return [_normalize_arg(v) for v in value]
+    if hasattr(value, "address"):
+        return value.address
+    return value
+
+
+def _encode_args(types: List[str], args: List[Any]) -> bytes:
+    """ABI-encode arguments, accepting hex strings for bytes types like brownie does"""
+    values = _normalize_arg(list(args))
+    for i, (type_str, value) in enumerate(zip(types, values)):
+        if type_str.startswith("bytes") and isinstance(value, str):
+            values[i] = bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    return encode(types, values)
+
+
+class BrownieBackend:
+    """Backend running through brownie and the active network's JSON-RPC"""
+
+    name = "brownie"
+
+    def __init__(self):
+        self.web3 = network.web3
+        self.accounts = accounts
+
+    def deploy(self, container, *args):
+        """Deploy a brownie ContractContainer"""
+        return container.deploy(*args)
+
+
+class InProcessVMError(Exception):
+    """Raised when an in-process transaction or call reverts"""
+
+    def __init__(self, message: str, receipt=None):
+        super().__init__(message)
+        self.revert_msg = message
+        self.receipt = receipt
+
+
+class InProcessReceipt:
+    """Minimal stand-in for brownie's TransactionReceipt"""
+
+    def __init__(self, txid: str, sender: str, receiver: Optional[str], value: int,
+                 gas_limit: int, gas_price: int, gas_used: int, status: int,
+                 return_value=None, revert_msg: str = "", contract_address: Optional[str] = None):
+        self.txid = txid
+        self.sender = sender
+        self.receiver = receiver
+        self.value = value
+        self.gas_limit = gas_limit
+        self.gas_price = gas_price
+        self.gas_used = gas_used
+        self.status = status
+        self.return_value = return_value
+        self.revert_msg = revert_msg
+        self.contract_address = contract_address
+
+    def wait(self, confirmations: int = 1):
+        """Transactions are mined on submission"""
+        return self
+
+    def __repr__(self):
+        return f"<InProcessReceipt '{self.txid}'>"
+
+
+class InProcessAccount:
+    """Account with a local private key on the in-process chain"""
+
+    def __init__(self, backend, private_key: bytes):
+        self._backend = backend
+        self.private_key = private_key
+        self.address = Account.from_key(private_key).address
+
+    @property
+    def nonce(self) -> int:
+        return self._backend.get_nonce(self.address)
+
+    def balance(self) -> int:
+        return self._backend.get_balance(self.address)
+
+    def transfer(self, to, amount, gas_limit: Optional[int] = None) -> InProcessReceipt:
+        """Send ether to an address"""
+        return self._backend.send_transaction(self, _normalize_arg(to), value=to_wei(amount), gas=gas_limit)
+
+    def __eq__(self, other):
+        return str(self).lower() == str(other).lower()
+
+    def __hash__(self):
+        return hash(self.address.lower())
+
+    def __str__(self):
+        return self.address
+
+    def __repr__(self):
+        return f"<InProcessAccount '{self.address}'>"
+
+
+class InProcessContractMethod:
+    """Callable contract method mirroring brownie's ContractTx/ContractCall"""
+
+    def __init__(self, contract, abi: Dict[str, Any]):
+        self._contract = contract
+        self.abi = abi
+        self._name = abi["name"]
+        self.signature = "0x" + function_selector(abi).hex()
+        self._input_types = [abi_type(i) for i in abi.get("inputs", [])]
+        self._output_types = [abi_type(o) for o in abi.get("outputs", [])]
+
+    @property
+    def is_view(self) -> bool:
+        return self.abi.get("stateMutability") in ("view", "pure")
+
+    def __call__(self, *args):
+        if self.is_view:
+            return self.call(*args)
+        return self.transact(*args)
+
+    def _split_args(self, args):
+        """Separate positional arguments from a trailing tx dict"""
+        tx = {}
+        if args and isinstance(args[-1], dict):
+            args, tx = args[:-1], args[-1]
+        if len(args) != len(self._input_types):
+            raise ValueError(
+                f"{self._name} requires {len(self._input_types)} arguments, got {len(args)}"
+            )
+        return args, tx
+
+    def encode_input(self, *args) -> str:
+        """Encode calldata as a hex string"""
+        data = function_selector(self.abi) + _encode_args(self._input_types, args)
+        return "0x" + data.hex()
+
+    def decode_output(self, output) -> Any:
+        """Decode return data, unwrapping single values"""
+        if isinstance(output, str):
+            output = bytes.fromhex(output[2:] if output.startswith("0x") else output)
+        values = decode(self._output_types, output)
+        values = tuple(self._format_output(t, v) for t, v in zip(self._output_types, values))
+        if len(values) == 1:
+            return values[0]
+        return values
+
+    def _format_output(self, type_str: str, value):
+        if type_str == "address":
+            return to_checksum_address(value)
+        return value
+
+    def call(self, *args) -> Any:
+        """Evaluate without a transaction (eth_call semantics)"""
+        args, tx = self._split_args(args)
+        output = self._contract._backend.call(
+            tx.get("from"), self._contract.address, self.encode_input(*args), to_wei(tx.get("value", 0))
+        )
+        return self.decode_output(output)
+
+    def estimate_gas(self, *args) -> int:
+        """Estimate gas without a transaction"""
+        args, tx = self._split_args(args)
+        return self._contract._backend.estimate_gas(
+            tx.get("from"), self._contract.address, self.encode_input(*args), to_wei(tx.get("value", 0))
+        )
+
+    def transact(self, *args) -> InProcessReceipt:
+        """Execute as a mined transaction"""
+        args, tx = self._split_args(args)
+        receipt = self._contract._backend.send_transaction(
+            tx.get("from"),
+            self._contract.address,
+            data=self.encode_input(*args),
+            value=to_wei(tx.get("value", 0)),
+            gas=tx.get("gas_limit") or tx.get("gas"),
+        )
+        if receipt.return_value is not None and self._output_types:
+            receipt.return_value = self.decode_output(receipt.return_value)
+        else:
+            receipt.return_value = None
+        return receipt
+
+
+class InProcessContract:
+    """Deployed contract on the in-process chain with brownie-like methods"""
+
+    def __init__(self, backend, address: str, abi: List[Dict[str, Any]], name: str = "Contract"):
+        self._backend = backend
+        self._name = name
+        self.address = to_checksum_address(address)
+        self.abi = abi
+
+        for entry in abi:
+            if entry.get("type") == "function" and not hasattr(self, entry["name"]):
+                setattr(self, entry["name"], InProcessContractMethod(self, entry))
+
+    def balance(self) -> int:
+        return self._backend.get_balance(self.address)
+
+    def __str__(self):
+        return self.address
+
+    def __repr__(self):
+        return f"<{self._name} Contract '{self.address}' (in-process)>"
+
+
+class InProcessEVMBackend:
+    """Backend executing transactions in an in-process py-evm chain
+
+    Accounts are derived from the development mnemonic in brownie-config.yaml,
+    so they match the ganache accounts used by the brownie backend.
+    """
+
+    name = "pyevm"
+
+    def __init__(self, account_count: int = 10, balance: int = DEFAULT_BALANCE,
+                 gas_limit: Optional[int] = None, chain_id: int = 1337):
+        settings = _network_settings()
+        mnemonic = settings.get("mnemonic") or DEFAULT_MNEMONIC
+        if not isinstance(mnemonic, str):
+            mnemonic = DEFAULT_MNEMONIC
+
+        self.web3 = None
+        self.chain_id = chain_id
+        self.gas_limit = int(gas_limit or block_gas_limit())
+        self._snapshots = {}
+        self._next_snapshot_id = 1
+
+        Account.enable_unaudited_hdwallet_features()
+        keys = [
+            bytes(Account.from_mnemonic(mnemonic, account_path=f"m/44'/60'/0'/0/{i}").key)
+            for i in range(account_count)
+        ]
+        self._set_accounts(keys)
+
+        self.chain = self._build_chain({a.address: balance for a in self.accounts})
+
+    def _set_accounts(self, keys: List[bytes]):
+        self.accounts = [InProcessAccount(self, key) for key in keys]
+        self._accounts_by_address = {a.address.lower(): a for a in self.accounts}
+
+    def _chain_class(self):
+        from eth import constants
+        from eth.chains.base import MiningChain
+        from eth.vm.forks.paris import ParisVM
+
+        return MiningChain.configure(
+            __name__="SecurityTestChain",
+            vm_configuration=((constants.GENESIS_BLOCK_NUMBER, ParisVM),),
+            chain_id=self.chain_id,
+        )
+
+    def _build_chain(self, balances: Dict[str, int]):
+        """Create a Paris-fork mining chain with funded genesis accounts"""
+        from eth import constants
+        from eth.db.atomic import AtomicDB
+        from eth.db.backends.memory import MemoryDB
+
+        chain_class = self._chain_class()
+        genesis_params = {
+            "coinbase": constants.ZERO_ADDRESS,
+            "difficulty": 0,
+            "gas_limit": self.gas_limit,
+            "timestamp": 1,
+        }
+        genesis_state = {
+            to_canonical_address(address): {
+                "balance": amount,
+                "nonce": 0,
+                "code": b"",
+                "storage": {},
+            }
+            for address, amount in balances.items()
+        }
+
+        self._memory_db = MemoryDB()
+        return chain_class.from_genesis(AtomicDB(self._memory_db), genesis_params, genesis_state)
+
+    def _resolve_sender(self, sender) -> InProcessAccount:
+        """Map a sender (account, address or None) to a local account"""
+        if sender is None:
+            return self.accounts[0]
+        if isinstance(sender, InProcessAccount):
+            return sender
+        account = self._accounts_by_address.get(str(sender).lower())
+        if account is None:
+            raise ValueError(f"No private key for sender {sender}")
+        return account
+
+    @staticmethod
+    def _to_bytes(data) -> bytes:
+        if isinstance(data, str):
+            return bytes.fromhex(data[2:] if data.startswith("0x") else data)
+        return data or b""
+
+    def get_balance(self, address) -> int:
+        return self.chain.get_vm().state.get_balance(to_canonical_address(_normalize_arg(address)))
+
+    def get_nonce(self, address) -> int:
+        return self.chain.get_vm().state.get_nonce(to_canonical_address(_normalize_arg(address)))
+
+    def get_code(self, address) -> bytes:
+        return self.chain.get_vm().state.get_code(to_canonical_address(_normalize_arg(address)))
+
+    def get_storage_at(self, address, slot: int) -> int:
+        return self.chain.get_vm().state.get_storage(to_canonical_address(_normalize_arg(address)), slot)
+
+    def set_storage(self, address, slots: Dict[int, int]):
+        """Write storage slots directly into the pending state"""
+        state = self.chain.get_vm().state
+        canonical = to_canonical_address(_normalize_arg(address))
+        for slot, value in slots.items():
+            state.set_storage(canonical, slot, value)
+        self._commit_state(state)
+
+    def set_balance(self, address, balance: int):
+        """Overwrite an account's ether balance"""
+        state = self.chain.get_vm().state
+        state.set_balance(to_canonical_address(_normalize_arg(address)), balance)
+        self._commit_state(state)
+
+    def _commit_state(self, state):
+        """Persist a modified state and move the pending header onto its root"""
+        state.persist()
+        self.chain.header = self.chain.header.copy(state_root=state.state_root)
+
+    def send_transaction(self, sender, to: Optional[str], data=b"", value: int = 0,
+                         gas: Optional[int] = None) -> InProcessReceipt:
+        """Sign, apply and mine a transaction; raise InProcessVMError on revert"""
+        from eth_keys import keys
+
+        account = self._resolve_sender(sender)
+        data = self._to_bytes(data)
+        vm = self.chain.get_vm()
+        nonce = vm.state.get_nonce(to_canonical_address(account.address))
+        gas = int(gas or self.gas_limit)
+        gas_price = self.chain.header.base_fee_per_gas
+
+        unsigned = vm.create_unsigned_transaction(
+            nonce=nonce,
+            gas_price=gas_price,
+            gas=gas,
+            to=to_canonical_address(to) if to else b"",
+            value=value,
+            data=data,
+        )
+        signed = unsigned.as_signed_transaction(keys.PrivateKey(account.private_key), chain_id=self.chain_id)
+
+        _, receipt, computation = self.chain.apply_transaction(signed)
+        self.chain.mine_block()
+
+        contract_address = None
+        if not to:
+            contract_address = to_checksum_address(
+                keccak(rlp.encode([to_canonical_address(account.address), nonce]))[12:]
+            )
+
+        result = InProcessReceipt(
+            txid="0x" + signed.hash.hex(),
+            sender=account.address,
+            receiver=to_checksum_address(to) if to else None,
+            value=value,
+            gas_limit=gas,
+            gas_price=gas_price,
+            gas_used=receipt.gas_used,
+            status=0 if computation.is_error else 1,
+            return_value=None if computation.is_error else computation.output,
+            revert_msg=decode_revert_message(computation.output) if computation.is_error else "",
+            contract_address=contract_address,
+        )
+
+        if computation.is_error:
+            raise InProcessVMError(result.revert_msg or str(computation.error), result)
+
+        return result
+
+    def _apply_message(self, sender, to: str, data, value: int, gas: Optional[int] = None):
+        """Execute a message against a throwaway copy of the pending state"""
+        from eth.vm.message import Message
+
+        sender_address = to_canonical_address(str(_normalize_arg(sender or self.accounts[0])))
+        target = to_canonical_address(to)
+        state = self.chain.get_vm().state
+
+        message = Message(
+            gas=int(self.gas_limit if gas is None else gas),
+            to=target,
+            sender=sender_address,
+            value=value,
+            data=self._to_bytes(data),
+            code=state.get_code(target),
+        )
+        context = state.get_transaction_context_class()(gas_price=0, origin=sender_address)
+        return state.computation_class.apply_message(state, message, context)
+
+    def call(self, sender, to: str, data, value: int = 0) -> bytes:
+        """eth_call equivalent: execute without persisting state"""
+        computation = self._apply_message(sender, to, data, value)
+        if computation.is_error:
+            raise InProcessVMError(decode_revert_message(computation.output) or str(computation.error))
+        return computation.output
+
+    def estimate_gas(self, sender, to: str, data, value: int = 0) -> int:
+        """estimateGas equivalent: the smallest gas limit the call succeeds with
+
+        Gas used is only a lower bound: refunds are paid after execution, and
+        calls forward at most 63/64 of the remaining gas, so a transaction
+        can need more gas than it ends up using. Like the node, the limit is
+        searched for between the two.
+        """
+        data = self._to_bytes(data)
+        computation = self._apply_message(sender, to, data, value)
+        if computation.is_error:
+            raise InProcessVMError(decode_revert_message(computation.output) or str(computation.error))
+
+        intrinsic = 21000 + sum(4 if byte == 0 else 16 for byte in data)
+
+        def succeeds(limit):
+            return not self._apply_message(sender, to, data, value, gas=limit - intrinsic).is_error
+
+        # Execution gas before refunds is always needed; usually it is enough
+        low = intrinsic + computation.get_gas_used() - 1
+        high = intrinsic + self.gas_limit
+        if succeeds(low + 1):
+            return low + 1
+        while high - low > 1:
+            middle = (low + high) // 2
+            if succeeds(middle):
+                high = middle
+            else:
+                low = middle
+        return high
+
+    def deploy(self, container, *args) -> InProcessContract:
+        """Deploy from a brownie ContractContainer, a build artifact dict or a contract name
+
+        Names are compiled through the shared artifact store (utils/artifact_store.py).
+        """
+        tx = {}
+        if args and isinstance(args[-1], dict):
+            args, tx = args[:-1], args[-1]
+
+        if isinstance(container, str):
+            from utils.artifact_store import ArtifactStore
+            container = ArtifactStore().contract(container)
+
+        if isinstance(container, dict):
+            abi, bytecode = container["abi"], container["bytecode"]
+            name = container.get("contractName", "Contract")
+        else:
+            abi, bytecode = container.abi, container.bytecode
+            name = getattr(container, "_name", "Contract")
+
+        constructor = next((e for e in abi if e.get("type") == "constructor"), {"inputs": []})
+        data = self._to_bytes(bytecode) + _encode_args(
+            [abi_type(i) for i in constructor["inputs"]], args
+        )
+
+        receipt = self.send_transaction(tx.get("from"), None, data=data, value=to_wei(tx.get("value", 0)))
+        return InProcessContract(self, receipt.contract_address, abi, name)
+
+    def at(self, address: str, abi: List[Dict[str, Any]], name: str = "Contract") -> InProcessContract:
+        """Bind to an already deployed contract"""
+        return InProcessContract(self, address, abi, name)
+
+    def snapshot(self) -> int:
+        """Record the current chain head and return a snapshot id"""
+        snapshot_id = self._next_snapshot_id
+        self._next_snapshot_id += 1
+        self._snapshots[snapshot_id] = self.chain.header
+        return snapshot_id
+
+    def revert(self, snapshot_id: int):
+        """Restore the chain head recorded by ``snapshot``
+
+        The database is append-only, so pointing the pending header back at an
+        older state root is enough to restore every account and storage slot.
+        """
+        self.chain.header = self._snapshots[snapshot_id]
+
+    def export_state(self) -> Dict[str, Any]:
+        """Picklable copy of the chain (database, pending header, accounts)
+
+        Used to hand the current state to worker processes; see ``from_state``.
+        """
+        return {
+            "db": dict(self._memory_db.kv_store),
+            "header": rlp.encode(self.chain.header),
+            "header_class": type(self.chain.header),
+            "account_keys": [account.private_key for account in self.accounts],
+            "chain_id": self.chain_id,
+            "gas_limit": self.gas_limit,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "InProcessEVMBackend":
+        """Rebuild a backend from ``export_state``; it shares nothing with the original"""
+        from eth.db.atomic import AtomicDB
+        from eth.db.backends.memory import MemoryDB
+
+        backend = cls.__new__(cls)
+        backend.web3 = None
+        backend.chain_id = state["chain_id"]
+        backend.gas_limit = state["gas_limit"]
+        backend._snapshots = {}
+        backend._next_snapshot_id = 1
+        backend._set_accounts(state["account_keys"])
+
+        backend._memory_db = MemoryDB(dict(state["db"]))
+        header = rlp.decode(state["header"], sedes=state["header_class"])
+        backend.chain = backend._chain_class()(AtomicDB(backend._memory_db), header)
+        return backend
+
+    def fork(self) -> "InProcessEVMBackend":
+        """Independent copy of the current chain state"""
+        return InProcessEVMBackend.from_state(self.export_state())
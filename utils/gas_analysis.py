@@ -0,0 +1,153 @@
+"""
+Gas growth modelling for loop-heavy contract functions
+
+Instead of sending ever larger transactions, gas is measured at a handful of
+state/input sizes and a polynomial model of gas vs. N is fitted with NumPy.
+The model gives a complexity class per function and an extrapolated N at
+which the block gas limit is reached.
+"""
+from typing import Dict, List, Any, Optional, Callable, Sequence
+from utils.evm_backend import block_gas_limit
+from utils.security_helpers import GasLimitTester
+import json
+import numpy as np
+
+
+COMPLEXITY_CLASSES = {0: "O(1)", 1: "O(n)", 2: "O(n^2)"}
+
+DEFAULT_SIZES = (1, 2, 4, 8, 16, 32, 64)
+
+
+class GasGrowthProfiler:
+    """Fit gas-vs-size models and extrapolate block gas limit crossings"""
+
+    def __init__(self, gas_limit: Optional[int] = None, tolerance: float = 0.01):
+        self.gas_limit = gas_limit or block_gas_limit()
+        # Highest relative RMS error at which a lower-degree model is accepted
+        self.tolerance = tolerance
+        self.profiles = {}
+
+    def fit(self, sizes: Sequence[int], gas: Sequence[int]) -> Dict[str, Any]:
+        """Fit constant, linear and quadratic models and keep the simplest adequate one"""
+        x = np.asarray(sizes, dtype=float)
+        y = np.asarray(gas, dtype=float)
+
+        # Vandermonde matrices for all degrees at once, solved by least squares
+        max_degree = min(2, len(x) - 1)
+        fits = {}
+        for degree in range(max_degree + 1):
+            vander = np.vander(x, degree + 1)
+            coeffs, _, _, _ = np.linalg.lstsq(vander, y, rcond=None)
+            residuals = y - vander @ coeffs
+            relative_rms = float(np.sqrt(np.mean(residuals ** 2)) / max(np.mean(y), 1.0))
+            fits[degree] = (coeffs, relative_rms)
+
+        degree = next(
+            (d for d in sorted(fits) if fits[d][1] <= self.tolerance),
+            max_degree
+        )
+        coeffs, relative_rms = fits[degree]
+
+        return {
+            "degree": degree,
+            "complexity": COMPLEXITY_CLASSES[degree],
+            "coefficients": [float(c) for c in coeffs],
+            "relative_rms_error": relative_rms,
+            "limit_n": self.extrapolate_limit(coeffs),
+        }
+
+    def extrapolate_limit(self, coeffs: Sequence[float]) -> Optional[int]:
+        """Smallest positive N at which the model reaches the block gas limit"""
+        coeffs = np.asarray(coeffs, dtype=float)
+        if len(coeffs) < 2 or not np.any(coeffs[:-1] > 0):
+            return None
+
+        shifted = coeffs.copy()
+        shifted[-1] -= self.gas_limit
+        roots = np.roots(shifted)
+        crossings = [r.real for r in roots if abs(r.imag) < 1e-9 and r.real > 0]
+        if not crossings:
+            return None
+        return int(np.ceil(min(crossings)))
+
+    def profile(self, name: str, measure: Callable[[int], int],
+                sizes: Sequence[int] = DEFAULT_SIZES,
+                grow: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """Measure gas at each size and fit a model
+
+        ``grow(n)`` is called before measuring size ``n`` to bring the state
+        up to that size (sizes are visited in ascending order, so state can be
+        grown incrementally); ``measure(n)`` returns the gas for size ``n``.
+        """
+        print(f"Profiling gas growth of {name}")
+
+        measured_sizes = []
+        gas = []
+        for n in sorted(sizes):
+            if grow is not None:
+                grow(n)
+            try:
+                gas.append(int(measure(n)))
+                measured_sizes.append(n)
+            except Exception as e:
+                # Past the point where estimation succeeds; the model covers the rest
+                print(f"Measurement stopped at size {n}: {e}")
+                break
+
+        if len(measured_sizes) < 2:
+            raise ValueError(f"Need at least two gas measurements to model {name}")
+
+        profile = {
+            "sizes": measured_sizes,
+            "gas": gas,
+            "block_gas_limit": self.gas_limit,
+            **self.fit(measured_sizes, gas),
+        }
+        self.profiles[name] = profile
+        return profile
+
+    def profile_function(self, contract, function_name: str,
+                         sizes: Sequence[int] = DEFAULT_SIZES,
+                         grow: Optional[Callable[[int], None]] = None,
+                         arg_builder: Optional[Callable[[int], List[Any]]] = None,
+                         sender=None) -> Dict[str, Any]:
+        """Profile a contract function with estimateGas
+
+        Without ``arg_builder`` the first array (or uint) input is sized to N,
+        which suits functions like ``batchCancelListings``; state-driven loops
+        such as ``getFloorPrice`` pass ``grow`` instead.
+        """
+        func = getattr(contract, function_name)
+        tester = GasLimitTester()
+        sender = sender or tester.accounts[0]
+
+        if arg_builder is None:
+            if grow is None:
+                arg_builder = lambda n: tester.size_args(func.abi.get("inputs", []), n, sender)
+            else:
+                arg_builder = lambda n: tester.default_args(func.abi.get("inputs", []), sender)
+
+        contract_name = getattr(contract, "_name", type(contract).__name__)
+        return self.profile(
+            f"{contract_name}.{function_name}",
+            lambda n: func.estimate_gas(*arg_builder(n), {"from": sender}),
+            sizes,
+            grow,
+        )
+
+    def format_report(self) -> str:
+        """Render all profiles as a text table"""
+        lines = [
+            f"{'function':<40} {'class':<8} {'limit N':>10}  coefficients",
+            "-" * 80,
+        ]
+        for name, profile in self.profiles.items():
+            limit_n = profile["limit_n"] if profile["limit_n"] is not None else "-"
+            coeffs = ", ".join(f"{c:.1f}" for c in profile["coefficients"])
+            lines.append(f"{name:<40} {profile['complexity']:<8} {limit_n:>10}  [{coeffs}]")
+        return "\n".join(lines)
+
+    def save_report(self, path: str = "reports/gas_growth.json"):
+        """Write all profiles to JSON"""
+        with open(path, "w") as f:
+            json.dump(self.profiles, f, indent=2)
@@ -0,0 +1,330 @@
+"""
+Opcode, storage-slot and source-line gas profiler
+
+Transactions are traced with ``debug_traceTransaction`` (streamed, and reused
+from the trace cache) and every unit of gas is attributed to the opcode that
+spent it, the storage slot it touched and the source line it maps to through
+brownie's pcMap. Results aggregate across a test session into a sortable
+hot-spot report and a folded-stack file for flamegraph tools.
+"""
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
+from bisect import bisect_right
+from pathlib import Path
+from utils.state_builder import storage_layout
+from utils.trace_tools import stream_trace_ops, CALL_OPS
+from utils.trace_cache import TraceCache, runtime_code_hash, pre_state_id
+import csv
+import json
+
+
+# Calls that run the callee's code against the caller's storage
+DELEGATING_OPS = {"DELEGATECALL", "CALLCODE"}
+
+HOTSPOT_CATEGORIES = ("line", "opcode", "slot", "function")
+
+
+def iter_op_costs(ops: Iterable[Dict[str, Any]], root_address: str) -> Iterator[Tuple[Dict[str, Any], int, Dict[str, Any]]]:
+    """Yield ``(record, self_gas, frame)`` for every executed opcode
+
+    Self gas is the drop in remaining gas to the next opcode of the same
+    frame. For calls the gas spent inside the callee is subtracted, so every
+    unit of gas is counted exactly once; call opcodes are therefore yielded
+    when their callee returns. ``frame`` holds the code and storage address
+    the opcode ran against and the call sites leading to it.
+    """
+    root = {"code": root_address, "storage": root_address, "callers": [], "total": 0}
+    frames = [root]
+    pending_calls = []
+    previous = None
+
+    for record in ops:
+        if previous is not None:
+            yield from _settle(previous, record, frames, pending_calls)
+        previous = record
+
+    if previous is not None:
+        yield from _settle(previous, None, frames, pending_calls)
+
+
+def _settle(current: Dict[str, Any], following: Optional[Dict[str, Any]],
+            frames: List[Dict[str, Any]], pending_calls: List[Dict[str, Any]]):
+    """Attribute ``current`` now that the next opcode is known"""
+    frame = frames[-1]
+
+    if following is not None and following["depth"] > current["depth"]:
+        # Entering a callee: the call's own cost is known once it returns
+        op = current["op"]
+        code = current.get("to") if op in CALL_OPS else None
+        child = {
+            "code": code or "create",
+            "storage": frame["storage"] if op in DELEGATING_OPS else (code or "create"),
+            "callers": frame["callers"] + [(frame["code"], current["pc"])],
+            "total": 0,
+        }
+        pending_calls.append({"record": current, "frame": frame})
+        frames.append(child)
+        return
+
+    if following is None or following["depth"] < current["depth"]:
+        # Last opcode of the frame (RETURN/STOP/REVERT or a halt)
+        cost = current["gas_cost"]
+    else:
+        cost = current["gas"] - following["gas"]
+    frame["total"] += cost
+    yield current, cost, frame
+
+    if following is None:
+        return
+
+    # Unwind returned frames and settle the calls that created them
+    for _ in range(current["depth"] - following["depth"]):
+        child = frames.pop()
+        call = pending_calls.pop()
+        parent = call["frame"]
+        call_cost = call["record"]["gas"] - following["gas"] - child["total"]
+        parent["total"] += child["total"] + call_cost
+        yield call["record"], call_cost, parent
+
+
+class SourceMap:
+    """Map program counters to functions and source lines with a brownie build"""
+
+    def __init__(self, build: Dict[str, Any]):
+        self.name = build.get("contractName", "Contract")
+        self.pc_map = {int(pc): entry for pc, entry in (build.get("pcMap") or {}).items()}
+        self.paths = build.get("allSourcePaths") or {}
+        self._line_starts = {}
+
+    def lookup(self, pc: int) -> Tuple[Optional[str], Optional[str]]:
+        """Return ``(function, "path:line")`` for a program counter"""
+        entry = self.pc_map.get(pc)
+        if not entry:
+            return None, None
+
+        fn = entry.get("fn")
+        path, offset = entry.get("path"), entry.get("offset")
+        if path is None or not offset:
+            return fn, None
+
+        source_path = self.paths.get(str(path), path)
+        line = self._line(source_path, offset[0])
+        return fn, f"{source_path}:{line}" if line else source_path
+
+    def _line(self, path: str, offset: int) -> Optional[int]:
+        if path not in self._line_starts:
+            try:
+                text = Path(path).read_text()
+                self._line_starts[path] = [0] + [i + 1 for i, c in enumerate(text) if c == "\n"]
+            except OSError:
+                self._line_starts[path] = None
+
+        starts = self._line_starts[path]
+        return bisect_right(starts, offset) if starts else None
+
+
+def _deployed_contract(address: str):
+    """Find a contract deployed from a loaded brownie project by address"""
+    try:
+        from brownie import project
+        for loaded in project.get_loaded_projects():
+            for container in loaded:
+                for contract in container:
+                    if contract.address.lower() == address:
+                        return contract
+    except Exception:
+        pass
+    return None
+
+
+class GasProfiler:
+    """Attribute transaction gas to source lines, opcodes and storage slots"""
+
+    def __init__(self, w3=None, trace_cache: Optional[TraceCache] = None, use_cache: bool = True):
+        if w3 is None:
+            from brownie import network
+            w3 = network.web3
+        self.w3 = w3
+        self.trace_cache = trace_cache
+        self.use_cache = use_cache
+        self._source_maps = {}
+        self.transactions = {}
+        self.hotspots = {category: {} for category in HOTSPOT_CATEGORIES}
+        self.folded = {}
+
+    def register(self, contract):
+        """Use a contract's build for source mapping (contracts deployed from the loaded project are found automatically)"""
+        build = getattr(contract, "_build", None)
+        if build:
+            self._source_maps[contract.address.lower()] = SourceMap(build)
+
+    def _source_map(self, address: str) -> Optional[SourceMap]:
+        key = str(address).lower()
+        if key not in self._source_maps:
+            contract = _deployed_contract(key)
+            build = getattr(contract, "_build", None)
+            self._source_maps[key] = SourceMap(build) if build else None
+        return self._source_maps[key]
+
+    def _contract_name(self, address: str) -> str:
+        source_map = self._source_map(address) if address != "create" else None
+        return source_map.name if source_map else str(address)[:10]
+
+    def _trace(self, tx, address: str, analyze):
+        """Stream the transaction's trace into ``analyze``, via the trace cache"""
+        if not self.use_cache:
+            return analyze(stream_trace_ops(self.w3, tx.txid))
+
+        if self.trace_cache is None:
+            self.trace_cache = TraceCache()
+
+        key = TraceCache.key(
+            runtime_code_hash(self.w3, address),
+            tx.input,
+            pre_state_id(self.w3, tx.block_number - 1),
+            {"to": address, "from": str(tx.sender), "value": tx.value},
+        )
+        if not self.trace_cache.lookup(key):
+            self.trace_cache.put(key, stream_trace_ops(self.w3, tx.txid))
+        return analyze(self.trace_cache.iter(key))
+
+    def profile_transaction(self, tx, label: Optional[str] = None) -> Dict[str, Any]:
+        """Profile one mined transaction and add it to the session totals"""
+        address = tx.receiver or tx.contract_address
+        label = label or getattr(tx, "fn_name", None) or f"{self._contract_name(address)}.tx"
+        summary = self._trace(tx, address, lambda ops: self._attribute(ops, address))
+
+        summary["gas_used"] = tx.gas_used
+        # Intrinsic cost and refunds are not visible in the opcode trace
+        summary["intrinsic_and_refunds"] = tx.gas_used - summary["execution_gas"]
+        self.transactions.setdefault(label, []).append(summary)
+        return summary
+
+    def _attribute(self, ops: Iterable[Dict[str, Any]], address: str) -> Dict[str, Any]:
+        by_opcode = {}
+        by_slot = {}
+        execution_gas = 0
+
+        for record, cost, frame in iter_op_costs(ops, address):
+            execution_gas += cost
+            op = record["op"]
+            source_map = self._source_map(frame["code"]) if frame["code"] != "create" else None
+            fn, line = source_map.lookup(record["pc"]) if source_map else (None, None)
+            fn = fn or self._contract_name(frame["code"])
+
+            by_opcode[op] = by_opcode.get(op, 0) + cost
+            self._add("opcode", op, cost)
+            self._add("function", fn, cost)
+            if line:
+                self._add("line", line, cost, fn=fn)
+
+            if "slot" in record and op in ("SLOAD", "SSTORE"):
+                slot = self._slot_label(frame["storage"], record["slot"])
+                by_slot[slot] = by_slot.get(slot, 0) + cost
+                self._add("slot", slot, cost)
+
+            stack = [self._caller_label(code, pc) for code, pc in frame["callers"]]
+            folded_key = ";".join(stack + [fn, op])
+            self.folded[folded_key] = self.folded.get(folded_key, 0) + cost
+
+        return {"execution_gas": execution_gas, "by_opcode": by_opcode, "by_slot": by_slot}
+
+    def _caller_label(self, code: str, pc: int) -> str:
+        source_map = self._source_map(code) if code != "create" else None
+        fn = source_map.lookup(pc)[0] if source_map else None
+        return fn or self._contract_name(code)
+
+    def _slot_label(self, storage: str, slot: int) -> str:
+        """Name plain storage variables from the known layouts; hash slots stay hex"""
+        name = self._contract_name(storage)
+        for variable, info in storage_layout(name).items():
+            if info["type"] == "value" and info["slot"] == slot:
+                return f"{name}.{variable}"
+        return f"{name}[{hex(slot)}]"
+
+    def _add(self, category: str, key: str, cost: int, **extra):
+        entry = self.hotspots[category].setdefault(key, {"gas": 0, "count": 0, **extra})
+        entry["gas"] += cost
+        entry["count"] += 1
+
+    def hotspot_rows(self, category: str = "line", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Hot spots of one category, most expensive first"""
+        total = sum(e["gas"] for e in self.hotspots[category].values()) or 1
+        rows = [
+            {"category": category, "key": key, **entry, "share": entry["gas"] / total}
+            for key, entry in self.hotspots[category].items()
+        ]
+        rows.sort(key=lambda row: row["gas"], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def format_report(self, limit: int = 10) -> str:
+        """Render the top hot spots of every category as text"""
+        lines = ["⛽ Gas hot spots"]
+        for category in HOTSPOT_CATEGORIES:
+            rows = self.hotspot_rows(category, limit)
+            if not rows:
+                continue
+            lines.append(f"  by {category}:")
+            for row in rows:
+                lines.append(f"    {row['gas']:>10} gas {row['share']:>6.1%}  {row['key']}")
+        return "\n".join(lines)
+
+    def save(self, path: str):
+        """Write the raw session totals, to be combined later with ``load``"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({
+                "transactions": self.transactions,
+                "hotspots": self.hotspots,
+                "folded": self.folded,
+            }, f)
+
+    def load(self, path: str):
+        """Add totals written by ``save`` (e.g. by a parallel test job) to this profiler"""
+        with open(path) as f:
+            data = json.load(f)
+
+        for label, runs in data.get("transactions", {}).items():
+            self.transactions.setdefault(label, []).extend(runs)
+        for category, entries in data.get("hotspots", {}).items():
+            for key, entry in entries.items():
+                merged = self.hotspots[category].setdefault(key, {**entry, "gas": 0, "count": 0})
+                merged["gas"] += entry["gas"]
+                merged["count"] += entry["count"]
+        for stack, gas in data.get("folded", {}).items():
+            self.folded[stack] = self.folded.get(stack, 0) + gas
+
+    def save_reports(self, directory: str = "reports"):
+        """Write gas_hotspots.csv, gas_hotspots.md and gas_profile.folded"""
+        out = Path(directory)
+        out.mkdir(exist_ok=True)
+
+        rows = [row for category in HOTSPOT_CATEGORIES for row in self.hotspot_rows(category)]
+        with open(out / "gas_hotspots.csv", "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["category", "key", "gas", "count", "share", "fn"])
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({field: row.get(field, "") for field in writer.fieldnames})
+
+        sections = ["# Gas hot spots", ""]
+        for category in HOTSPOT_CATEGORIES:
+            category_rows = self.hotspot_rows(category, 25)
+            if not category_rows:
+                continue
+            sections += [f"## By {category}", "", "| gas | share | count | " + category + " |", "|---:|---:|---:|---|"]
+            sections += [
+                f"| {row['gas']} | {row['share']:.1%} | {row['count']} | `{row['key']}` |"
+                for row in category_rows
+            ]
+            sections.append("")
+        sections += ["## Transactions", "", "| transaction | runs | gas used | execution gas |", "|---|---:|---:|---:|"]
+        for label, runs in self.transactions.items():
+            sections.append(
+                f"| {label} | {len(runs)} | {runs[-1]['gas_used']} | {runs[-1]['execution_gas']} |"
+            )
+        with open(out / "gas_hotspots.md", "w") as f:
+            f.write("\n".join(sections) + "\n")
+
+        with open(out / "gas_profile.folded", "w") as f:
+            for stack, gas in sorted(self.folded.items()):
+                if gas > 0:
+                    f.write(f"{stack} {gas}\n")
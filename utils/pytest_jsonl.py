@@ -0,0 +1,158 @@
+"""
+pytest plugin writing per-test results as JSON lines
+
+Enabled by ``PYTEST_JSONL_FILE`` (registered from tests/conftest.py). Every
+test result is written and flushed as soon as pytest reports it, followed by
+a ``summary`` line at the end of the session, so a runner can follow the file
+while the tests are still running:
+
+    {"event": "test", "nodeid": "...", "outcome": "passed", "when": "call", "duration": 0.41}
+    {"event": "summary", "exit_code": 0, "passed": 12, "failed": 0, "skipped": 1, "seconds": 8.2}
+"""
+from typing import Dict, List, Any, Optional
+from pathlib import Path
+import json
+import os
+import time
+
+
+JSONL_ENV_VAR = "PYTEST_JSONL_FILE"
+
+# Failure text kept per test; the full traceback is in the terminal output
+LONGREPR_CHARS = 4000
+
+# A test reported more than once (a passing call, then a failing teardown)
+# counts with its worst outcome
+OUTCOME_RANK = {"passed": 0, "skipped": 1, "failed": 2}
+
+
+def result_event(report) -> Optional[Dict[str, Any]]:
+    """One result event for a ``pytest_runtest_logreport`` report, or None for passing setup/teardown"""
+    if report.when != "call" and report.passed:
+        return None
+    event = {
+        "event": "test",
+        "nodeid": report.nodeid,
+        "outcome": report.outcome,
+        "when": report.when,
+        "duration": round(report.duration, 4),
+    }
+    if report.failed:
+        event["longrepr"] = str(report.longrepr)[-LONGREPR_CHARS:]
+    return event
+
+
+class OutcomeCounter:
+    """One outcome per test, however many phases reported it"""
+
+    def __init__(self):
+        self.outcomes: Dict[str, str] = {}
+
+    def add(self, nodeid: str, outcome: str):
+        previous = self.outcomes.get(nodeid)
+        if previous is None or OUTCOME_RANK.get(outcome, 0) > OUTCOME_RANK.get(previous, 0):
+            self.outcomes[nodeid] = outcome
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        counts = {"passed": 0, "failed": 0, "skipped": 0}
+        for outcome in self.outcomes.values():
+            counts[outcome] = counts.get(outcome, 0) + 1
+        return counts
+
+
+class JsonlReporter:
+    """Append result events to a JSONL file as they happen"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, "w", buffering=1)
+        self.outcomes = OutcomeCounter()
+        self.start = time.perf_counter()
+
+    def _write(self, event: Dict[str, Any]):
+        self.file.write(json.dumps(event, default=str) + "\n")
+
+    def pytest_runtest_logreport(self, report):
+        event = result_event(report)
+        if event is not None:
+            self.outcomes.add(report.nodeid, report.outcome)
+            self._write(event)
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self._write({"event": "collect_error", "nodeid": report.nodeid,
+                         "longrepr": str(report.longrepr)[-LONGREPR_CHARS:]})
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        self._write({
+            "event": "summary",
+            "exit_code": int(exitstatus),
+            **self.outcomes.counts,
+            "seconds": round(time.perf_counter() - self.start, 3),
+        })
+
+    def pytest_unconfigure(self, config):
+        self.file.close()
+
+
+def pytest_configure(config):
+    path = os.environ.get(JSONL_ENV_VAR)
+    if path and not config.pluginmanager.has_plugin("jsonl-reporter"):
+        config.pluginmanager.register(JsonlReporter(path), "jsonl-reporter")
+
+
+class JsonlFollower:
+    """Read the events appended to a JSONL file since the last call"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.offset = 0
+        self.partial = ""
+
+    def read(self) -> List[Dict[str, Any]]:
+        """New complete events; a line still being written is kept for the next call"""
+        try:
+            with open(self.path) as f:
+                f.seek(self.offset)
+                data = f.read()
+                self.offset = f.tell()
+        except OSError:
+            return []
+
+        lines = (self.partial + data).split("\n")
+        self.partial = lines.pop()
+        events = []
+        for line in lines:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+        return events
+
+
+def summarize_tests(events: List[Dict[str, Any]], slowest: int = 10) -> Dict[str, Any]:
+    """Counts, total test time and the slowest tests from result events
+
+    Tests are counted once each; a failing phase is listed under failures.
+    """
+    tests = [event for event in events if event.get("event") == "test"]
+    outcomes = OutcomeCounter()
+    durations: Dict[str, float] = {}
+    for event in tests:
+        outcomes.add(event["nodeid"], event["outcome"])
+        durations[event["nodeid"]] = durations.get(event["nodeid"], 0) + event["duration"]
+    return {
+        **outcomes.counts,
+        "collect_errors": sum(1 for event in events if event.get("event") == "collect_error"),
+        "test_seconds": round(sum(durations.values()), 3),
+        "slowest": [
+            {"nodeid": nodeid, "duration": round(duration, 4)}
+            for nodeid, duration in sorted(durations.items(), key=lambda item: item[1], reverse=True)[:slowest]
+        ],
+        "failures": [
+            {"nodeid": event["nodeid"], "when": event["when"], "longrepr": event.get("longrepr", "")}
+            for event in tests if event["outcome"] == "failed"
+        ],
+    }
@@ -0,0 +1,122 @@
+"""
+Content-addressed cache of tester results
+
+Each tester category's findings for a contract are stored under a key made
+of the contract's runtime bytecode hash, the hash of the category's effective
+``test_config`` and the tester version (see ``TesterSpec.fingerprint``). An
+unchanged contract scanned with an unchanged config and tester reuses its
+stored report instead of running again; changing any of the three is a miss.
+Entries are plain JSON files, removed with ``scripts/cache_admin.py clear``.
+"""
+from typing import Dict, List, Any, Optional
+from pathlib import Path
+from eth_utils import keccak
+from utils.evm_backend import security_config
+import hashlib
+import json
+import os
+import time
+
+
+DEFAULT_CACHE_DIR = "reports/result_cache"
+
+# Report entries recomputed from the findings on every hit
+DERIVED_FIELDS = ("total_vulnerabilities", "vulnerabilities", "severity_counts")
+
+
+def contract_code_hash(backend, address: str) -> str:
+    """keccak of the runtime bytecode at ``address`` on either backend"""
+    if hasattr(backend, "get_code"):
+        code = backend.get_code(address)
+    else:
+        code = backend.web3.eth.get_code(address)
+    return "0x" + keccak(bytes(code)).hex()
+
+
+def config_hash(test_config: Dict[str, Any]) -> str:
+    """Stable hash of a (JSON-serialisable) test config"""
+    material = json.dumps(test_config, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class ResultCache:
+    """One JSON file per (bytecode, config, tester version) result"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or security_config().get("result_cache_dir") or DEFAULT_CACHE_DIR)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+
+    @staticmethod
+    def key(code_hash: str, test_config: Dict[str, Any], tester: str, tester_version: str) -> str:
+        material = json.dumps([code_hash, config_hash(test_config), tester, tester_version])
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached entry, or None"""
+        try:
+            with open(self._path(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return entry
+
+    def put(self, key: str, report: Dict[str, Any], findings: List[Dict[str, Any]], **metadata):
+        """Store a category report; ``findings`` are those raised by this run only"""
+        entry = {
+            **metadata,
+            "created": time.time(),
+            "findings": findings,
+            "report": {k: v for k, v in report.items() if k not in DERIVED_FIELDS},
+        }
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f, default=str)
+        os.replace(tmp_path, path)
+        self.stats["writes"] += 1
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Metadata of every stored entry"""
+        entries = []
+        for path in sorted(self.root.glob("*.json")):
+            try:
+                with open(path) as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            entries.append({
+                "key": path.stem,
+                "contract": entry.get("contract"),
+                "tester": entry.get("tester"),
+                "code_hash": entry.get("code_hash"),
+                "findings": len(entry.get("findings", [])),
+                "created": entry.get("created"),
+                "bytes": path.stat().st_size,
+            })
+        return entries
+
+    def clear(self, contract: Optional[str] = None, tester: Optional[str] = None,
+              code_hash: Optional[str] = None) -> int:
+        """Invalidate matching entries (all of them without filters); returns the count removed"""
+        removed = 0
+        for entry in self.entries():
+            if contract and entry["contract"] != contract:
+                continue
+            if tester and entry["tester"] != tester:
+                continue
+            if code_hash and entry["code_hash"] != code_hash:
+                continue
+            self._path(entry["key"]).unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters plus current size"""
+        return {**self.stats, "entries": len(list(self.root.glob("*.json"))),
+                "bytes": sum(p.stat().st_size for p in self.root.glob("*.json"))}
@@ -0,0 +1,221 @@
+"""
+JSON-RPC call instrumentation
+
+Wraps the provider of a web3 instance (brownie's ``network.web3`` by default)
+so every request is counted with its size and latency, per RPC method and per
+active scope. Scopes are named regions such as a tester, a pytest test or a
+deployment step; they nest, and a call is recorded in every scope active at
+the time. The wrapper sits below web3's middleware stack, so requests sent
+straight to ``w3.provider.make_request`` (snapshots, traces) are counted too.
+
+Testers probe from thread pools while a scope is open, so the counters and
+the scope list are shared by every thread and guarded by one lock.
+"""
+from typing import Dict, Any, Optional, Iterable
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import threading
+import time
+
+
+STAT_FIELDS = ("calls", "errors", "request_bytes", "response_bytes", "seconds")
+
+
+def _new_stats() -> Dict[str, Any]:
+    return {"calls": 0, "errors": 0, "request_bytes": 0, "response_bytes": 0, "seconds": 0.0}
+
+
+def _size(payload) -> int:
+    """Approximate wire size of a JSON payload"""
+    try:
+        return len(json.dumps(payload, separators=(",", ":"), default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _add_stats(target: Dict[str, Any], stats: Dict[str, Any]):
+    for field in STAT_FIELDS:
+        target[field] += stats.get(field, 0)
+
+
+def _totals(by_method: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    totals = _new_stats()
+    for stats in by_method.values():
+        _add_stats(totals, stats)
+    return totals
+
+
+class RPCMetrics:
+    """Counters for JSON-RPC traffic by method and by scope"""
+
+    def __init__(self, measure_bytes: bool = True):
+        # Sizes are measured by re-serialising payloads; disable for very large traces
+        self.measure_bytes = measure_bytes
+        self.by_method = {}
+        self.by_scope = {}
+        self._scopes = []
+        self._installed = {}
+        self._lock = threading.Lock()
+
+    def install(self, w3=None) -> "RPCMetrics":
+        """Start counting requests made through ``w3`` (idempotent)"""
+        if w3 is None:
+            from brownie import network
+            w3 = network.web3
+        provider = getattr(w3, "provider", None)
+        if provider is None or id(provider) in self._installed:
+            return self
+
+        original = provider.make_request
+
+        def make_request(method, params):
+            start = time.perf_counter()
+            try:
+                response = original(method, params)
+            except Exception:
+                self.record(method, params, None, time.perf_counter() - start, error=True)
+                raise
+            error = isinstance(response, dict) and "error" in response
+            self.record(method, params, response, time.perf_counter() - start, error=error)
+            return response
+
+        provider.make_request = make_request
+        # web3 caches the middleware chain around the bound make_request; rebuild it
+        if hasattr(provider, "_request_func_cache"):
+            provider._request_func_cache = (None, None)
+        self._installed[id(provider)] = (provider, original)
+        return self
+
+    def uninstall(self):
+        """Restore every instrumented provider"""
+        for provider, original in self._installed.values():
+            provider.make_request = original
+            if hasattr(provider, "_request_func_cache"):
+                provider._request_func_cache = (None, None)
+        self._installed.clear()
+
+    def record(self, method: str, params=None, response=None, seconds: float = 0.0, error: bool = False,
+               request_bytes: Optional[int] = None, response_bytes: Optional[int] = None):
+        """Count one request; sizes are measured from the payloads unless given"""
+        if request_bytes is None:
+            request_bytes = _size(params) if self.measure_bytes else 0
+        if response_bytes is None:
+            response_bytes = _size(response) if self.measure_bytes and response is not None else 0
+
+        call = {
+            "calls": 1,
+            "errors": int(error),
+            "request_bytes": request_bytes,
+            "response_bytes": response_bytes,
+            "seconds": seconds,
+        }
+        with self._lock:
+            _add_stats(self.by_method.setdefault(method, _new_stats()), call)
+            for scope in self._scopes:
+                _add_stats(self.by_scope[scope].setdefault(method, _new_stats()), call)
+
+    @contextmanager
+    def scope(self, name: str):
+        """Attribute the calls made inside the block to ``name`` as well"""
+        with self._lock:
+            self.by_scope.setdefault(name, {})
+            self._scopes.append(name)
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._scopes.remove(name)
+
+    def totals(self, scope: Optional[str] = None) -> Dict[str, Any]:
+        """Summed counters for the whole session or one scope"""
+        return _totals(self.by_scope.get(scope, {}) if scope else self.by_method)
+
+    def reset(self):
+        with self._lock:
+            self.by_method = {}
+            self.by_scope = {name: {} for name in self._scopes}
+
+    def get_report(self) -> Dict[str, Any]:
+        """Counters as a JSON-serialisable dict (a copy, safe while calls are counted)"""
+        with self._lock:
+            by_method = {method: dict(stats) for method, stats in self.by_method.items()}
+            by_scope = {
+                name: {method: dict(stats) for method, stats in methods.items()}
+                for name, methods in self.by_scope.items()
+            }
+        return {
+            "totals": _totals(by_method),
+            "by_method": by_method,
+            "by_scope": {
+                name: {"totals": _totals(methods), "by_method": methods}
+                for name, methods in by_scope.items()
+            },
+        }
+
+    def format_report(self, limit: int = 10) -> str:
+        """Render the busiest methods and scopes as text"""
+        return format_rpc_report(self.get_report(), limit)
+
+    def save(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.get_report(), f, indent=2)
+
+
+def format_rpc_report(report: Dict[str, Any], limit: int = 10) -> str:
+    """Text summary of a report produced by ``get_report`` or ``merge_rpc_reports``"""
+    totals = report["totals"]
+    lines = [
+        f"📡 RPC calls: {totals['calls']} ({totals['errors']} errors), "
+        f"{totals['request_bytes'] + totals['response_bytes']} bytes, {totals['seconds']:.3f}s"
+    ]
+
+    methods = sorted(report["by_method"].items(), key=lambda item: item[1]["seconds"], reverse=True)
+    if methods:
+        lines.append("  by method:")
+        for method, stats in methods[:limit]:
+            lines.append(f"    {stats['calls']:>7} calls {stats['seconds']:>9.3f}s  {method}")
+
+    scopes = sorted(report["by_scope"].items(), key=lambda item: item[1]["totals"]["seconds"], reverse=True)
+    if scopes:
+        lines.append("  by scope:")
+        for name, scope in scopes[:limit]:
+            stats = scope["totals"]
+            lines.append(f"    {stats['calls']:>7} calls {stats['seconds']:>9.3f}s  {name}")
+
+    return "\n".join(lines)
+
+
+def merge_rpc_reports(reports: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine reports from several processes (e.g. parallel test jobs)"""
+    by_method = {}
+    by_scope = {}
+
+    for report in reports:
+        for method, stats in report.get("by_method", {}).items():
+            _add_stats(by_method.setdefault(method, _new_stats()), stats)
+        for name, scope in report.get("by_scope", {}).items():
+            merged = by_scope.setdefault(name, {})
+            for method, stats in scope.get("by_method", {}).items():
+                _add_stats(merged.setdefault(method, _new_stats()), stats)
+
+    return {
+        "totals": _totals(by_method),
+        "by_method": by_method,
+        "by_scope": {
+            name: {"totals": _totals(methods), "by_method": methods}
+            for name, methods in sorted(by_scope.items())
+        },
+    }
+
+
+_metrics: Optional[RPCMetrics] = None
+
+
+def get_rpc_metrics() -> RPCMetrics:
+    """Process-wide metrics shared by testers, fixtures and scripts"""
+    global _metrics
+    if _metrics is None:
+        _metrics = RPCMetrics()
+    return _metrics
@@ -0,0 +1,152 @@
+"""
+Incremental, per-contract Slither scanning
+
+Every file in contracts/ is analysed by its own ``slither`` process, several
+at a time. Results are cached under the hash of the file together with every
+file it imports (OpenZeppelin sources resolved through the brownie
+remappings), the Slither version and the compiler settings, so only contracts
+whose source closure changed are rescanned. The per-contract detector lists
+are merged, without duplicates from shared imports, into one report in the
+same shape as ``slither contracts/ --json``.
+"""
+from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from utils.evm_backend import security_config
+from utils.artifact_store import ArtifactStore, closure_hash, compiler_settings, resolve_remappings
+import json
+import os
+import subprocess
+import time
+
+
+DEFAULT_CACHE_DIR = "reports/slither_cache"
+DEFAULT_TIMEOUT = 120
+
+
+def slither_version() -> Optional[str]:
+    try:
+        return subprocess.run(["slither", "--version"], capture_output=True, text=True, timeout=60).stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+
+def run_slither(path: str, remappings: Dict[str, Path], timeout: int = DEFAULT_TIMEOUT,
+                solc: Optional[str] = None) -> Dict[str, Any]:
+    """Run Slither on one file; returns its parsed ``--json`` output"""
+    cmd = ["slither", path, "--json", "-"]
+    if solc:
+        cmd.extend(["--solc", solc])
+    if remappings:
+        cmd.extend(["--solc-remaps", " ".join(f"{prefix}={target}" for prefix, target in remappings.items())])
+
+    # Slither exits non-zero when it finds issues, so the JSON decides success
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    try:
+        output = json.loads(result.stdout)
+    except ValueError:
+        return {"success": False, "error": result.stderr.strip()[-2000:] or f"exit code {result.returncode}"}
+    return output
+
+
+def _finding_id(detector: Dict[str, Any]) -> Any:
+    return detector.get("id") or (detector.get("check", ""), detector.get("description", ""))
+
+
+def merge_detectors(reports: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Detector results of every contract, each finding once"""
+    merged = {}
+    for name in sorted(reports):
+        for detector in reports[name].get("results", {}).get("detectors", []):
+            merged.setdefault(_finding_id(detector), detector)
+    return list(merged.values())
+
+
+class SlitherScanner:
+    """Scan contract files in parallel, reusing results for unchanged source closures"""
+
+    def __init__(self, cache_dir: Optional[str] = None, workers: Optional[int] = None,
+                 timeout: Optional[int] = None, remappings: Optional[List[str]] = None):
+        settings = security_config()
+        self.cache_dir = Path(cache_dir or settings.get("slither_cache_dir") or DEFAULT_CACHE_DIR)
+        self.workers = workers or settings.get("slither_workers") or os.cpu_count()
+        self.timeout = timeout or settings.get("slither_timeout") or DEFAULT_TIMEOUT
+        self.remappings = resolve_remappings(remappings)
+        self.solc = None
+        self.stats = {"hits": 0, "misses": 0, "errors": 0}
+
+    def _cache_path(self, path: str, digest: str) -> Path:
+        return self.cache_dir / f"{Path(path).stem}-{digest[:16]}.json"
+
+    def _scan_one(self, path: str, digest: str) -> Dict[str, Any]:
+        cache_path = self._cache_path(path, digest)
+        if cache_path.exists():
+            with open(cache_path) as f:
+                return {**json.load(f), "cached": True}
+
+        start = time.perf_counter()
+        try:
+            output = run_slither(path, self.remappings, self.timeout, self.solc)
+        except subprocess.TimeoutExpired:
+            output = {"success": False, "error": f"timed out after {self.timeout}s"}
+        output["seconds"] = round(time.perf_counter() - start, 3)
+
+        # Failures are not cached, so the next run retries them
+        if output.get("success"):
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(output, f)
+            os.replace(tmp_path, cache_path)
+            for stale in self.cache_dir.glob(f"{Path(path).stem}-*.json"):
+                if stale != cache_path:
+                    stale.unlink(missing_ok=True)
+        return {**output, "cached": False}
+
+    def scan(self, paths: List[str]) -> Dict[str, Any]:
+        """Scan ``paths``; returns the merged report with a per-contract summary"""
+        version = slither_version()
+        if version is None:
+            raise FileNotFoundError("slither")
+        extra = {"slither": version, "solc": compiler_settings()}
+        try:
+            # Same pinned compiler binary as the artifact store, never solc-select's default
+            self.solc = ArtifactStore().solc_executable()
+        except Exception as e:
+            print(f"⚠️  Using Slither's default solc: {e}")
+        digests = {path: closure_hash(path, extra, self.remappings) for path in paths}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {path: executor.submit(self._scan_one, path, digests[path]) for path in paths}
+            reports = {}
+            for path, future in futures.items():
+                try:
+                    reports[path] = future.result()
+                except Exception as e:
+                    reports[path] = {"success": False, "error": str(e), "cached": False}
+
+        contracts = {}
+        for path, report in reports.items():
+            if report["cached"]:
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
+            if not report.get("success"):
+                self.stats["errors"] += 1
+            contracts[path] = {
+                "source_hash": digests[path],
+                "cached": report["cached"],
+                "success": bool(report.get("success")),
+                "error": report.get("error"),
+                "detectors": len(report.get("results", {}).get("detectors", [])),
+                "seconds": report.get("seconds"),
+            }
+
+        successful = {path: report for path, report in reports.items() if report.get("success")}
+        return {
+            "success": len(successful) == len(reports),
+            "error": None if len(successful) == len(reports) else "some contracts could not be analysed",
+            "results": {"detectors": merge_detectors(successful)},
+            "contracts": contracts,
+            "cache": dict(self.stats),
+        }
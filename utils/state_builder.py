@@ -0,0 +1,234 @@
+"""
+Storage-injection state builder for large-scale scenarios
+
+Instead of sending one transaction per depositor, mapping and array slots
+are computed from the Solidity storage layout and written directly into the
+node (batched ganache/hardhat/anvil set-storage RPCs) or the in-process EVM. A vault
+with 10,000 depositors is built in a handful of writes instead of 10,000
+deposits, then checked by reading back through the contract's view functions.
+"""
+from typing import Dict, List, Any, Optional
+from eth_utils import keccak, to_canonical_address
+from utils.batch_reads import BatchReader, batch_request
+from utils.artifact_store import ArtifactStore
+import random
+
+
+# Solidity storage layouts (slot numbers follow declaration order, with
+# ReentrancyGuard._status and Ownable._owner first for the OpenZeppelin-based
+# contracts). "struct_size" is the number of slots per mapping/array element.
+STORAGE_LAYOUTS = {
+    "VulnerableVault": {
+        "balances": {"slot": 0, "type": "mapping"},
+        "depositTimes": {"slot": 1, "type": "mapping"},
+        "totalDeposits": {"slot": 2, "type": "value"},
+        "owner": {"slot": 3, "type": "value"},
+    },
+    "SecureVault": {
+        "balances": {"slot": 2, "type": "mapping"},
+        "depositTimes": {"slot": 3, "type": "mapping"},
+        "frozen": {"slot": 4, "type": "mapping"},
+        "totalDeposits": {"slot": 5, "type": "value"},
+        "owner": {"slot": 6, "type": "value"},
+        "dailyWithdrawn": {"slot": 7, "type": "mapping"},
+        "lastWithdrawalDay": {"slot": 8, "type": "mapping"},
+    },
+    "AuctionContract": {
+        "auctions": {"slot": 2, "type": "mapping", "struct_size": 8},
+        "pendingReturns": {"slot": 3, "type": "mapping"},
+        "nextAuctionId": {"slot": 5, "type": "value"},
+    },
+    "DeFiPool": {
+        "userInfo": {"slot": 4, "type": "mapping", "struct_size": 4},
+        "stakers": {"slot": 5, "type": "array"},
+        "totalStaked": {"slot": 6, "type": "value"},
+    },
+}
+
+_compiled_layouts = {}
+
+
+def storage_layout(name: str) -> Dict[str, Dict[str, Any]]:
+    """Layout of a contract: the table above, else solc's storageLayout from the artifact store
+
+    Returns an empty layout when the contract is unknown or cannot be compiled.
+    """
+    if name in STORAGE_LAYOUTS:
+        return STORAGE_LAYOUTS[name]
+    if name not in _compiled_layouts:
+        try:
+            _compiled_layouts[name] = ArtifactStore().storage_layout(name)
+        except Exception:
+            _compiled_layouts[name] = {}
+    return _compiled_layouts[name]
+
+
+# Set-storage / set-balance RPC methods, tried in order until one is supported
+SET_STORAGE_METHODS = ["evm_setAccountStorageAt", "hardhat_setStorageAt", "anvil_setStorageAt"]
+SET_BALANCE_METHODS = ["evm_setAccountBalance", "hardhat_setBalance", "anvil_setBalance"]
+
+
+def _word(value) -> bytes:
+    """ABI-encode an address or integer as a 32-byte word"""
+    if isinstance(value, int):
+        return value.to_bytes(32, "big")
+    return to_canonical_address(str(getattr(value, "address", value))).rjust(32, b"\0")
+
+
+def mapping_slot(key, slot: int) -> int:
+    """Storage slot of ``mapping[key]`` declared at ``slot``"""
+    return int.from_bytes(keccak(_word(key) + _word(slot)), "big")
+
+
+def array_element_slot(slot: int, index: int, element_size: int = 1) -> int:
+    """Storage slot of element ``index`` of a dynamic array declared at ``slot``"""
+    return int.from_bytes(keccak(_word(slot)), "big") + index * element_size
+
+
+def depositor_addresses(count: int, start: int = 1) -> List[str]:
+    """Deterministic depositor addresses ``address(uint160(i))``
+
+    These match the mock iteration in ``SecureVault.distributeToPaginated``,
+    so paginated distribution actually visits the injected balances.
+    """
+    return ["0x" + f"{i:040x}" for i in range(start, start + count)]
+
+
+class StorageStateBuilder:
+    """Stage storage writes against a contract's layout and commit them in bulk"""
+
+    def __init__(self, contract, layout: Optional[Dict[str, Dict[str, Any]]] = None,
+                 w3=None, backend=None):
+        self.contract = contract
+        self.name = getattr(contract, "_name", type(contract).__name__)
+        self.layout = layout or storage_layout(self.name)
+        if not self.layout:
+            raise KeyError(f"No storage layout for {self.name}")
+        self.backend = backend
+        self.w3 = w3
+        if self.w3 is None and backend is None:
+            from brownie import network
+            self.w3 = network.web3
+        self._pending = {}
+        self._storage_method = None
+        self._balance_method = None
+
+    def _variable(self, name: str, expected_type: str) -> Dict[str, Any]:
+        variable = self.layout[name]
+        if variable["type"] != expected_type:
+            raise ValueError(f"{self.name}.{name} is a {variable['type']}, not a {expected_type}")
+        return variable
+
+    def set_value(self, name: str, value: int):
+        """Stage a write to a plain storage variable"""
+        self._pending[self._variable(name, "value")["slot"]] = value
+
+    def set_mapping(self, name: str, key, value: int, field: int = 0):
+        """Stage ``name[key] = value`` (``field`` selects a struct member slot)
+
+        Nested mappings take a tuple key: ``("pendingReturns", (auction_id, user))``.
+        """
+        slot = self._variable(name, "mapping")["slot"]
+        for part in (key if isinstance(key, tuple) else (key,)):
+            slot = mapping_slot(part, slot)
+        self._pending[slot + field] = value
+
+    def set_array(self, name: str, values: List[Any]):
+        """Stage a dynamic array's length and elements"""
+        variable = self._variable(name, "array")
+        self._pending[variable["slot"]] = len(values)
+        for index, value in enumerate(values):
+            word = value if isinstance(value, int) else int.from_bytes(_word(value), "big")
+            self._pending[array_element_slot(variable["slot"], index, variable.get("struct_size", 1))] = word
+
+    def pending_writes(self) -> int:
+        return len(self._pending)
+
+    def commit(self):
+        """Write every staged slot to the chain"""
+        if self.backend is not None and hasattr(self.backend, "set_storage"):
+            self.backend.set_storage(self.contract.address, dict(self._pending))
+        else:
+            writes = list(self._pending.items())
+            if writes:
+                # The first write discovers the node's set-storage method; the rest go in batches
+                self._rpc_set_storage(*writes[0])
+                responses = batch_request(self.w3, [
+                    (self._storage_method, self._storage_params(slot, value)) for slot, value in writes[1:]
+                ])
+                failed = [response["error"] for response in responses if "error" in response]
+                if failed:
+                    raise RuntimeError(f"{len(failed)} storage writes failed: {failed[0]}")
+            self._mine()
+        self._pending = {}
+
+    def set_ether_balance(self, balance: int):
+        """Overwrite the contract's ether balance to match injected accounting"""
+        if self.backend is not None and hasattr(self.backend, "set_balance"):
+            self.backend.set_balance(self.contract.address, balance)
+            return
+        self._balance_method = self._call_first_supported(
+            self._balance_method, SET_BALANCE_METHODS, [self.contract.address, hex(balance)]
+        )
+        self._mine()
+    
+    def _mine(self):
+        """Mine a block so the injected writes show up in the latest state root"""
+        self.w3.provider.make_request("evm_mine", [])
+
+    def _storage_params(self, slot: int, value: int) -> List[str]:
+        return [self.contract.address, "0x" + f"{slot:064x}", "0x" + f"{value:064x}"]
+
+    def _rpc_set_storage(self, slot: int, value: int):
+        params = self._storage_params(slot, value)
+        self._storage_method = self._call_first_supported(self._storage_method, SET_STORAGE_METHODS, params)
+
+    def _call_first_supported(self, known: Optional[str], methods: List[str], params: List[Any]) -> str:
+        """Call the known-good method, or discover one the node supports"""
+        for method in ([known] if known else methods):
+            response = self.w3.provider.make_request(method, params)
+            if "error" not in response:
+                return method
+        raise RuntimeError(f"Node supports none of {methods}")
+
+    def build_depositors(self, depositors: Dict[str, int], deposit_time: int = 1) -> Dict[str, int]:
+        """Inject vault depositors: balances, deposit times, totals and ether backing"""
+        total = sum(depositors.values())
+        for depositor, amount in depositors.items():
+            self.set_mapping("balances", depositor, amount)
+            self.set_mapping("depositTimes", depositor, deposit_time)
+
+        self.set_value("totalDeposits", self.contract.totalDeposits() + total)
+        self.commit()
+        self.set_ether_balance(self.contract.balance() + total)
+        return depositors
+
+    def verify(self, expected: Dict[str, int], view: str = "balances", samples: Optional[int] = 25) -> Dict[str, Any]:
+        """Read a random sample (or everything, with ``samples=None``) back in batches and report mismatches"""
+        keys = list(expected)
+        checked = keys if samples is None else random.sample(keys, min(samples, len(keys)))
+        reader = BatchReader(w3=self.w3, backend=self.backend)
+
+        mismatches = []
+        for key, actual in zip(checked, reader.read(getattr(self.contract, view), checked)):
+            if actual != expected[key]:
+                mismatches.append({"key": key, "expected": expected[key], "actual": actual})
+
+        return {"checked": len(checked), "mismatches": mismatches}
+
+
+def build_vault_depositors(vault, count: int, amount: int = 10**18, w3=None, backend=None,
+                           samples: Optional[int] = 25) -> Dict[str, Any]:
+    """Give a vault ``count`` depositors of ``amount`` wei each and verify the result"""
+    builder = StorageStateBuilder(vault, w3=w3, backend=backend)
+    initial_total = vault.totalDeposits()
+    depositors = builder.build_depositors({a: amount for a in depositor_addresses(count)})
+
+    verification = builder.verify(depositors, samples=samples)
+    expected_total = initial_total + count * amount
+    if vault.totalDeposits() != expected_total:
+        verification["mismatches"].append({
+            "key": "totalDeposits", "expected": expected_total, "actual": vault.totalDeposits()
+        })
+
+    return {"depositors": list(depositors), **verification}
@@ -0,0 +1,222 @@
+"""
+Snapshot/revert state management for fast test isolation
+
+Named base states are built from a clean chain (``chain.reset()``), captured
+with ``chain.snapshot()`` and restored with ``chain.revert()`` before each
+test that needs them, so deployment cost is paid once per run of tests
+sharing a state instead of per test. Going through brownie's chain keeps its
+transaction history, contract registry and clock in step with the node.
+
+Brownie holds a single snapshot, so the engine keeps one state at a time:
+switching to a state that does not extend the current one rebuilds it from
+genesis. ``order_items`` groups tests by the state they load so switches are
+rare. Code that needs its own rollback inside a test uses ``rollback()``.
+"""
+from typing import Dict, List, Any, Optional, Callable
+from contextlib import contextmanager
+from brownie import chain
+import re
+import time
+
+
+# Who owns brownie's snapshot slot: an engine, or None after rollback() used it
+_slot_owner = None
+
+_STATE_CALL = re.compile(r"""base_state\(\s*["'](\w+)["']""")
+
+
+@contextmanager
+def rollback():
+    """Undo every state change made inside the block
+
+    Uses brownie's snapshot, so an engine holding it rebuilds its state the
+    next time a test loads one.
+    """
+    global _slot_owner
+    chain.snapshot()
+    _slot_owner = None
+    try:
+        yield
+    finally:
+        chain.revert()
+
+
+class SnapshotEngine:
+    """Build-once, revert-per-test manager for named base states"""
+
+    def __init__(self, genesis: Optional[Callable[[], None]] = None):
+        self.genesis = genesis
+        self._builders = {}
+        self._parents = {}
+        self._contracts = {}
+        self.current_state = None
+        self.timings = {
+            "build": {},
+            "revert": {},
+        }
+
+    def register(self, name: str, builder: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 base: Optional[str] = None):
+        """Register a named base state
+
+        ``builder`` receives the contracts of ``base`` (an empty dict for root
+        states) and returns the contracts added by this state.
+        """
+        if base is not None and base not in self._builders:
+            raise ValueError(f"Unknown base state: {base}")
+
+        self._builders[name] = builder
+        self._parents[name] = base
+
+    def base_state(self, name: str, base: Optional[str] = None):
+        """Decorator form of ``register``"""
+        def decorator(builder):
+            self.register(name, builder, base)
+            return builder
+        return decorator
+
+    def states(self) -> List[str]:
+        """List registered state names, parents before children"""
+        ordered = []
+
+        def visit(name):
+            ordered.append(name)
+            for child in self._builders:
+                if self._parents[child] == name:
+                    visit(child)
+
+        for name in self._builders:
+            if self._parents[name] is None:
+                visit(name)
+        return ordered
+
+    def path(self, name: str) -> List[str]:
+        """The state and its ancestors, root first"""
+        path = []
+        while name is not None:
+            path.insert(0, name)
+            name = self._parents[name]
+        return path
+
+    def activate(self, name: str) -> Dict[str, Any]:
+        """Bring the chain to the named state and return its contracts"""
+        global _slot_owner
+        if name not in self._builders:
+            raise ValueError(f"Unknown base state: {name}")
+
+        path = self.path(name)
+        held = self.current_state if _slot_owner is self else None
+
+        start = time.perf_counter()
+        if held in path:
+            # Same state, or one this state extends: undo the last test, build the rest
+            chain.revert()
+            remaining = path[path.index(held) + 1:]
+            if not remaining:
+                self.timings["revert"].setdefault(name, []).append(time.perf_counter() - start)
+        else:
+            chain.reset()
+            if self.genesis is not None:
+                self.genesis()
+            remaining = path
+
+        for state in remaining:
+            self._build(state)
+
+        if remaining:
+            chain.snapshot()
+            _slot_owner = self
+        self.current_state = name
+        return dict(self._contracts[name])
+
+    def _build(self, name: str):
+        """Run one state's builder on top of its parent's contracts"""
+        parent = self._parents[name]
+        parent_contracts = self._contracts[parent] if parent is not None else {}
+
+        start = time.perf_counter()
+        contracts = self._builders[name](dict(parent_contracts)) or {}
+        self.timings["build"].setdefault(name, []).append(time.perf_counter() - start)
+
+        merged = dict(parent_contracts)
+        merged.update(contracts)
+        self._contracts[name] = merged
+
+    def order_items(self, items: List[Any]) -> List[Any]:
+        """Group tests within each module by the base state they load
+
+        States are found from ``base_state("...")`` calls in the test source
+        and ordered parents first, so a module walks the state tree once
+        instead of rebuilding states it interleaves. Tests without a base
+        state keep their place at the front; the sort is stable.
+        """
+        import inspect
+
+        rank = {name: i for i, name in enumerate(self.states())}
+
+        def key(item):
+            try:
+                source = inspect.getsource(item.function)
+            except (AttributeError, OSError, TypeError):
+                return -1
+            used = [rank[name] for name in _STATE_CALL.findall(source) if name in rank]
+            return min(used) if used else -1
+
+        modules = {}
+        for item in items:
+            modules.setdefault(getattr(item, "fspath", None), []).append(item)
+        return [item for group in modules.values() for item in sorted(group, key=key)]
+
+    def get_timing_report(self) -> Dict[str, Any]:
+        """Summarize build cost versus per-test revert cost"""
+        builds = self.timings["build"]
+        reverts = self.timings["revert"]
+        return {
+            "states": {
+                name: {
+                    "builds": len(builds[name]),
+                    "build_seconds": sum(builds[name]),
+                    "reverts": len(reverts.get(name, [])),
+                    "revert_seconds": sum(reverts.get(name, [])),
+                }
+                for name in self._builders
+                if name in builds
+            },
+            "total_builds": sum(len(b) for b in builds.values()),
+            "total_build_seconds": sum(sum(b) for b in builds.values()),
+            "total_reverts": sum(len(r) for r in reverts.values()),
+            "total_revert_seconds": sum(sum(r) for r in reverts.values()),
+        }
+
+    def format_timing_report(self) -> str:
+        """Render the timing report as text"""
+        report = self.get_timing_report()
+        lines = ["⏱️  Snapshot fixture timings"]
+        for name, stats in report["states"].items():
+            lines.append(
+                f"  {name}: built {stats['builds']}x in {stats['build_seconds']:.3f}s, "
+                f"reverted {stats['reverts']}x in {stats['revert_seconds']:.3f}s"
+            )
+        lines.append(
+            f"  Total: {report['total_builds']} builds in {report['total_build_seconds']:.3f}s, "
+            f"{report['total_reverts']} reverts in {report['total_revert_seconds']:.3f}s"
+        )
+        return "\n".join(lines)
+
+
+def merge_timing_reports(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine timing reports from several processes (e.g. parallel test jobs)"""
+    states = {}
+    for report in reports:
+        for name, stats in report.get("states", {}).items():
+            merged = states.setdefault(name, {"builds": 0, "build_seconds": 0, "reverts": 0, "revert_seconds": 0})
+            for field in merged:
+                merged[field] += stats.get(field, 0)
+
+    return {
+        "states": states,
+        "total_builds": sum(s["builds"] for s in states.values()),
+        "total_build_seconds": sum(s["build_seconds"] for s in states.values()),
+        "total_reverts": sum(s["reverts"] for s in states.values()),
+        "total_revert_seconds": sum(s["revert_seconds"] for s in states.values()),
+    }
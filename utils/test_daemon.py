@@ -0,0 +1,342 @@
+"""
+Warm test daemon keeping the brownie project loaded and a chain running
+
+Every ``brownie test`` process imports brownie, loads and compiles the
+project and boots ganache before its first test. The daemon does that once:
+jobs arrive as newline-delimited JSON over a Unix socket, run in-process with
+``pytest.main`` and stream their output and per-test results back as they
+happen. After every job the chain is reset to its connect-time state with
+brownie's ``chain.reset()``, so jobs never see each other's state. Jobs run
+one at a time in the main thread, each with a timeout; pings are answered
+while a job is running.
+
+The client functions only need the standard library, so submitting a job
+costs no brownie import.
+"""
+from typing import Dict, List, Any, Optional, Callable, Iterator
+from pathlib import Path
+import _thread
+import contextlib
+import json
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+
+from utils.pytest_jsonl import OutcomeCounter, result_event
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SOCKET_ENV_VAR = "TEST_DAEMON_SOCKET"
+DEFAULT_SOCKET = "reports/test_daemon.sock"
+JOB_TIMEOUT = 300  # seconds, unless the request sets its own
+
+# Brownie's own plugin would load the project and connect again on every job
+PYTEST_ARGS = ["-p", "no:cacheprovider", "-p", "no:pytest-brownie"]
+
+
+def socket_path(path: Optional[str] = None) -> str:
+    """Socket from argument, ``TEST_DAEMON_SOCKET`` or reports/test_daemon.sock"""
+    return path or os.environ.get(SOCKET_ENV_VAR) or str(PROJECT_ROOT / DEFAULT_SOCKET)
+
+
+def request(message: Dict[str, Any], path: Optional[str] = None,
+            timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """Send one request and yield the response events as they arrive"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path(path))
+        sock.sendall((json.dumps(message) + "\n").encode())
+        with sock.makefile("r") as stream:
+            for line in stream:
+                yield json.loads(line)
+
+
+def daemon_available(path: Optional[str] = None) -> bool:
+    """Whether a daemon answers on the socket"""
+    try:
+        return any(event.get("event") == "pong" for event in request({"command": "ping"}, path, timeout=2))
+    except (OSError, ValueError):
+        return False
+
+
+def submit(args: List[str], env: Optional[Dict[str, str]] = None, path: Optional[str] = None,
+           on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+           timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Run a pytest job on the daemon; returns its final ``done`` event
+
+    ``on_event`` receives every streamed event; by default output is echoed.
+    ``timeout`` overrides the daemon's job timeout.
+    """
+    done = {"event": "done", "exit_code": 1, "error": "connection closed before the job finished"}
+    message = {"command": "run", "args": list(args), "env": env or {}}
+    if timeout is not None:
+        message["timeout"] = timeout
+    for event in request(message, path):
+        if on_event is not None:
+            on_event(event)
+        elif event["event"] == "output":
+            sys.stdout.write(event["text"])
+            sys.stdout.flush()
+        if event["event"] == "done":
+            done = event
+    return done
+
+
+class ResultStream:
+    """pytest plugin forwarding per-test results to the client"""
+
+    def __init__(self, send: Callable[[Dict[str, Any]], None], markers: Optional[Dict[str, str]] = None):
+        self.send = send
+        self.markers = markers or {}
+        self.outcomes = OutcomeCounter()
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return self.outcomes.counts
+
+    def pytest_configure(self, config):
+        # Markers are declared in brownie-config.yaml, which pytest itself does not read
+        for name, description in self.markers.items():
+            config.addinivalue_line("markers", f"{name}: {description}")
+
+    def pytest_runtest_logreport(self, report):
+        event = result_event(report)
+        if event is not None:
+            self.outcomes.add(report.nodeid, report.outcome)
+            self.send(event)
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self.send({"event": "collect_error", "nodeid": report.nodeid, "longrepr": str(report.longrepr)})
+
+
+class _OutputStream:
+    """stdout replacement streaming writes to the client"""
+
+    def __init__(self, send: Callable[[Dict[str, Any]], None]):
+        self.send = send
+
+    def write(self, text: str) -> int:
+        if text:
+            self.send({"event": "output", "text": text})
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+class TestDaemon:
+    """Owns the loaded project and the network connection"""
+
+    __test__ = False
+
+    def __init__(self, network_name: Optional[str] = None, job_timeout: float = JOB_TIMEOUT):
+        self.network_name = network_name
+        self.job_timeout = job_timeout
+        self.project = None
+        self.jobs = 0
+        self.busy = False
+
+    def start(self):
+        """Load the project and connect; every job starts from this chain state"""
+        from brownie import network, project
+
+        start = time.perf_counter()
+        os.chdir(PROJECT_ROOT)
+        self.project = project.load(PROJECT_ROOT)
+        self.project.load_config()
+        network.connect(self.network_name)
+        print(f"🔥 Project loaded on {network.show_active()} in {time.perf_counter() - start:.2f}s")
+
+    def reset(self):
+        """Back to the connect-time chain, through brownie so its history stays consistent"""
+        from brownie import chain
+        chain.reset()
+
+    def _purge_modules(self, include_utils: bool = False):
+        """Forget imported test modules (and utils) so edits are picked up"""
+        roots = [str(PROJECT_ROOT / "tests")]
+        if include_utils:
+            roots.append(str(PROJECT_ROOT / "utils"))
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None) or ""
+            if name == "conftest" or any(path.startswith(root) for root in roots):
+                del sys.modules[name]
+
+    def _markers(self) -> Dict[str, str]:
+        from brownie import config
+        try:
+            return dict(config["pytest"]["markers"])
+        except Exception:
+            return {}
+
+    def run(self, args: List[str], env: Dict[str, str], send: Callable[[Dict[str, Any]], None],
+            timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Run one pytest job in-process, streaming its output and results
+
+        A job still running after ``timeout`` seconds (default
+        ``job_timeout``) is interrupted like Ctrl+C; this needs ``run`` to be
+        called from the main thread, as ``serve`` does.
+        """
+        import pytest
+
+        timeout = timeout or self.job_timeout
+        timed_out = threading.Event()
+
+        def interrupt():
+            timed_out.set()
+            _thread.interrupt_main()
+
+        self._purge_modules()
+        plugin = ResultStream(send, self._markers())
+        saved_env = {key: os.environ.get(key) for key in env}
+        os.environ.update(env)
+        start = time.perf_counter()
+        timer = threading.Timer(timeout, interrupt)
+        try:
+            stream = _OutputStream(send)
+            timer.start()
+            try:
+                with contextlib.redirect_stdout(stream), contextlib.redirect_stderr(stream):
+                    exit_code = pytest.main([*PYTEST_ARGS, *args], plugins=[plugin])
+            except KeyboardInterrupt:
+                if not timed_out.is_set():
+                    raise
+                exit_code = pytest.ExitCode.INTERRUPTED
+            finally:
+                timer.cancel()
+        finally:
+            for key, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+            self.reset()
+            self.jobs += 1
+
+        done = {
+            "event": "done",
+            "exit_code": int(exit_code),
+            "seconds": round(time.perf_counter() - start, 3),
+            "timed_out": timed_out.is_set(),
+            **plugin.counts,
+        }
+        if timed_out.is_set():
+            done["error"] = f"Job timed out after {timeout}s"
+        return done
+
+    def reload(self):
+        """Recompile changed contracts and re-import utils on the next job"""
+        from brownie import project
+
+        self.project.close()
+        self._purge_modules(include_utils=True)
+        self.project = project.load(PROJECT_ROOT)
+        self.project.load_config()
+        self.reset()
+
+    def handle(self, message: Dict[str, Any], send: Callable[[Dict[str, Any]], None]) -> bool:
+        """Answer one request; returns False once the daemon should stop"""
+        command = message.get("command")
+        try:
+            if command == "ping":
+                send({"event": "pong", "jobs": self.jobs, "busy": self.busy})
+            elif command == "run":
+                self.busy = True
+                try:
+                    send(self.run(message.get("args", []), message.get("env", {}), send, message.get("timeout")))
+                finally:
+                    self.busy = False
+            elif command == "reload":
+                self.busy = True
+                try:
+                    self.reload()
+                finally:
+                    self.busy = False
+                send({"event": "done", "exit_code": 0})
+            elif command == "stop":
+                send({"event": "done", "exit_code": 0})
+                return False
+            else:
+                send({"event": "done", "exit_code": 2, "error": f"Unknown command: {command}"})
+        except Exception as e:
+            send({"event": "done", "exit_code": 1, "error": str(e)})
+        return True
+
+    def _accept(self, server: socket.socket, requests: "queue.Queue", stopped: threading.Event):
+        """Read requests off new connections; pings are answered here, the rest queued"""
+        while not stopped.is_set():
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return  # server closed
+
+            conn.settimeout(5)  # for the request line only
+            stream = conn.makefile("rwb")
+            try:
+                line = stream.readline()
+                message = json.loads(line) if line else None
+            except (OSError, ValueError):
+                message = None
+            conn.settimeout(None)
+
+            def send(event, stream=stream):
+                try:
+                    stream.write((json.dumps(event, default=str) + "\n").encode())
+                    stream.flush()
+                except OSError:
+                    pass  # client went away; finish the job anyway
+
+            if message is not None and message.get("command") == "ping":
+                self.handle(message, send)
+                message = None
+            if message is None:
+                stream.close()
+                conn.close()
+            else:
+                requests.put((message, send, stream, conn))
+
+    def serve(self, path: Optional[str] = None):
+        """Accept requests until ``stop`` or Ctrl+C
+
+        Jobs run in the calling thread, one at a time; a background thread
+        accepts connections so pings are answered while a job is running.
+        """
+        path = socket_path(path)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        if os.path.exists(path):
+            os.unlink(path)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+        server.listen()
+        server.settimeout(0.2)  # lets the acceptor notice shutdown
+        print(f"👂 Listening on {path}")
+
+        requests = queue.Queue()
+        stopped = threading.Event()
+        acceptor = threading.Thread(target=self._accept, args=(server, requests, stopped), daemon=True)
+        acceptor.start()
+
+        running = True
+        try:
+            while running:
+                message, send, stream, conn = requests.get()
+                with conn, stream:
+                    running = self.handle(message, send)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stopped.set()
+            acceptor.join(timeout=1)
+            server.close()
+            os.unlink(path)
+        print("👋 Test daemon stopped")
@@ -0,0 +1,210 @@
+"""
+Registry of security tester categories
+
+Every category declares the tester class it runs (as an import path, loaded
+on first use), the ``test_config`` entry that switches it on, the config
+entries that name contract functions, and any other ABI feature it needs.
+``build_run_plan`` matches these against a contract's ABI before anything
+touches the chain, so inapplicable categories cost nothing. Extra detectors
+register themselves with ``register_tester``; modules listed under
+``security.tester_plugins`` in brownie-config.yaml are imported on demand.
+"""
+from typing import Dict, List, Any, Optional, Callable, Iterable
+from utils.evm_backend import security_config
+import hashlib
+import importlib
+import inspect
+
+
+class TesterSpec:
+    """How to load, select and run one tester category"""
+
+    def __init__(self, name: str, target: str, run: Callable, config_key: Optional[str] = None,
+                 function_keys: Iterable[str] = (), abi_check: Optional[Callable] = None,
+                 abi_reason: str = "contract ABI does not apply", version: int = 1):
+        self.name = name
+        self.target = target  # "package.module:ClassName"
+        self.run = run  # run(tester, contract, test_config)
+        self.config_key = config_key
+        self.function_keys = tuple(function_keys)
+        self.abi_check = abi_check
+        self.abi_reason = abi_reason
+        self.version = version  # bump to invalidate cached results by hand
+        self._class = None
+        self._fingerprint = None
+
+    def load(self):
+        """Import the tester class (once)"""
+        if self._class is None:
+            module_name, _, class_name = self.target.partition(":")
+            self._class = getattr(importlib.import_module(module_name), class_name)
+        return self._class
+
+    def fingerprint(self) -> str:
+        """Tester version plus a hash of the tester and runner source
+
+        Editing the tester class, its base classes or the runner changes the
+        fingerprint, so results cached under the old one are not reused.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            for obj in [cls for cls in self.load().__mro__ if cls is not object] + [self.run]:
+                try:
+                    digest.update(inspect.getsource(obj).encode())
+                except (OSError, TypeError):
+                    digest.update(getattr(obj, "__qualname__", repr(obj)).encode())
+            self._fingerprint = f"{self.version}:{digest.hexdigest()[:16]}"
+        return self._fingerprint
+
+    def plan(self, abi: List[Dict[str, Any]], test_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Decide whether the category runs; returns its entry in the run plan"""
+        entry = {"name": self.name, "config": test_config, "skipped": None}
+        if not self.config_key or not test_config.get(self.config_key):
+            entry["skipped"] = f"no {self.config_key} in test_config" if self.config_key else "not configurable"
+            return entry
+
+        # Drop configured functions the contract does not have
+        functions = abi_function_names(abi)
+        config = dict(test_config)
+        for key in self.function_keys:
+            if isinstance(config.get(key), list):
+                config[key] = [name for name in config[key] if name in functions]
+        if self.config_key in self.function_keys and not config[self.config_key]:
+            entry["skipped"] = f"contract has none of the {self.config_key}"
+            return entry
+
+        if self.abi_check is not None and not self.abi_check(abi):
+            entry["skipped"] = self.abi_reason
+            return entry
+
+        entry["config"] = config
+        return entry
+
+
+TESTER_REGISTRY: Dict[str, TesterSpec] = {}
+
+_plugins_loaded = False
+
+
+def register_tester(spec: TesterSpec) -> TesterSpec:
+    """Add or replace a category; later registrations run after earlier ones"""
+    TESTER_REGISTRY[spec.name] = spec
+    return spec
+
+
+def load_plugins():
+    """Import the plugin modules listed under ``security.tester_plugins``"""
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+    for module_name in security_config().get("tester_plugins") or []:
+        importlib.import_module(module_name)
+
+
+def abi_function_names(abi: List[Dict[str, Any]]) -> set:
+    return {entry["name"] for entry in abi if entry.get("type") == "function"}
+
+
+def _has_state_changing_function(abi: List[Dict[str, Any]]) -> bool:
+    return any(
+        entry.get("type") == "function" and entry.get("stateMutability") not in ("view", "pure")
+        for entry in abi
+    )
+
+
+def build_run_plan(abi: List[Dict[str, Any]], test_config: Dict[str, Any],
+                   registry: Optional[Dict[str, TesterSpec]] = None) -> List[Dict[str, Any]]:
+    """Plan entries (name, effective config, skip reason) in registration order"""
+    load_plugins()
+    registry = TESTER_REGISTRY if registry is None else registry
+    return [spec.plan(abi, test_config) for spec in registry.values()]
+
+
+# Built-in categories
+
+def _run_reentrancy(tester, contract, test_config):
+    for func in test_config["reentrancy_functions"]:
+        tester.test_reentrancy(contract, func, test_config.get("amount", 1000))
+
+
+def _run_trace_reentrancy(tester, contract, test_config):
+    if "reentrancy_functions" in test_config:
+        for func in test_config["reentrancy_functions"]:
+            tester.check_function(contract, func, test_config.get("amount", 1000))
+    else:
+        tester.sweep([contract], test_config.get("amount", 1000))
+
+
+def _run_overflow(tester, contract, test_config):
+    for func in test_config["overflow_functions"]:
+        tester.test_overflow(
+            contract,
+            func,
+            test_config.get("large_input", 2**256 - 1),
+            pipelined=test_config.get("overflow_pipelined", False),
+            test_cases=test_config.get("overflow_inputs")
+        )
+
+
+def _run_access_control(tester, contract, test_config):
+    tester.test_access_control(
+        contract,
+        test_config["restricted_functions"],
+        dry_run=test_config.get("access_control_dry_run", False)
+    )
+
+
+def _run_access_matrix(tester, contract, test_config):
+    tester.scan(contract)
+
+
+def _run_gas_limit(tester, contract, test_config):
+    for func in test_config["gas_functions"]:
+        if test_config.get("gas_search"):
+            tester.find_gas_threshold(contract, func)
+        else:
+            tester.test_gas_limit(contract, func)
+
+
+def _run_nothing(tester, contract, test_config):
+    pass
+
+
+def _run_each(method_name: str, config_key: str):
+    def run(tester, contract, test_config):
+        for func in test_config[config_key]:
+            getattr(tester, method_name)(contract, func)
+    return run
+
+
+_HELPERS = "utils.security_helpers"
+
+for _spec in (
+    TesterSpec("reentrancy", f"{_HELPERS}:ReentrancyTester", _run_reentrancy,
+               "reentrancy_functions", function_keys=["reentrancy_functions"]),
+    TesterSpec("trace_reentrancy", f"{_HELPERS}:TraceReentrancyTester", _run_trace_reentrancy,
+               "trace_reentrancy", function_keys=["reentrancy_functions"],
+               abi_check=_has_state_changing_function, abi_reason="no state-changing functions to trace"),
+    TesterSpec("overflow", f"{_HELPERS}:IntegerOverflowTester", _run_overflow,
+               "overflow_functions", function_keys=["overflow_functions"]),
+    TesterSpec("access_control", f"{_HELPERS}:AccessControlTester", _run_access_control,
+               "restricted_functions", function_keys=["restricted_functions"]),
+    TesterSpec("access_matrix", f"{_HELPERS}:AccessControlMatrixScanner", _run_access_matrix,
+               "access_matrix", abi_check=_has_state_changing_function,
+               abi_reason="no state-changing functions to probe"),
+    TesterSpec("gas_limit", f"{_HELPERS}:GasLimitTester", _run_gas_limit,
+               "gas_functions", function_keys=["gas_functions"]),
+    # Front-running has no automated check yet; kept so its tester stays reachable
+    TesterSpec("front_running", f"{_HELPERS}:FrontRunningTester", _run_nothing),
+    TesterSpec("oracle", f"{_HELPERS}:OracleManipulationTester",
+               _run_each("test_oracle_manipulation", "oracle_functions"),
+               "oracle_functions", function_keys=["oracle_functions"]),
+    TesterSpec("slippage", f"{_HELPERS}:SlippageTester",
+               _run_each("test_slippage_protection", "swap_functions"),
+               "swap_functions", function_keys=["swap_functions"]),
+    TesterSpec("flash_loan", f"{_HELPERS}:FlashLoanTester",
+               _run_each("test_flash_loan_attack", "flash_loan_functions"),
+               "flash_loan_functions", function_keys=["flash_loan_functions"]),
+):
+    register_tester(_spec)
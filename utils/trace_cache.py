@@ -0,0 +1,139 @@
+"""
+Content-addressed on-disk cache for execution traces
+
+Traces are stored as gzip-compressed JSONL of compact opcode records (see
+utils/trace_tools.py), keyed by the runtime bytecode hash of the target, the
+calldata and the pre-state id (the state root of the block the call executes
+on). The same call against the same code and state is traced once and reused
+across runs; the least recently used entries are evicted once the cache grows
+past its size budget.
+"""
+from typing import Dict, List, Any, Optional, Iterable, Iterator
+from pathlib import Path
+from eth_utils import keccak
+from utils.evm_backend import security_config
+import gzip
+import hashlib
+import json
+import os
+
+
+DEFAULT_CACHE_DIR = "reports/trace_cache"
+DEFAULT_MAX_MB = 256
+
+
+def runtime_code_hash(w3, address: str) -> str:
+    """keccak of the runtime bytecode at ``address``"""
+    return "0x" + keccak(bytes(w3.eth.get_code(address))).hex()
+
+
+def pre_state_id(w3, block_identifier="latest") -> str:
+    """Identify the pre-state of the next call by the latest state root"""
+    state_root = w3.eth.get_block(block_identifier)["stateRoot"]
+    return state_root if isinstance(state_root, str) else "0x" + bytes(state_root).hex()
+
+
+class TraceCache:
+    """gzip JSONL trace store with size-bounded LRU eviction"""
+
+    def __init__(self, root: Optional[str] = None, max_mb: Optional[float] = None):
+        settings = security_config()
+        self.root = Path(root or settings.get("trace_cache_dir") or DEFAULT_CACHE_DIR)
+        self.max_bytes = int((max_mb or settings.get("trace_cache_mb") or DEFAULT_MAX_MB) * 1024 * 1024)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    @staticmethod
+    def key(code_hash: str, calldata: str, state: str, extra: Any = None) -> str:
+        """Cache key for a call; ``extra`` covers sender, value and setup calls"""
+        material = json.dumps([code_hash, calldata, state, extra], sort_keys=True, default=str)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.jsonl.gz"
+
+    def lookup(self, key: str) -> bool:
+        """Whether a trace is cached, counted as a hit or miss"""
+        found = self._path(key).exists()
+        self.stats["hits" if found else "misses"] += 1
+        return found
+
+    def iter(self, key: str) -> Iterator[Dict[str, Any]]:
+        """Stream a cached trace record by record and mark it as recently used"""
+        path = self._path(key)
+        os.utime(path, None)
+        with gzip.open(path, "rt") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Load a whole cached trace, or None"""
+        if not self.lookup(key):
+            return None
+        try:
+            return list(self.iter(key))
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, ops: Iterable[Dict[str, Any]]) -> int:
+        """Store a trace atomically, streaming it to disk; returns the record count
+
+        Old entries are evicted afterwards if the cache is over budget.
+        """
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        count = 0
+        with gzip.open(tmp_path, "wt") as f:
+            for record in ops:
+                f.write(json.dumps(record, separators=(",", ":")))
+                f.write("\n")
+                count += 1
+        os.replace(tmp_path, path)
+
+        self.stats["writes"] += 1
+        self.evict()
+        return count
+
+    def get_or_compute(self, key: str, compute) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached trace, or compute, store and return it
+
+        ``compute`` may return None (e.g. the call reverted); nothing is stored then.
+        """
+        ops = self.get(key)
+        if ops is not None:
+            return ops
+
+        ops = compute()
+        if ops is None:
+            return None
+        ops = list(ops)
+        self.put(key, ops)
+        return ops
+
+    def size(self) -> int:
+        """Total bytes of cached traces"""
+        return sum(p.stat().st_size for p in self.root.glob("*.jsonl.gz"))
+
+    def evict(self):
+        """Delete least recently used traces until the cache fits its budget"""
+        entries = []
+        for path in self.root.glob("*.jsonl.gz"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        """Remove every cached trace"""
+        for path in self.root.glob("*.jsonl.gz"):
+            path.unlink(missing_ok=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters plus current size"""
+        return {**self.stats, "bytes": self.size(), "max_bytes": self.max_bytes}
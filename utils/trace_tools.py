@@ -0,0 +1,227 @@
+"""
+Execution trace helpers
+
+Fetches ``debug_traceTransaction`` struct logs and reduces them to compact
+per-opcode records (pc, op, gas, depth plus the storage slot or call target
+read off the stack), which the trace-based analyses work on instead of the
+raw, very large JSON.
+"""
+from typing import Dict, List, Any, Iterable, Iterator, Optional
+from utils.rpc_metrics import get_rpc_metrics
+import json
+import re
+import time
+
+
+# Memory and storage snapshots are not needed for ordering analyses and
+# dominate the size of the trace
+TRACE_OPTIONS = {"disableMemory": True, "disableStorage": True}
+
+CALL_OPS = {"CALL", "CALLCODE", "DELEGATECALL", "STATICCALL"}
+STORAGE_OPS = {"SLOAD", "SSTORE"}
+
+ADDRESS_MASK = 2**160 - 1
+
+STREAM_CHUNK_SIZE = 1 << 16
+
+# Characters that change the parser state inside the structLogs array
+_STRUCTURAL = re.compile(rb'[{}"\\\]]')
+_STRUCT_LOGS_KEY = b'"structLogs"'
+
+
+def _stack_int(value) -> int:
+    """Stack entries are hex strings, with or without 0x, depending on the node"""
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+def fetch_struct_logs(w3, tx_hash, options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Fetch the struct logs of a mined transaction"""
+    if not isinstance(tx_hash, str):
+        tx_hash = "0x" + bytes(tx_hash).hex()
+    response = w3.provider.make_request("debug_traceTransaction", [tx_hash, options or TRACE_OPTIONS])
+    if "error" in response:
+        raise RuntimeError(f"debug_traceTransaction failed: {response['error']}")
+    return response["result"]["structLogs"]
+
+
+def compact_op(log: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce one struct log to the fields the analyses use"""
+    op = log["op"]
+    record = {
+        "pc": log["pc"],
+        "op": op,
+        "gas": log["gas"],
+        "gas_cost": log["gasCost"],
+        "depth": log["depth"],
+    }
+
+    stack = log.get("stack") or []
+    if op in STORAGE_OPS and stack:
+        record["slot"] = _stack_int(stack[-1])
+    elif op in CALL_OPS and len(stack) >= 2:
+        record["to"] = "0x" + f"{_stack_int(stack[-2]) & ADDRESS_MASK:040x}"
+        if op in ("CALL", "CALLCODE") and len(stack) >= 3:
+            record["value"] = _stack_int(stack[-3])
+
+    return record
+
+
+def iter_trace_ops(struct_logs: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Yield compact records for every executed opcode"""
+    for log in struct_logs:
+        yield compact_op(log)
+
+
+def iter_struct_log_objects(chunks: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """Incrementally parse the ``structLogs`` array of a raw trace response
+
+    Only the struct log currently being read is buffered, so memory stays
+    constant however long the trace is. Braces are matched outside of JSON
+    strings; each complete object is decoded and yielded on its own.
+    """
+    buffer = bytearray()
+    scan = 0            # next buffer index to examine
+    in_array = False
+    depth = 0
+    in_string = False
+    skip_until = 0      # index after an escaped character
+    start = None        # buffer index of the current object's "{"
+
+    for chunk in chunks:
+        buffer.extend(chunk)
+
+        if not in_array:
+            key = buffer.find(_STRUCT_LOGS_KEY)
+            bracket = buffer.find(b"[", key) if key != -1 else -1
+            if bracket == -1:
+                continue
+            in_array = True
+            scan = bracket + 1
+
+        objects = []
+        done = False
+        for match in _STRUCTURAL.finditer(buffer, scan):
+            pos = match.start()
+            if pos < skip_until:
+                continue
+            char = buffer[pos]
+
+            if in_string:
+                if char == 0x5C:  # backslash
+                    skip_until = pos + 2
+                elif char == 0x22:  # quote
+                    in_string = False
+            elif char == 0x22:
+                in_string = True
+            elif char == 0x7B:  # {
+                if depth == 0:
+                    start = pos
+                depth += 1
+            elif char == 0x7D:  # }
+                depth -= 1
+                if depth == 0:
+                    objects.append((start, pos + 1))
+                    start = None
+            elif char == 0x5D and depth == 0:  # ] closing structLogs
+                done = True
+                break
+
+        for begin, end in objects:
+            yield json.loads(bytes(buffer[begin:end]))
+        if done:
+            return
+
+        # Drop everything before the object still being read
+        keep_from = start if start is not None else len(buffer)
+        del buffer[:keep_from]
+        skip_until = max(0, skip_until - keep_from)
+        scan = len(buffer)
+        if start is not None:
+            start = 0
+
+    if not in_array:
+        response = json.loads(bytes(buffer) or b"{}")
+        raise RuntimeError(f"debug_traceTransaction failed: {response.get('error', response)}")
+
+
+def stream_struct_logs(endpoint_uri: str, tx_hash, options: Optional[Dict[str, Any]] = None,
+                       chunk_size: int = STREAM_CHUNK_SIZE, timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """Stream the struct logs of a transaction straight from the HTTP endpoint"""
+    import requests
+
+    if not isinstance(tx_hash, str):
+        tx_hash = "0x" + bytes(tx_hash).hex()
+    payload = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "debug_traceTransaction",
+        "params": [tx_hash, options or TRACE_OPTIONS],
+    }
+    received = 0
+    start = time.perf_counter()
+
+    def counted(chunks):
+        nonlocal received
+        for chunk in chunks:
+            received += len(chunk)
+            yield chunk
+
+    # Bypasses the web3 provider, so the request is recorded here
+    error = True
+    try:
+        with requests.post(endpoint_uri, json=payload, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            yield from iter_struct_log_objects(counted(response.iter_content(chunk_size)))
+        error = False
+    finally:
+        get_rpc_metrics().record(
+            "debug_traceTransaction", seconds=time.perf_counter() - start, error=error,
+            request_bytes=len(json.dumps(payload)), response_bytes=received,
+        )
+
+
+def stream_trace_ops(w3, tx_hash, options: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """Compact opcode records of a transaction, streamed when the node is HTTP
+
+    Falls back to loading the whole trace through web3 for IPC/websocket
+    providers.
+    """
+    endpoint_uri = str(getattr(w3.provider, "endpoint_uri", "") or "")
+    if endpoint_uri.startswith("http"):
+        return iter_trace_ops(stream_struct_logs(endpoint_uri, tx_hash, options))
+    return iter_trace_ops(fetch_struct_logs(w3, tx_hash, options))
+
+
+def find_stores_after_calls(ops: Iterable[Dict[str, Any]], depth: int = 1,
+                            value_only: bool = True) -> List[Dict[str, Any]]:
+    """SSTOREs in the frame at ``depth`` that follow an external call from it
+
+    Slots already written before the first call are skipped: a write on both
+    sides of the call is a reentrancy lock being released, not deferred
+    accounting.
+    """
+    first_call = None
+    written_before = set()
+    findings = []
+
+    for record in ops:
+        if record["depth"] != depth:
+            continue
+
+        op = record["op"]
+        if op in ("CALL", "CALLCODE") and first_call is None:
+            if record.get("value", 0) > 0 or not value_only:
+                first_call = record
+        elif op == "SSTORE":
+            if first_call is None:
+                written_before.add(record["slot"])
+            elif record["slot"] not in written_before:
+                findings.append({
+                    "call_pc": first_call["pc"],
+                    "call_to": first_call["to"],
+                    "call_value": first_call.get("value", 0),
+                    "sstore_pc": record["pc"],
+                    "slot": record["slot"],
+                })
+
+    return findings